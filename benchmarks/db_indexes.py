@@ -0,0 +1,203 @@
+"""
+Query plans and latency of hot lookups before and after index migration 2.
+
+Seeds a local SQLite database with the bot schema (MySQL is not required)
+and runs every hot query before and after applying the SQLite upgrade of
+migrations/models/2_20261018130000_hot_indexes.py, as aerich runs it.
+
+    python -m benchmarks.db_indexes --rows 1000000
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import random
+import sqlite3
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+MIGRATION = (
+    Path(__file__).parents[1]
+    / "migrations"
+    / "models"
+    / "2_20261018130000_hot_indexes.py"
+)
+
+SCHEMA = """
+CREATE TABLE servers (
+    id INTEGER PRIMARY KEY,
+    dis_id BIGINT NOT NULL,
+    dis_adv_channel_id BIGINT NOT NULL
+);
+CREATE TABLE creatorchannels (
+    id INTEGER PRIMARY KEY,
+    dis_id BIGINT NOT NULL,
+    dis_category_id BIGINT NOT NULL,
+    server_id INT NOT NULL REFERENCES servers (id)
+);
+CREATE TABLE tempchannels (
+    id INTEGER PRIMARY KEY,
+    dis_id BIGINT NOT NULL,
+    dis_creator_id BIGINT NOT NULL,
+    dis_owner_id BIGINT NOT NULL,
+    dis_adv_msg_id BIGINT,
+    deleted BOOL NOT NULL DEFAULT 0,
+    server_id INT NOT NULL REFERENCES servers (id)
+);
+CREATE TABLE tcbans (
+    id INTEGER PRIMARY KEY,
+    dis_creator_id BIGINT NOT NULL,
+    dis_banned_id BIGINT NOT NULL,
+    banned BOOL NOT NULL DEFAULT 1,
+    server_id INT NOT NULL REFERENCES servers (id)
+);
+"""
+
+QUERIES = {
+    "servers by dis_id": "SELECT * FROM servers WHERE dis_id = ?",
+    "creator channels of server": (
+        "SELECT * FROM creatorchannels WHERE server_id = ?"
+    ),
+    "temp channel by dis_id": "SELECT * FROM tempchannels WHERE dis_id = ?",
+    "temp channels to restore": (
+        "SELECT * FROM tempchannels WHERE deleted = 0"
+    ),
+    "creator ban list": (
+        "SELECT dis_banned_id FROM tcbans "
+        "WHERE server_id = ? AND dis_creator_id = ? AND banned = 1"
+    ),
+}
+
+SNOWFLAKE_BASE = 1_000_000_000_000_000_000
+CREATORS_PER_SERVER = 1_000
+
+
+def seed(db: sqlite3.Connection, rows: int, servers: int) -> None:
+    db.executescript(SCHEMA)
+    db.executemany(
+        "INSERT INTO servers VALUES (?, ?, ?)",
+        ((i, SNOWFLAKE_BASE + i, 0) for i in range(1, servers + 1)),
+    )
+    db.executemany(
+        "INSERT INTO creatorchannels VALUES (?, ?, 0, ?)",
+        (
+            (i, SNOWFLAKE_BASE + i, i % servers + 1)
+            for i in range(1, servers * 2 + 1)
+        ),
+    )
+    db.executemany(
+        "INSERT INTO tempchannels VALUES (?, ?, ?, ?, NULL, ?, ?)",
+        (
+            (
+                i,
+                SNOWFLAKE_BASE + i,
+                i % CREATORS_PER_SERVER,
+                i % CREATORS_PER_SERVER,
+                i % 100 != 0,  # 1% of channels are alive
+                i % servers + 1,
+            )
+            for i in range(1, rows + 1)
+        ),
+    )
+    db.executemany(
+        "INSERT INTO tcbans VALUES (?, ?, ?, ?, ?)",
+        (
+            (
+                i,
+                i % CREATORS_PER_SERVER,
+                SNOWFLAKE_BASE + i,
+                i % 10 != 0,
+                i % servers + 1,
+            )
+            for i in range(1, rows + 1)
+        ),
+    )
+    db.commit()
+
+
+def migration_sql() -> str:
+    """SQLite upgrade of the migration, its dedupe steps included"""
+    spec = importlib.util.spec_from_file_location("hot_indexes", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    sqlite = SimpleNamespace(capabilities=SimpleNamespace(dialect="sqlite"))
+    return asyncio.run(migration.upgrade(sqlite))
+
+
+def params(query: str, rows: int, servers: int) -> tuple:
+    match query:
+        case "servers by dis_id":
+            return (SNOWFLAKE_BASE + random.randint(1, servers),)
+        case "creator channels of server":
+            return (random.randint(1, servers),)
+        case "temp channel by dis_id":
+            return (SNOWFLAKE_BASE + random.randint(1, rows),)
+        case "creator ban list":
+            return (
+                random.randint(1, servers),
+                random.randrange(CREATORS_PER_SERVER),
+            )
+    return ()
+
+
+def run(
+    db: sqlite3.Connection, rows: int, servers: int, repeat: int
+) -> dict[str, tuple[str, float]]:
+    """:return: query name -> (query plan, mean latency in ms)"""
+    results = {}
+    for name, sql in QUERIES.items():
+        plan = "; ".join(
+            row[-1]
+            for row in db.execute(
+                f"EXPLAIN QUERY PLAN {sql}", params(name, rows, servers)
+            )
+        )
+        started_at = time.perf_counter()
+        for _ in range(repeat):
+            db.execute(sql, params(name, rows, servers)).fetchall()
+        results[name] = (
+            plan,
+            (time.perf_counter() - started_at) / repeat * 1000,
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--servers", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--db", default=":memory:")
+    args = parser.parse_args()
+
+    random.seed(0)
+    db = sqlite3.connect(args.db)
+    started_at = time.perf_counter()
+    seed(db, args.rows, args.servers)
+    print(
+        f"Seeded {args.rows} temp channels and bans "
+        f"in {time.perf_counter() - started_at:.1f}s\n"
+    )
+
+    before = run(db, args.rows, args.servers, args.repeat)
+    started_at = time.perf_counter()
+    db.executescript(migration_sql())
+    print(f"Migrated in {time.perf_counter() - started_at:.1f}s\n")
+    after = run(db, args.rows, args.servers, args.repeat)
+
+    for name in QUERIES:
+        (plan_before, ms_before), (plan_after, ms_after) = (
+            before[name],
+            after[name],
+        )
+        print(
+            f"{name}\n"
+            f"  before: {ms_before:9.3f} ms  {plan_before}\n"
+            f"  after:  {ms_after:9.3f} ms  {plan_after}\n"
+            f"  speedup: x{ms_before / max(ms_after, 1e-6):.0f}\n"
+        )
+
+
+if __name__ == "__main__":
+    main()
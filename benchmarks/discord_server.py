@@ -0,0 +1,1225 @@
+"""
+Local stand-in of the Discord REST API and gateway for offline tests.
+
+Implements the REST endpoints the bot uses (channels, messages, invites,
+permission overwrites, member moves, login and command sync) and a JSON
+gateway (HELLO, IDENTIFY, READY, GUILD_CREATE, heartbeats) which sends
+the events Discord sends after those requests. Every response carries
+per-route rate limit headers, exhausted buckets, channel renames and the
+global limit are answered with 429 like Discord does. Latency, 429 and
+5xx responses can be injected with Faults.
+
+A bot is pointed at it with DISCORD_API_URL and DISCORD_GATEWAY_URL (see
+main.py), in-process with DiscordStandIn.point_discord().
+
+    python -m benchmarks.discord_server --port 8900 --guilds 2 --members 20
+
+Members are moved with POST /_standin/voice/{guild_id}/{user_id} and
+{"channel_id": id or null}, faults are changed with PATCH /_standin/faults
+and counters are read from GET /_standin/stats.
+
+Component and modal interactions of users are sent with interact(), the
+bot answers them through the interaction callback and webhook endpoints.
+Ephemeral responses are kept per user, so their components can be used
+by later interactions.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from aiohttp import WSMsgType, web
+
+API_PATH = "/api/v10"
+DISCORD_EPOCH = 1420070400000
+
+TEXT, VOICE, CATEGORY = 0, 2, 4
+COMPONENT, MODAL_SUBMIT = 3, 5
+USER_SELECT = 5
+EPHEMERAL = 1 << 6
+# Ephemeral responses kept per user
+EPHEMERAL_KEPT = 25
+
+# (method, route) -> (requests, per seconds), close to the Discord limits.
+# Buckets are per major parameter (channel or guild), like Discord does
+ROUTE_LIMITS = {
+    ("POST", "/channels/{channel_id}/messages"): (5, 5.0),
+    ("PATCH", "/channels/{channel_id}/messages/{message_id}"): (5, 5.0),
+    ("DELETE", "/channels/{channel_id}/messages/{message_id}"): (5, 1.0),
+    ("POST", "/channels/{channel_id}/messages/bulk-delete"): (1, 1.0),
+    ("GET", "/channels/{channel_id}/messages"): (5, 5.0),
+    ("PATCH", "/channels/{channel_id}"): (5, 5.0),
+    ("DELETE", "/channels/{channel_id}"): (5, 5.0),
+    ("PUT", "/channels/{channel_id}/permissions/{overwrite_id}"): (10, 10.0),
+    ("DELETE", "/channels/{channel_id}/permissions/{overwrite_id}"): (
+        10,
+        10.0,
+    ),
+    ("GET", "/channels/{channel_id}/invites"): (5, 5.0),
+    ("POST", "/channels/{channel_id}/invites"): (5, 5.0),
+    ("POST", "/guilds/{guild_id}/channels"): (5, 5.0),
+    ("PATCH", "/guilds/{guild_id}/members/{user_id}"): (10, 10.0),
+}
+DEFAULT_LIMIT = (10, 1.0)
+# Name changes of a channel, a sub-limit of its PATCH bucket
+RENAME_LIMIT = (2, 600.0)
+GLOBAL_LIMIT = (50, 1.0)
+
+
+def json_response(
+    data, *, status: int = 200, headers: dict | None = None
+) -> web.Response:
+    # discord.py expects exactly "application/json", without charset
+    return web.Response(
+        body=json.dumps(data).encode(),
+        status=status,
+        headers={"Content-Type": "application/json"} | (headers or {}),
+    )
+
+
+@dataclass
+class Faults:
+    """Injected into every REST request, probabilities are 0..1"""
+
+    latency: float = 0.0  # Seconds added to every response
+    jitter: float = 0.0  # Up to this many seconds more
+    rate_429: float = 0.0  # Shared resource 429, not shown by headers
+    rate_5xx: float = 0.0
+    retry_after: float = 0.5  # Of injected 429s
+    statuses: tuple[int, ...] = (500, 502, 503, 504)
+
+
+class Bucket:
+    """Fixed window rate limit, as Discord reports it in headers"""
+
+    __slots__ = ("limit", "per", "hash", "count", "reset_at")
+
+    def __init__(self, limit: int, per: float, bucket_hash: str = ""):
+        self.limit = limit
+        self.per = per
+        self.hash = bucket_hash
+        self.count = 0
+        self.reset_at = 0.0
+
+    def hit(self) -> float:
+        """:return: 0 if the request is allowed, else seconds to retry"""
+        now = time.time()
+        if now >= self.reset_at:
+            self.count, self.reset_at = 0, now + self.per
+        if self.count >= self.limit:
+            return self.reset_at - now
+        self.count += 1
+        return 0.0
+
+    def headers(self) -> dict[str, str]:
+        return {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(max(0, self.limit - self.count)),
+            "X-RateLimit-Reset": f"{self.reset_at:.3f}",
+            "X-RateLimit-Reset-After": (
+                f"{max(0.0, self.reset_at - time.time()):.3f}"
+            ),
+            "X-RateLimit-Bucket": self.hash,
+        }
+
+
+class _GatewaySession:
+    __slots__ = ("ws", "queue", "sequence", "writer")
+
+    def __init__(self, ws: web.WebSocketResponse):
+        self.ws = ws
+        self.queue: asyncio.Queue[tuple[str, dict]] = asyncio.Queue()
+        self.sequence = 0
+        self.writer = asyncio.create_task(self._write())
+
+    async def _write(self) -> None:
+        while True:
+            event, data = await self.queue.get()
+            self.sequence += 1
+            await self.ws.send_json(
+                {"op": 0, "t": event, "s": self.sequence, "d": data}
+            )
+
+
+class DiscordStandIn:
+    """
+    In-memory Discord: guilds, channels, members, voice states, messages.
+
+    Seed it with add_guild/add_member/add_channel/add_message before the
+    bot connects, act as users with move_member. Request, response status
+    and 429 counters are kept for reports.
+    """
+
+    def __init__(self, faults: Faults | None = None):
+        self.faults = faults or Faults()
+
+        self.requests: Counter[str] = Counter()  # "METHOD route" -> count
+        self.responses: Counter[int] = Counter()  # Status -> count
+        self.rate_limited: Counter[str] = Counter()  # 429 reason -> count
+
+        self._ids = itertools.count()
+        self.bot_user = self._user(self.new_id(), "PartySys", bot=True)
+        self.application_id = self.new_id()
+
+        self.guilds: dict[int, dict] = {}
+        self.channels: dict[int, dict] = {}
+        self.members: dict[int, dict[int, dict]] = {}  # Guild -> user -> ...
+        self.voice_states: dict[int, dict[int, dict]] = {}
+        self.messages: dict[int, dict[int, dict]] = {}  # Channel -> id -> ...
+        self.invites: dict[int, list[dict]] = {}
+        # Interaction id -> user_id, message, dispatched_at, answered_at,
+        # response type and response message
+        self.interactions: dict[int, dict] = {}
+        self.ephemeral: dict[int, dict[int, dict]] = {}  # User -> id -> ...
+        self.modals: dict[int, dict] = {}  # User -> last modal shown
+        # CHANNEL_UPDATE events caused by the bot requests, per channel
+        self.channel_updates: Counter[int] = Counter()
+
+        self._buckets: dict[str, Bucket] = {}
+        self._renames: dict[int, Bucket] = {}
+        self._global = Bucket(*GLOBAL_LIMIT)
+        self._sessions: set[_GatewaySession] = set()
+
+        self.app = self._build_app()
+        self.url = ""
+        self._runner: web.AppRunner | None = None
+
+    # Lifecycle
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+
+    async def stop(self) -> None:
+        for session in list(self._sessions):
+            session.writer.cancel()
+            await session.ws.close()
+        if self._runner:
+            await self._runner.cleanup()
+
+    @property
+    def api_url(self) -> str:
+        return self.url + API_PATH
+
+    @property
+    def gateway_url(self) -> str:
+        return self.url.replace("http", "ws", 1) + "/gateway"
+
+    def point_discord(self) -> None:
+        """Send requests of discord.py clients in this process here"""
+        import discord
+        import yarl
+
+        discord.http.Route.BASE = self.api_url
+        discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(
+            self.gateway_url
+        )
+
+    # Seeding and user actions
+
+    def new_id(self) -> int:
+        timestamp = int(time.time() * 1000) - DISCORD_EPOCH
+        return timestamp << 22 | next(self._ids) & 0x3FFFFF
+
+    def add_guild(self, name: str = "guild") -> int:
+        guild_id = self.new_id()
+        self.guilds[guild_id] = {
+            "id": str(guild_id),
+            "name": name,
+            "owner_id": self.bot_user["id"],
+            "roles": [
+                {
+                    "id": str(guild_id),
+                    "name": "@everyone",
+                    "permissions": "0",
+                    "position": 0,
+                    "color": 0,
+                    "hoist": False,
+                    "managed": False,
+                    "mentionable": False,
+                }
+            ],
+        }
+        self.members[guild_id] = {}
+        self.voice_states[guild_id] = {}
+        self._add_member(guild_id, self.bot_user)
+        return guild_id
+
+    def add_member(self, guild_id: int, name: str) -> int:
+        user = self._user(self.new_id(), name)
+        self._add_member(guild_id, user)
+        return int(user["id"])
+
+    def add_channel(
+        self,
+        guild_id: int,
+        channel_type: int,
+        name: str,
+        parent_id: int | None = None,
+        **fields,
+    ) -> int:
+        channel = self._channel(
+            guild_id, channel_type, name, parent_id, **fields
+        )
+        self.dispatch("CHANNEL_CREATE", channel)
+        return int(channel["id"])
+
+    def add_message(self, channel_id: int, author_id: int, **fields) -> int:
+        channel = self.channels[channel_id]
+        guild_id = int(channel["guild_id"])
+        message = self._message(
+            channel, self.members[guild_id][author_id]["user"], fields
+        )
+        return int(message["id"])
+
+    def move_member(
+        self, guild_id: int, user_id: int, channel_id: int | None
+    ) -> None:
+        """Member joins, switches or leaves a voice channel by itself"""
+        state = {
+            "guild_id": str(guild_id),
+            "channel_id": str(channel_id) if channel_id else None,
+            "user_id": str(user_id),
+            "member": self.members[guild_id][user_id],
+            "session_id": f"session-{user_id}",
+            "deaf": False,
+            "mute": False,
+            "self_deaf": False,
+            "self_mute": False,
+            "self_stream": False,
+            "self_video": False,
+            "suppress": False,
+            "request_to_speak_timestamp": None,
+        }
+        if channel_id:
+            self.voice_states[guild_id][user_id] = state
+        else:
+            self.voice_states[guild_id].pop(user_id, None)
+        self.dispatch("VOICE_STATE_UPDATE", state)
+
+    def voice_channel_of(self, guild_id: int, user_id: int) -> int | None:
+        if state := self.voice_states[guild_id].get(user_id):
+            return int(state["channel_id"])
+        return None
+
+    def update_channel(self, channel_id: int) -> None:
+        """Channel is edited by a user, not through the bot"""
+        self.dispatch("CHANNEL_UPDATE", self.channels[channel_id])
+
+    def interact(
+        self,
+        guild_id: int,
+        channel_id: int,
+        user_id: int,
+        interaction_type: int,
+        data: dict,
+        message: dict | None = None,
+    ) -> int:
+        """
+        User uses a component of message or submits a modal.
+
+        :return: interaction id, see interactions for the answer
+        """
+        interaction_id = self.new_id()
+        payload = {
+            "id": str(interaction_id),
+            "application_id": str(self.application_id),
+            "type": interaction_type,
+            "token": f"token-{interaction_id}",
+            "version": 1,
+            "guild_id": str(guild_id),
+            "channel_id": str(channel_id),
+            "channel": self.channels[channel_id],
+            "member": self.members[guild_id][user_id] | {"permissions": "0"},
+            "data": data,
+            "app_permissions": "0",
+            "locale": "ru",
+            "guild_locale": "ru",
+        }
+        if message:
+            payload["message"] = message
+        self.interactions[interaction_id] = {
+            "user_id": user_id,
+            "channel_id": channel_id,
+            "message": message,
+            "dispatched_at": time.perf_counter(),
+            "answered_at": None,
+            "response": None,
+            "response_message": None,
+        }
+        self.dispatch("INTERACTION_CREATE", payload)
+        return interaction_id
+
+    def component_data(
+        self,
+        guild_id: int,
+        component_type: int,
+        custom_id: str,
+        values: list[str] = (),
+    ) -> dict:
+        data = {"component_type": component_type, "custom_id": custom_id}
+        if component_type != 2:  # Not a button
+            data["values"] = list(values)
+        if component_type == USER_SELECT:
+            members = {
+                value: self.members[guild_id][int(value)] for value in values
+            }
+            data["resolved"] = {
+                "users": {
+                    value: member["user"] for value, member in members.items()
+                },
+                "members": {
+                    value: {
+                        field: member_value
+                        for field, member_value in member.items()
+                        if field != "user"
+                    }
+                    | {"permissions": "0"}
+                    for value, member in members.items()
+                },
+            }
+        return data
+
+    def modal_data(self, user_id: int, values: list[str]) -> dict | None:
+        """Submission of the last modal shown to user, None if none was"""
+        if not (modal := self.modals.pop(user_id, None)):
+            return None
+        text_inputs = [
+            component
+            for row in modal["components"]
+            for component in row["components"]
+        ]
+        return {
+            "custom_id": modal["custom_id"],
+            "components": [
+                {
+                    "type": 1,
+                    "components": [
+                        {
+                            "type": 4,
+                            "custom_id": text_input["custom_id"],
+                            "value": value,
+                        }
+                    ],
+                }
+                for text_input, value in zip(text_inputs, values)
+            ],
+        }
+
+    def find_component(
+        self, channel_id: int, user_id: int, custom_id: str
+    ) -> dict | None:
+        """Newest message seen by user with component custom_id"""
+        for message in itertools.chain(
+            reversed(self.ephemeral.get(user_id, {}).values()),
+            reversed(self.messages.get(channel_id, {}).values()),
+        ):
+            for row in message["components"]:
+                for component in row.get("components", ()):
+                    if component.get("custom_id") == custom_id:
+                        return message
+        return None
+
+    def dispatch(self, event: str, data: dict) -> None:
+        for session in self._sessions:
+            session.queue.put_nowait((event, data))
+
+    # Payloads
+
+    def _user(self, user_id: int, name: str, bot: bool = False) -> dict:
+        return {
+            "id": str(user_id),
+            "username": name,
+            "global_name": name,
+            "discriminator": "0",
+            "avatar": None,
+            "bot": bot,
+            "public_flags": 0,
+        }
+
+    def _add_member(self, guild_id: int, user: dict) -> None:
+        self.members[guild_id][int(user["id"])] = {
+            "user": user,
+            "nick": None,
+            "avatar": None,
+            "roles": [],
+            "joined_at": datetime.now(timezone.utc).isoformat(),
+            "deaf": False,
+            "mute": False,
+            "flags": 0,
+        }
+
+    def _channel(
+        self,
+        guild_id: int,
+        channel_type: int,
+        name: str,
+        parent_id: int | str | None = None,
+        **fields,
+    ) -> dict:
+        channel = {
+            "id": str(self.new_id()),
+            "type": channel_type,
+            "guild_id": str(guild_id),
+            "name": name,
+            "position": len(self.channels),
+            "parent_id": str(parent_id) if parent_id else None,
+            "permission_overwrites": [],
+            "nsfw": False,
+            "last_message_id": None,
+        }
+        if channel_type == VOICE:
+            channel |= {
+                "bitrate": 64000,
+                "user_limit": 0,
+                "rtc_region": None,
+            }
+        channel |= fields
+        channel_id = int(channel["id"])
+        self.channels[channel_id] = channel
+        self.messages[channel_id] = {}
+        self.invites[channel_id] = []
+        return channel
+
+    def _message(
+        self,
+        channel: dict,
+        author: dict,
+        fields: dict,
+        ephemeral_for: int | None = None,
+    ) -> dict:
+        message = {
+            "id": str(self.new_id()),
+            "channel_id": channel["id"],
+            "guild_id": channel["guild_id"],
+            "author": author,
+            "content": fields.get("content") or "",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": fields.get("embeds") or [],
+            "components": fields.get("components") or [],
+            "pinned": False,
+            "type": 0,
+            "flags": fields.get("flags") or 0,
+        }
+        if ephemeral_for is not None:
+            kept = self.ephemeral.setdefault(ephemeral_for, {})
+            kept[int(message["id"])] = message
+            while len(kept) > EPHEMERAL_KEPT:
+                del kept[next(iter(kept))]
+            return message
+        self.messages[int(channel["id"])][int(message["id"])] = message
+        channel["last_message_id"] = message["id"]
+        return message
+
+    def _guild_create(self, guild_id: int) -> dict:
+        members = list(self.members[guild_id].values())
+        return self.guilds[guild_id] | {
+            "unavailable": False,
+            "large": False,
+            "member_count": len(members),
+            "members": members,
+            "channels": [
+                channel
+                for channel in self.channels.values()
+                if channel["guild_id"] == str(guild_id)
+            ],
+            "voice_states": list(self.voice_states[guild_id].values()),
+            "emojis": [],
+            "stickers": [],
+            "features": [],
+            "threads": [],
+            "stage_instances": [],
+            "guild_scheduled_events": [],
+            "joined_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    # HTTP
+
+    def _build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/gateway", self._gateway)
+        # Control of the stand-in itself, for runs outside of this process
+        app.router.add_post(
+            "/_standin/voice/{guild_id}/{user_id}", self._control_move
+        )
+        app.router.add_patch("/_standin/faults", self._control_faults)
+        app.router.add_get("/_standin/stats", self._control_stats)
+        for method, path, handler in (
+            ("GET", "/users/@me", self._get_me),
+            ("GET", "/gateway", self._get_gateway),
+            ("GET", "/gateway/bot", self._get_gateway),
+            ("GET", "/oauth2/applications/@me", self._get_application),
+            ("PUT", "/applications/{application_id}/commands", self._sync),
+            (
+                "PUT",
+                "/applications/{application_id}/guilds/{guild_id}/commands",
+                self._sync,
+            ),
+            ("POST", "/guilds/{guild_id}/channels", self._create_channel),
+            ("PATCH", "/channels/{channel_id}", self._edit_channel),
+            ("DELETE", "/channels/{channel_id}", self._delete_channel),
+            (
+                "PUT",
+                "/channels/{channel_id}/permissions/{overwrite_id}",
+                self._put_overwrite,
+            ),
+            (
+                "DELETE",
+                "/channels/{channel_id}/permissions/{overwrite_id}",
+                self._delete_overwrite,
+            ),
+            ("GET", "/channels/{channel_id}/invites", self._get_invites),
+            ("POST", "/channels/{channel_id}/invites", self._create_invite),
+            ("GET", "/channels/{channel_id}/messages", self._history),
+            ("POST", "/channels/{channel_id}/messages", self._send),
+            (
+                "POST",
+                "/channels/{channel_id}/messages/bulk-delete",
+                self._bulk_delete,
+            ),
+            (
+                "GET",
+                "/channels/{channel_id}/messages/{message_id}",
+                self._get_message,
+            ),
+            (
+                "PATCH",
+                "/channels/{channel_id}/messages/{message_id}",
+                self._edit_message,
+            ),
+            (
+                "DELETE",
+                "/channels/{channel_id}/messages/{message_id}",
+                self._delete_message,
+            ),
+            (
+                "POST",
+                "/interactions/{interaction_id}/{token}/callback",
+                self._callback,
+            ),
+            (
+                "POST",
+                "/webhooks/{application_id}/{token}",
+                self._followup,
+            ),
+            (
+                "GET",
+                "/webhooks/{application_id}/{token}/messages/{message_id}",
+                self._get_response,
+            ),
+            (
+                "PATCH",
+                "/webhooks/{application_id}/{token}/messages/{message_id}",
+                self._edit_response,
+            ),
+            (
+                "DELETE",
+                "/webhooks/{application_id}/{token}/messages/{message_id}",
+                self._delete_response,
+            ),
+            ("GET", "/guilds/{guild_id}/members/{user_id}", self._get_member),
+            (
+                "PATCH",
+                "/guilds/{guild_id}/members/{user_id}",
+                self._edit_member,
+            ),
+        ):
+            app.router.add_route(method, API_PATH + path, handler)
+        return app
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        if not request.path.startswith(API_PATH):
+            return await handler(request)
+
+        resource = request.match_info.route.resource
+        route = (
+            resource.canonical.removeprefix(API_PATH)
+            if resource
+            else request.path
+        )
+        self.requests[f"{request.method} {route}"] += 1
+
+        faults = self.faults
+        if faults.latency or faults.jitter:
+            await asyncio.sleep(
+                faults.latency + random.uniform(0, faults.jitter)
+            )
+
+        if retry_after := self._global.hit():
+            response = self._too_many(retry_after, "global")
+        elif random.random() < faults.rate_5xx:
+            status = random.choice(faults.statuses)
+            response = json_response(
+                {"message": "Injected server error", "code": 0}, status=status
+            )
+        elif random.random() < faults.rate_429:
+            response = self._too_many(faults.retry_after, "shared")
+        else:
+            bucket = self._bucket(request, route)
+            if retry_after := bucket.hit():
+                response = self._too_many(retry_after, "user", bucket)
+            else:
+                response = await handler(request)
+                response.headers.update(bucket.headers())
+
+        response.headers["Via"] = "1.1 google"
+        self.responses[response.status] += 1
+        return response
+
+    def _bucket(self, request: web.Request, route: str) -> Bucket:
+        major = next(
+            (
+                request.match_info[parameter]
+                for parameter in ("channel_id", "guild_id", "token")
+                if parameter in request.match_info
+            ),
+            "",
+        )
+        key = f"{request.method} {route}"
+        if key + major not in self._buckets:
+            self._buckets[key + major] = Bucket(
+                *ROUTE_LIMITS.get((request.method, route), DEFAULT_LIMIT),
+                f"{zlib.crc32(key.encode()):08x}",
+            )
+        return self._buckets[key + major]
+
+    def _too_many(
+        self, retry_after: float, scope: str, bucket: Bucket | None = None
+    ) -> web.Response:
+        self.rate_limited[scope] += 1
+        response = json_response(
+            {
+                "message": "You are being rate limited.",
+                "retry_after": round(retry_after, 3),
+                "global": scope == "global",
+            },
+            status=429,
+            headers={
+                "Retry-After": str(max(1, round(retry_after))),
+                "X-RateLimit-Scope": scope,
+            },
+        )
+        if bucket:
+            response.headers.update(bucket.headers())
+        if scope == "global":
+            response.headers["X-RateLimit-Global"] = "true"
+        return response
+
+    @staticmethod
+    def _error(status: int, message: str, code: int) -> web.Response:
+        return json_response({"message": message, "code": code}, status=status)
+
+    def _channel_or_404(self, request: web.Request) -> dict | None:
+        return self.channels.get(int(request.match_info["channel_id"]))
+
+    async def _get_me(self, request: web.Request) -> web.Response:
+        return json_response(self.bot_user)
+
+    async def _get_gateway(self, request: web.Request) -> web.Response:
+        return json_response(
+            {
+                "url": self.gateway_url,
+                "shards": 1,
+                "session_start_limit": {
+                    "total": 1000,
+                    "remaining": 1000,
+                    "reset_after": 0,
+                    "max_concurrency": 1,
+                },
+            }
+        )
+
+    async def _get_application(self, request: web.Request) -> web.Response:
+        return json_response(
+            {
+                "id": str(self.application_id),
+                "name": self.bot_user["username"],
+                "icon": None,
+                "description": "",
+                "bot_public": True,
+                "bot_require_code_grant": False,
+                "verify_key": "",
+                "flags": 0,
+                "owner": self.bot_user,
+            }
+        )
+
+    async def _sync(self, request: web.Request) -> web.Response:
+        return json_response([])
+
+    async def _create_channel(self, request: web.Request) -> web.Response:
+        guild_id = int(request.match_info["guild_id"])
+        if guild_id not in self.guilds:
+            return self._error(404, "Unknown Guild", 10004)
+        data = await request.json()
+        channel = self._channel(
+            guild_id,
+            data.get("type", TEXT),
+            data["name"],
+            data.get("parent_id"),
+            **{
+                field: data[field]
+                for field in ("user_limit", "permission_overwrites")
+                if data.get(field) is not None
+            },
+        )
+        self.dispatch("CHANNEL_CREATE", channel)
+        return json_response(channel, status=201)
+
+    async def _edit_channel(self, request: web.Request) -> web.Response:
+        if not (channel := self._channel_or_404(request)):
+            return self._error(404, "Unknown Channel", 10003)
+        data = await request.json()
+        if "name" in data and data["name"] != channel["name"]:
+            rename = self._renames.setdefault(
+                int(channel["id"]), Bucket(*RENAME_LIMIT)
+            )
+            if retry_after := rename.hit():
+                return self._too_many(retry_after, "user")
+        for field in ("name", "user_limit", "permission_overwrites"):
+            if field in data:
+                channel[field] = data[field]
+        if "parent_id" in data:
+            channel["parent_id"] = data["parent_id"]
+        self._channel_updated(channel)
+        return json_response(channel)
+
+    async def _delete_channel(self, request: web.Request) -> web.Response:
+        if not (channel := self._channel_or_404(request)):
+            return self._error(404, "Unknown Channel", 10003)
+        guild_id, channel_id = int(channel["guild_id"]), int(channel["id"])
+        for user_id, state in list(self.voice_states[guild_id].items()):
+            if state["channel_id"] == channel["id"]:
+                self.move_member(guild_id, user_id, None)
+        del self.channels[channel_id]
+        del self.messages[channel_id]
+        del self.invites[channel_id]
+        self.dispatch("CHANNEL_DELETE", channel)
+        return json_response(channel)
+
+    async def _put_overwrite(self, request: web.Request) -> web.Response:
+        if not (channel := self._channel_or_404(request)):
+            return self._error(404, "Unknown Channel", 10003)
+        data = await request.json()
+        target = request.match_info["overwrite_id"]
+        channel["permission_overwrites"] = [
+            overwrite
+            for overwrite in channel["permission_overwrites"]
+            if overwrite["id"] != target
+        ] + [
+            {
+                "id": target,
+                "type": data.get("type", 1),
+                "allow": str(data.get("allow", 0)),
+                "deny": str(data.get("deny", 0)),
+            }
+        ]
+        self._channel_updated(channel)
+        return web.Response(status=204)
+
+    async def _delete_overwrite(self, request: web.Request) -> web.Response:
+        if not (channel := self._channel_or_404(request)):
+            return self._error(404, "Unknown Channel", 10003)
+        target = request.match_info["overwrite_id"]
+        channel["permission_overwrites"] = [
+            overwrite
+            for overwrite in channel["permission_overwrites"]
+            if overwrite["id"] != target
+        ]
+        self._channel_updated(channel)
+        return web.Response(status=204)
+
+    def _channel_updated(self, channel: dict) -> None:
+        self.channel_updates[int(channel["id"])] += 1
+        self.dispatch("CHANNEL_UPDATE", channel)
+
+    async def _get_invites(self, request: web.Request) -> web.Response:
+        if not (channel := self._channel_or_404(request)):
+            return self._error(404, "Unknown Channel", 10003)
+        return json_response(self.invites[int(channel["id"])])
+
+    async def _create_invite(self, request: web.Request) -> web.Response:
+        if not (channel := self._channel_or_404(request)):
+            return self._error(404, "Unknown Channel", 10003)
+        data = await request.json()
+        guild = self.guilds[int(channel["guild_id"])]
+        invite = {
+            "code": f"{self.new_id():x}",
+            "type": 0,
+            "guild": {"id": guild["id"], "name": guild["name"]},
+            "channel": {
+                "id": channel["id"],
+                "name": channel["name"],
+                "type": channel["type"],
+            },
+            "inviter": self.bot_user,
+            "uses": 0,
+            "max_uses": data.get("max_uses", 0),
+            "max_age": data.get("max_age", 86400),
+            "temporary": data.get("temporary", False),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self.invites[int(channel["id"])].append(invite)
+        return json_response(invite)
+
+    async def _history(self, request: web.Request) -> web.Response:
+        if not (channel := self._channel_or_404(request)):
+            return self._error(404, "Unknown Channel", 10003)
+        limit = int(request.query.get("limit", 50))
+        messages = sorted(
+            self.messages[int(channel["id"])].items(), key=lambda m: m[0]
+        )
+        if after := request.query.get("after"):
+            page = [m for m in messages if m[0] > int(after)][:limit]
+        else:
+            if before := request.query.get("before"):
+                messages = [m for m in messages if m[0] < int(before)]
+            page = messages[-limit:]
+        # Newest first, as Discord returns
+        return json_response([message for _, message in reversed(page)])
+
+    async def _send(self, request: web.Request) -> web.Response:
+        if not (channel := self._channel_or_404(request)):
+            return self._error(404, "Unknown Channel", 10003)
+        message = self._message(channel, self.bot_user, await request.json())
+        self.dispatch("MESSAGE_CREATE", message)
+        return json_response(message)
+
+    async def _bulk_delete(self, request: web.Request) -> web.Response:
+        if not (channel := self._channel_or_404(request)):
+            return self._error(404, "Unknown Channel", 10003)
+        ids = (await request.json())["messages"]
+        for message_id in ids:
+            self.messages[int(channel["id"])].pop(int(message_id), None)
+        self.dispatch(
+            "MESSAGE_DELETE_BULK",
+            {
+                "ids": ids,
+                "channel_id": channel["id"],
+                "guild_id": channel["guild_id"],
+            },
+        )
+        return web.Response(status=204)
+
+    def _message_or_404(self, request: web.Request) -> dict | None:
+        if channel := self._channel_or_404(request):
+            return self.messages[int(channel["id"])].get(
+                int(request.match_info["message_id"])
+            )
+        return None
+
+    async def _get_message(self, request: web.Request) -> web.Response:
+        if not (message := self._message_or_404(request)):
+            return self._error(404, "Unknown Message", 10008)
+        return json_response(message)
+
+    async def _edit_message(self, request: web.Request) -> web.Response:
+        if not (message := self._message_or_404(request)):
+            return self._error(404, "Unknown Message", 10008)
+        self._update(message, await request.json())
+        message["edited_timestamp"] = datetime.now(timezone.utc).isoformat()
+        self.dispatch("MESSAGE_UPDATE", message)
+        return json_response(message)
+
+    async def _delete_message(self, request: web.Request) -> web.Response:
+        if not (message := self._message_or_404(request)):
+            return self._error(404, "Unknown Message", 10008)
+        del self.messages[int(message["channel_id"])][int(message["id"])]
+        self.dispatch(
+            "MESSAGE_DELETE",
+            {
+                "id": message["id"],
+                "channel_id": message["channel_id"],
+                "guild_id": message["guild_id"],
+            },
+        )
+        return web.Response(status=204)
+
+    def _interaction_or_404(self, request: web.Request) -> dict | None:
+        token = request.match_info["token"]
+        interaction_id = int(token.removeprefix("token-"))
+        if request.match_info.get("interaction_id", str(interaction_id)) != (
+            str(interaction_id)
+        ):
+            return None
+        return self.interactions.get(interaction_id)
+
+    def _respond(self, interaction: dict, data: dict) -> dict:
+        """Message sent as a response or followup of interaction"""
+        channel = self.channels[interaction["channel_id"]]
+        if (data.get("flags") or 0) & EPHEMERAL:
+            return self._message(
+                channel, self.bot_user, data, interaction["user_id"]
+            )
+        message = self._message(channel, self.bot_user, data)
+        self.dispatch("MESSAGE_CREATE", message)
+        return message
+
+    @staticmethod
+    def _update(message: dict, data: dict) -> None:
+        for field, empty in (
+            ("content", ""),
+            ("embeds", []),
+            ("components", []),
+        ):
+            if field in data:
+                message[field] = data[field] or empty
+
+    async def _callback(self, request: web.Request) -> web.Response:
+        if not (interaction := self._interaction_or_404(request)):
+            return self._error(404, "Unknown interaction", 10062)
+        if interaction["answered_at"]:
+            return self._error(
+                400, "Interaction has already been acknowledged.", 40060
+            )
+        body = await request.json()
+        data = body.get("data") or {}
+        match body["type"]:
+            case 4:  # Message
+                interaction["response_message"] = self._respond(
+                    interaction, data
+                )
+            case 7:  # Update of the message with the component
+                if message := interaction["message"]:
+                    self._update(message, data)
+                    interaction["response_message"] = message
+                    if not message["flags"] & EPHEMERAL:
+                        self.dispatch("MESSAGE_UPDATE", message)
+            case 9:  # Modal
+                self.modals[interaction["user_id"]] = data
+        interaction["response"] = body["type"]
+        interaction["answered_at"] = time.perf_counter()
+        return web.Response(status=204)
+
+    async def _followup(self, request: web.Request) -> web.Response:
+        if not (interaction := self._interaction_or_404(request)):
+            return self._error(404, "Unknown Webhook", 10015)
+        return json_response(self._respond(interaction, await request.json()))
+
+    def _response_or_404(self, request: web.Request) -> dict | None:
+        if not (interaction := self._interaction_or_404(request)):
+            return None
+        if (message_id := request.match_info["message_id"]) == "@original":
+            return interaction["response_message"]
+        return self.ephemeral.get(interaction["user_id"], {}).get(
+            int(message_id)
+        ) or self.messages[interaction["channel_id"]].get(int(message_id))
+
+    async def _get_response(self, request: web.Request) -> web.Response:
+        if not (message := self._response_or_404(request)):
+            return self._error(404, "Unknown Message", 10008)
+        return json_response(message)
+
+    async def _edit_response(self, request: web.Request) -> web.Response:
+        if not (message := self._response_or_404(request)):
+            return self._error(404, "Unknown Message", 10008)
+        self._update(message, await request.json())
+        return json_response(message)
+
+    async def _delete_response(self, request: web.Request) -> web.Response:
+        if not (message := self._response_or_404(request)):
+            return self._error(404, "Unknown Message", 10008)
+        message_id = int(message["id"])
+        for messages in (
+            self.ephemeral.get(self._interaction_or_404(request)["user_id"]),
+            self.messages.get(int(message["channel_id"])),
+        ):
+            if messages:
+                messages.pop(message_id, None)
+        return web.Response(status=204)
+
+    def _member_or_404(self, request: web.Request) -> tuple[int, int, dict]:
+        guild_id = int(request.match_info["guild_id"])
+        user_id = int(request.match_info["user_id"])
+        return guild_id, user_id, self.members.get(guild_id, {}).get(user_id)
+
+    async def _get_member(self, request: web.Request) -> web.Response:
+        if not (member := self._member_or_404(request)[2]):
+            return self._error(404, "Unknown Member", 10007)
+        return json_response(member)
+
+    async def _edit_member(self, request: web.Request) -> web.Response:
+        guild_id, user_id, member = self._member_or_404(request)
+        if not member:
+            return self._error(404, "Unknown Member", 10007)
+        data = await request.json()
+        if "channel_id" in data:
+            if user_id not in self.voice_states[guild_id]:
+                return self._error(
+                    400, "Target user is not connected to voice.", 40032
+                )
+            channel_id = data["channel_id"] and int(data["channel_id"])
+            if channel_id and channel_id not in self.channels:
+                return self._error(404, "Unknown Channel", 10003)
+            self.move_member(guild_id, user_id, channel_id)
+        return json_response(member)
+
+    async def _control_move(self, request: web.Request) -> web.Response:
+        """Member joins ({"channel_id": id}) or leaves (null) voice"""
+        guild_id, user_id, member = self._member_or_404(request)
+        if not member:
+            return self._error(404, "Unknown Member", 10007)
+        channel_id = (await request.json()).get("channel_id")
+        self.move_member(guild_id, user_id, channel_id and int(channel_id))
+        return web.Response(status=204)
+
+    async def _control_faults(self, request: web.Request) -> web.Response:
+        for field, value in (await request.json()).items():
+            setattr(self.faults, field, value)
+        return json_response(vars(self.faults))
+
+    async def _control_stats(self, request: web.Request) -> web.Response:
+        return json_response(self.stats())
+
+    def stats(self) -> dict:
+        return {
+            "requests": dict(self.requests.most_common()),
+            "responses": {
+                str(status): count
+                for status, count in sorted(self.responses.items())
+            },
+            "rate_limited": dict(self.rate_limited),
+        }
+
+    # Gateway
+
+    async def _gateway(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_json(
+            {"op": 10, "d": {"heartbeat_interval": 41250}, "s": None}
+        )
+
+        session = None
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    break
+                payload = json.loads(message.data)
+                match payload["op"]:
+                    case 1:  # Heartbeat
+                        await ws.send_json({"op": 11, "d": None})
+                    case 2:  # Identify
+                        session = _GatewaySession(ws)
+                        self._identify(session)
+                    case 6:  # Resume is not supported, identify again
+                        await ws.send_json({"op": 9, "d": False})
+                    case 8:  # Request guild members
+                        guild_id = int(payload["d"]["guild_id"])
+                        session.queue.put_nowait(
+                            (
+                                "GUILD_MEMBERS_CHUNK",
+                                {
+                                    "guild_id": str(guild_id),
+                                    "members": list(
+                                        self.members[guild_id].values()
+                                    ),
+                                    "chunk_index": 0,
+                                    "chunk_count": 1,
+                                    "nonce": payload["d"].get("nonce"),
+                                },
+                            )
+                        )
+        finally:
+            if session:
+                self._sessions.discard(session)
+                session.writer.cancel()
+        return ws
+
+    def _identify(self, session: _GatewaySession) -> None:
+        session.queue.put_nowait(
+            (
+                "READY",
+                {
+                    "v": 10,
+                    "user": self.bot_user,
+                    "guilds": [
+                        {"id": str(guild_id), "unavailable": True}
+                        for guild_id in self.guilds
+                    ],
+                    "session_id": f"{self.new_id():x}",
+                    "resume_gateway_url": self.gateway_url,
+                    "application": {
+                        "id": str(self.application_id),
+                        "flags": 0,
+                    },
+                },
+            )
+        )
+        for guild_id in self.guilds:
+            session.queue.put_nowait(
+                ("GUILD_CREATE", self._guild_create(guild_id))
+            )
+        self._sessions.add(session)
+
+
+async def serve(args: argparse.Namespace) -> None:
+    standin = DiscordStandIn(
+        Faults(
+            latency=args.latency,
+            jitter=args.jitter,
+            rate_429=args.rate_429,
+            rate_5xx=args.rate_5xx,
+        )
+    )
+    for i in range(args.guilds):
+        guild_id = standin.add_guild(f"guild {i}")
+        adv_id = standin.add_channel(guild_id, TEXT, "adv")
+        category_id = standin.add_channel(guild_id, CATEGORY, "voice")
+        creator_id = standin.add_channel(
+            guild_id, VOICE, "Создать канал", category_id
+        )
+        members = [
+            standin.add_member(guild_id, f"user {j}")
+            for j in range(args.members)
+        ]
+        print(
+            f"Guild {guild_id}: adv channel {adv_id}, "
+            f"category {category_id}, creator channel {creator_id}, "
+            f"members {' '.join(map(str, members))}"
+        )
+
+    await standin.start(args.host, args.port)
+    print(
+        f"DISCORD_API_URL={standin.api_url}\n"
+        f"DISCORD_GATEWAY_URL={standin.gateway_url}"
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await standin.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--guilds", type=int, default=1)
+    parser.add_argument("--members", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-5xx", type=float, default=0.0)
+    asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+End-to-end latency of temp voice restore, creation, adv and deletion.
+
+Runs the real bot (Voice and Scheduler cogs, discord.py HTTP client and
+gateway) against the local Discord stand-in (benchmarks/discord_server.py)
+with an in-memory SQLite database, no token or guild is needed:
+
+1. --restore temp channels per guild saved in DB with their ads are
+   restored on ready;
+2. --creates members per guild join the creator channel at once, the time
+   until each one is moved into a new temp voice is measured;
+3. every new temp voice publishes an adv;
+4. everybody leaves, the time until each temp voice is deleted is measured.
+
+Stand-in rate limits apply, latency, 429 and 5xx responses can be injected.
+
+    python -m benchmarks.e2e --guilds 4 --restore 20 --creates 10
+    python -m benchmarks.e2e --latency 0.05 --jitter 0.05 --rate-429 0.02
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+
+import discord
+from loguru import logger
+from tortoise import Tortoise, connections
+
+from src import services
+from src.cogs.scheduler import Scheduler
+from src.cogs.voice import Voice
+from src.models import CreatorChannels, Servers, TempChannels
+
+from .discord_server import CATEGORY, TEXT, VOICE, DiscordStandIn, Faults
+
+USER_LIMIT = 5
+TIMEOUT = 120.0
+
+ADV_EMBED = {"type": "rich", "title": "Ищем команду", "description": "..."}
+JOIN_BUTTON = {
+    "type": 1,
+    "components": [
+        {
+            "type": 2,
+            "style": 5,
+            "label": "Подключиться",
+            "url": "https://discord.gg/standin",
+        }
+    ],
+}
+
+
+async def seed(
+    standin: DiscordStandIn, guilds: int, restore: int, creates: int
+) -> list[tuple[int, int, list[int]]]:
+    """:return: (guild id, creator channel id, joining member ids)"""
+    bot_id = int(standin.bot_user["id"])
+    created = []
+    for i in range(guilds):
+        guild_id = standin.add_guild(f"guild {i}")
+        adv_id = standin.add_channel(guild_id, TEXT, "adv")
+        category_id = standin.add_channel(guild_id, CATEGORY, "voice")
+        creator_id = standin.add_channel(
+            guild_id, VOICE, "Создать канал", category_id
+        )
+        server = await Servers.create(
+            dis_id=guild_id, dis_adv_channel_id=adv_id
+        )
+        await CreatorChannels.create(
+            server=server,
+            dis_id=creator_id,
+            dis_category_id=category_id,
+            def_user_limit=USER_LIMIT,
+        )
+
+        saved = []
+        for j in range(restore):
+            owner_id = standin.add_member(guild_id, f"owner {j}")
+            channel_id = standin.add_channel(
+                guild_id,
+                VOICE,
+                f"channel {j}",
+                category_id,
+                user_limit=USER_LIMIT,
+            )
+            standin.move_member(guild_id, owner_id, channel_id)
+            saved.append(
+                TempChannels(
+                    dis_id=channel_id,
+                    dis_creator_id=owner_id,
+                    dis_owner_id=owner_id,
+                    dis_adv_msg_id=standin.add_message(
+                        adv_id,
+                        bot_id,
+                        embeds=[ADV_EMBED],
+                        components=[JOIN_BUTTON],
+                    ),
+                    server=server,
+                )
+            )
+        await TempChannels.bulk_create(saved)
+
+        members = [
+            standin.add_member(guild_id, f"member {j}") for j in range(creates)
+        ]
+        created.append((guild_id, creator_id, members))
+    return created
+
+
+async def wait_for(predicate) -> None:
+    async with asyncio.timeout(TIMEOUT):
+        while not predicate():
+            await asyncio.sleep(0.002)
+
+
+async def timed(latencies: list[float], coro) -> None:
+    started_at = time.perf_counter()
+    await coro
+    latencies.append((time.perf_counter() - started_at) * 1000)
+
+
+async def measure_creates(standin: DiscordStandIn, guilds) -> list[float]:
+    def moved(guild_id, creator_id, member_id):
+        return lambda: standin.voice_channel_of(guild_id, member_id) not in (
+            creator_id,
+            None,
+        )
+
+    creates = []
+    for guild_id, creator_id, members in guilds:
+        for member_id in members:
+            standin.move_member(guild_id, member_id, creator_id)
+    await asyncio.gather(
+        *(
+            timed(creates, wait_for(moved(guild_id, creator_id, member)))
+            for guild_id, creator_id, members in guilds
+            for member in members
+        )
+    )
+    return creates
+
+
+async def measure_advs(bot: services.PartySysBot, guilds) -> list[float]:
+    def temp_voice(guild_id, member_id):
+        return bot.servers[guild_id].get_member_tv(
+            bot.get_guild(guild_id).get_member(member_id)
+        )
+
+    # Members are moved before the interface is sent and the channel
+    # is registered, wait for the last steps of the creation
+    for guild_id, _, members in guilds:
+        for member in members:
+            await wait_for(lambda g=guild_id, m=member: temp_voice(g, m))
+
+    advs = []
+    await asyncio.gather(
+        *(
+            timed(advs, temp_voice(guild_id, member).adv.send(""))
+            for guild_id, _, members in guilds
+            for member in members
+        )
+    )
+    return advs
+
+
+async def measure_deletes(standin: DiscordStandIn, guilds) -> list[float]:
+    def deleted(channel_id):
+        return lambda: channel_id not in standin.channels
+
+    deletes = []
+    leaving = []
+    for guild_id, _, members in guilds:
+        for member in members:
+            leaving.append(standin.voice_channel_of(guild_id, member))
+            standin.move_member(guild_id, member, None)
+    await asyncio.gather(
+        *(timed(deletes, wait_for(deleted(id_))) for id_ in leaving)
+    )
+    return deletes
+
+
+async def run(args: argparse.Namespace) -> None:
+    standin = DiscordStandIn()
+    await Tortoise.init(
+        db_url="sqlite://:memory:", modules={"models": ["src.models"]}
+    )
+    await Tortoise.generate_schemas()
+    guilds = await seed(standin, args.guilds, args.restore, args.creates)
+    await standin.start()
+    standin.point_discord()
+    # Seeding is not measured, faults apply to the bot requests only
+    standin.faults = Faults(
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx,
+    )
+
+    intents = discord.Intents.default()
+    intents.members = True
+    bot = services.PartySysBot(
+        command_prefix="n.", intents=intents, guild_ready_timeout=0.1
+    )
+    voice = Voice(bot)
+    await bot.add_cog(voice)
+    await bot.add_cog(Scheduler(bot))
+
+    results, connection = {}, None
+    try:
+        started_at = time.perf_counter()
+        await bot.login("standin")
+        connection = asyncio.create_task(bot.connect(reconnect=False))
+        await bot.wait_until_ready()
+        ready_at = time.perf_counter()
+        await wait_for(lambda: voice.channels_restored)
+        results["connect_to_ready_s"] = ready_at - started_at
+        results["restore_s"] = time.perf_counter() - ready_at
+
+        results["create"] = await measure_creates(standin, guilds)
+        results["adv_send"] = await measure_advs(bot, guilds)
+        results["delete"] = await measure_deletes(standin, guilds)
+    finally:
+        await bot.close()
+        if connection:
+            connection.cancel()
+        await standin.stop()
+        await connections.close_all()
+
+    report(args, results, standin.stats())
+
+
+def report(args: argparse.Namespace, results: dict, stats: dict) -> None:
+    restored = args.guilds * args.restore
+    print(
+        f"connect to ready   {results['connect_to_ready_s']:8.2f} s\n"
+        f"restore            {results['restore_s']:8.2f} s "
+        f"({restored} channels, "
+        f"{restored / max(results['restore_s'], 1e-6):.1f}/s)\n"
+    )
+    print(f"{'ms':<19}{'p50':>9}{'p99':>9}{'max':>9}")
+    for name in ("create", "adv_send", "delete"):
+        values = results[name]
+        p99 = statistics.quantiles(values, n=100, method="inclusive")[98]
+        print(
+            f"{name:<19}"
+            f"{statistics.median(values):9.1f}{p99:9.1f}{max(values):9.1f}"
+        )
+
+    print("\nrequests")
+    for route, count in stats["requests"].items():
+        print(f"  {count:6} {route}")
+    print(f"responses {stats['responses']}")
+    print(f"429 by scope {stats['rate_limited']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--guilds", type=int, default=4)
+    parser.add_argument("--restore", type=int, default=20)
+    parser.add_argument("--creates", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-5xx", type=float, default=0.0)
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    # Rate limit warnings of discord.py are counted by the stand-in
+    logging.basicConfig(level=logging.ERROR)
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
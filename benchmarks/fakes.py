@@ -0,0 +1,337 @@
+"""
+In-process fakes of the discord.py objects the bot touches.
+
+Every coroutine method emulating a Discord REST request is counted in
+Discord.rest_calls and takes Discord.rest_latency seconds. Member moves
+and channel edits are reported back to the bot like the gateway does, as
+events dispatched to the listeners registered in Discord.on_voice and
+Discord.on_channel_update.
+"""
+
+import asyncio
+import itertools
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+import discord
+
+
+class Discord:
+    """Shared state of the fake Discord: ids, objects and REST counters"""
+
+    def __init__(self, rest_latency: float = 0.0):
+        self.rest_latency = rest_latency
+        self.rest_calls: Counter[str] = Counter()
+
+        self._ids = itertools.count(1_100_000_000_000_000_000)
+        self.guilds: dict[int, FakeGuild] = {}
+        self.channels: dict[int, object] = {}
+        self.bot_user = FakeUser(self.new_id(), "bot")
+
+        # (member, before, after) listeners, called on every voice move
+        self.on_voice: list[
+            Callable[[FakeMember, FakeVoiceState, FakeVoiceState], Awaitable]
+        ] = []
+        # (before, after) listeners, called on every voice channel edit
+        self.on_channel_update: list[
+            Callable[[FakeVoiceChannel, FakeVoiceChannel], Awaitable]
+        ] = []
+        self._tasks: set[asyncio.Task] = set()
+
+    def new_id(self) -> int:
+        return next(self._ids)
+
+    async def rest(self, route: str) -> None:
+        self.rest_calls[route] += 1
+        if self.rest_latency:
+            await asyncio.sleep(self.rest_latency)
+
+    def dispatch(self, listeners: list[Callable[..., Awaitable]], *args):
+        for listener in listeners:
+            task = asyncio.create_task(listener(*args))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    async def settle(self) -> None:
+        """Wait for dispatched gateway events"""
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+@dataclass(eq=False)
+class FakeUser:
+    id: int
+    name: str
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+
+@dataclass
+class FakeVoiceState:
+    channel: "FakeVoiceChannel | None" = None
+
+
+@dataclass
+class FakeAsset:
+    url: str = "https://cdn.discordapp.com/embed/avatars/0.png"
+
+
+@dataclass(eq=False)
+class FakeMember:
+    discord_: Discord = field(repr=False)
+    guild: "FakeGuild" = field(repr=False)
+    id: int
+    display_name: str
+    voice: FakeVoiceState = field(default_factory=FakeVoiceState)
+
+    avatar = None
+    default_avatar = FakeAsset()
+    guild_permissions = discord.Permissions.none()
+    bot = False
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+    def move(self, channel: "FakeVoiceChannel | None") -> None:
+        """Move by the user itself (no REST call), gateway reports it"""
+        before = FakeVoiceState(self.voice.channel)
+        if before.channel:
+            before.channel.members.remove(self)
+        if channel:
+            channel.members.append(self)
+        self.voice = FakeVoiceState(channel)
+        self.discord_.dispatch(self.discord_.on_voice, self, before, self.voice)
+
+    async def move_to(self, channel, *, reason=None) -> None:
+        await self.discord_.rest("member.move_to")
+        if self.voice.channel is None:
+            raise discord.HTTPException(
+                FakeResponse(400), "Target user is not connected to voice."
+            )
+        self.move(channel)
+
+
+@dataclass
+class FakeResponse:
+    status: int
+    reason: str = ""
+
+
+@dataclass(eq=False)
+class FakeMessage:
+    discord_: Discord = field(repr=False)
+    channel: object = field(repr=False)
+    id: int
+    embeds: list = field(default_factory=list)
+    components: list = field(default_factory=list)
+
+    async def edit(self, **_) -> "FakeMessage":
+        await self.discord_.rest("message.edit")
+        return self
+
+    async def delete(self, **_) -> None:
+        await self.discord_.rest("message.delete")
+
+    async def fetch(self) -> "FakeMessage":
+        await self.discord_.rest("message.fetch")
+        return self
+
+
+@dataclass
+class FakeInvite:
+    url: str
+    inviter: FakeUser
+
+
+class FakeMessageable:
+    discord_: Discord
+
+    async def send(self, content=None, *, embed=None, **_) -> FakeMessage:
+        await self.discord_.rest("channel.send")
+        embeds = [embed] if embed else []
+        return FakeMessage(self.discord_, self, self.discord_.new_id(), embeds)
+
+
+@dataclass(eq=False)
+class FakeTextChannel(FakeMessageable):
+    discord_: Discord = field(repr=False)
+    guild: "FakeGuild" = field(repr=False)
+    id: int
+    name: str = "adv"
+
+    type = discord.ChannelType.text
+
+    async def delete_messages(self, messages, **_) -> None:
+        await self.discord_.rest("channel.delete_messages")
+
+    async def history(self, **_):
+        await self.discord_.rest("channel.history")
+        for _ in ():
+            yield
+
+
+@dataclass(eq=False)
+class FakeVoiceChannel(FakeMessageable):
+    discord_: Discord = field(repr=False)
+    guild: "FakeGuild" = field(repr=False)
+    id: int
+    name: str
+    user_limit: int = 0
+    category: "FakeCategory | None" = field(default=None, repr=False)
+    members: list[FakeMember] = field(default_factory=list, repr=False)
+    overwrites: dict = field(default_factory=dict, repr=False)
+
+    type = discord.ChannelType.voice
+
+    @property
+    def mention(self) -> str:
+        return f"<#{self.id}>"
+
+    async def edit(self, *, reason=None, **fields) -> None:
+        await self.discord_.rest("channel.edit")
+        for name, value in fields.items():
+            setattr(self, name, value)
+        # Objects are shared, before and after are the same channel
+        self.discord_.dispatch(self.discord_.on_channel_update, self, self)
+
+    async def set_permissions(self, target, *, overwrite=None, **_) -> None:
+        await self.discord_.rest("channel.set_permissions")
+        if overwrite is None:
+            self.overwrites.pop(target, None)
+        else:
+            self.overwrites[target] = overwrite
+
+    async def delete(self, *, reason=None) -> None:
+        await self.discord_.rest("channel.delete")
+        if self.discord_.channels.pop(self.id, None) is None:
+            raise discord.NotFound(FakeResponse(404), "Unknown Channel")
+        for member in list(self.members):
+            member.move(None)
+
+    async def invites(self) -> list[FakeInvite]:
+        await self.discord_.rest("channel.invites")
+        return []
+
+    async def create_invite(self, **_) -> FakeInvite:
+        await self.discord_.rest("channel.create_invite")
+        return FakeInvite(
+            f"https://discord.gg/{self.id}", self.discord_.bot_user
+        )
+
+
+@dataclass(eq=False)
+class FakeCategory:
+    discord_: Discord = field(repr=False)
+    guild: "FakeGuild" = field(repr=False)
+    id: int
+    overwrites: dict = field(default_factory=dict)
+
+    type = discord.ChannelType.category
+
+    @property
+    def __class__(self):
+        # Passes isinstance(category, discord.CategoryChannel) checks
+        return discord.CategoryChannel
+
+    async def create_voice_channel(
+        self, name, *, user_limit=0, overwrites=None, reason=None, **_
+    ) -> FakeVoiceChannel:
+        await self.discord_.rest("category.create_voice_channel")
+        return self.guild.add_voice_channel(
+            name, user_limit or 0, self, dict(overwrites or {})
+        )
+
+
+@dataclass(eq=False)
+class FakeGuild:
+    discord_: Discord = field(repr=False)
+    id: int
+    members: dict[int, FakeMember] = field(default_factory=dict, repr=False)
+    default_role: FakeUser = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.default_role = FakeUser(self.id, "@everyone")
+
+    def get_member(self, member_id: int) -> FakeMember | None:
+        return self.members.get(member_id)
+
+    def add_member(self, name: str) -> "FakeMember":
+        member = FakeMember(self.discord_, self, self.discord_.new_id(), name)
+        self.members[member.id] = member
+        return member
+
+    def add_voice_channel(
+        self,
+        name: str,
+        user_limit: int = 0,
+        category: FakeCategory | None = None,
+        overwrites: dict | None = None,
+    ) -> FakeVoiceChannel:
+        channel = FakeVoiceChannel(
+            self.discord_,
+            self,
+            self.discord_.new_id(),
+            name,
+            user_limit,
+            category,
+            overwrites=overwrites or {},
+        )
+        self.discord_.channels[channel.id] = channel
+        return channel
+
+    def add_category(self) -> FakeCategory:
+        category = FakeCategory(self.discord_, self, self.discord_.new_id())
+        self.discord_.channels[category.id] = category
+        return category
+
+    def add_text_channel(self) -> FakeTextChannel:
+        channel = FakeTextChannel(self.discord_, self, self.discord_.new_id())
+        self.discord_.channels[channel.id] = channel
+        return channel
+
+
+class FakeInteractionResponse:
+    """Keeps the last sent view and modal, so the caller can submit them"""
+
+    def __init__(self, discord_: Discord):
+        self.discord_ = discord_
+        self.view: discord.ui.View | None = None
+        self.modal: discord.ui.Modal | None = None
+
+    async def send_message(self, *_, view=None, **__) -> None:
+        await self.discord_.rest("interaction.send_message")
+        self.view = view
+
+    async def send_modal(self, modal) -> None:
+        await self.discord_.rest("interaction.send_modal")
+        self.modal = modal
+
+    async def edit_message(self, **_) -> None:
+        await self.discord_.rest("interaction.edit_message")
+
+
+@dataclass(eq=False)
+class FakeInteraction:
+    user: FakeMember
+    channel: FakeVoiceChannel
+    response: FakeInteractionResponse
+
+    @property
+    def guild(self) -> FakeGuild:
+        return self.user.guild
+
+    @property
+    def guild_id(self) -> int:
+        return self.user.guild.id
+
+    @property
+    def channel_id(self) -> int:
+        return self.channel.id
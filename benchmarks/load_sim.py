@@ -0,0 +1,363 @@
+"""
+Guild load simulator: throughput and cost of the bot event handling.
+
+Builds fake guilds (benchmarks/fakes.py) with a creator channel each in
+an in-memory SQLite database and drives voice state updates, channel
+updates and control panel interactions through the real Voice and
+Scheduler cogs and ControlInterface. Every guild runs --channels temp
+channel sessions at once: the owner creates a channel, guests join, the
+owner publishes an adv, changes limit, name and privacy, bans and unbans
+a guest, then everybody leaves and the channel is deleted.
+
+Reports events/sec, p50/p99 handler latency, Discord REST calls per event
+and peak memory. With --baseline the results are compared to a saved run
+of the same scenario, any regression beyond tolerance exits with code 1.
+
+    python -m benchmarks.load_sim --guilds 50 --channels 4
+    python -m benchmarks.load_sim --update-baseline benchmarks/baseline.json
+    python -m benchmarks.load_sim --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+import discord
+from loguru import logger
+from tortoise import Tortoise, connections
+
+from config import CFG
+from src import services, ui, utils
+from src.cogs.scheduler import Scheduler
+from src.cogs.voice import Voice
+from src.models import CreatorChannels, Servers
+
+from .fakes import (
+    Discord,
+    FakeGuild,
+    FakeInteraction,
+    FakeInteractionResponse,
+    FakeMember,
+    FakeVoiceChannel,
+)
+
+# Result -> (+1 if higher is better else -1, relative and absolute slack)
+TOLERANCES = {
+    "events_per_sec": (1, 0.3, 0.0),
+    "latency_p50_ms": (-1, 0.5, 1.0),
+    "latency_p99_ms": (-1, 0.5, 5.0),
+    "rest_calls_per_event": (-1, 0.05, 0.0),
+    "max_rss_mib": (-1, 0.2, 10.0),
+}
+
+USER_LIMIT = 5
+
+
+class SimBot(services.PartySysBot):
+    """Bot looking up guilds and channels in the fake Discord"""
+
+    def __init__(self, discord_: Discord):
+        super().__init__(command_prefix="n.", intents=discord.Intents.none())
+        self.discord_ = discord_
+
+        # Fresh shared state, not the class-wide one
+        self.servers = {}
+        self.deadlines = utils.DeadlineScheduler()
+        self.rest = utils.RestDispatcher()
+        self.bans = utils.BanCache()
+        self.writes = utils.TempChannelsWriteBehind()
+
+    @property
+    def user(self):
+        return self.discord_.bot_user
+
+    def get_guild(self, guild_id, /):
+        return self.discord_.guilds.get(guild_id)
+
+    def get_channel(self, channel_id, /):
+        return self.discord_.channels.get(channel_id)
+
+
+class Simulation:
+    def __init__(self, discord_: Discord, bot: SimBot, voice: Voice):
+        self.discord_ = discord_
+        self.bot = bot
+        self.voice = voice
+        # Handler kind -> latencies in ms
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+
+        discord_.on_voice.append(
+            self._timed("voice_state_update", voice.on_voice_state_update)
+        )
+        discord_.on_channel_update.append(
+            self._timed("guild_channel_update", voice.on_guild_channel_update)
+        )
+
+    @property
+    def events(self) -> int:
+        return sum(len(values) for values in self.latencies.values())
+
+    def _timed(self, kind, handler):
+        async def _handler(*args):
+            started_at = time.perf_counter()
+            try:
+                return await handler(*args)
+            finally:
+                self.latencies[kind].append(
+                    (time.perf_counter() - started_at) * 1000
+                )
+
+        return _handler
+
+    async def interact(self, kind, member, channel, handler, *args):
+        """Run handler of an interaction of member in channel chat"""
+        interaction = FakeInteraction(
+            member, channel, FakeInteractionResponse(self.discord_)
+        )
+        await self._timed(kind, handler)(interaction, *args)
+        return interaction.response
+
+    async def click(self, member, channel, custom_id: str):
+        """Press a ControlInterface button"""
+        view = ui.ControlInterface(self.bot)
+
+        async def _click(interaction):
+            await view.interaction_check(interaction)
+            await self._item(view, custom_id).callback(interaction)
+
+        return await self.interact(
+            f"button:{custom_id}", member, channel, _click
+        )
+
+    async def submit(self, member, channel, modal, value: str) -> None:
+        modal.text_inp._value = value
+        await self.interact(
+            f"modal:{modal.custom_id}", member, channel, modal.on_submit
+        )
+
+    async def select(self, member, channel, view, custom_id, *values):
+        item = self._item(view, custom_id)
+        item._values = list(values)
+        await self.interact(
+            f"select:{custom_id}",
+            member,
+            channel,
+            # Decorated selects have callbacks, the others are handled
+            # by the view check
+            item.callback
+            if isinstance(item, discord.ui.UserSelect)
+            else view.interaction_check,
+        )
+
+    @staticmethod
+    def _item(view, custom_id: str) -> discord.ui.Item:
+        return next(
+            item for item in view.children if item.custom_id == custom_id
+        )
+
+    async def wait_temp_voice(self, guild: FakeGuild, owner: FakeMember):
+        while not (
+            (server := self.bot.servers.get(guild.id))
+            and (temp_voice := server.get_member_tv(owner))
+        ):
+            await asyncio.sleep(0.001)
+        return temp_voice.channel
+
+    async def session(self, guild: FakeGuild, creator: FakeVoiceChannel):
+        owner, *guests = (
+            guild.add_member(f"user {i}") for i in range(USER_LIMIT - 1)
+        )
+
+        owner.move(creator)
+        channel = await asyncio.wait_for(self.wait_temp_voice(guild, owner), 5)
+        for guest in guests:
+            guest.move(channel)
+            await asyncio.sleep(0)
+
+        response = await self.click(owner, channel, "reminder:adv")
+        await self.submit(owner, channel, response.modal, "Ищем команду")
+
+        response = await self.click(owner, channel, "limit")
+        await self.submit(owner, channel, response.modal, str(USER_LIMIT + 1))
+        response = await self.click(owner, channel, "rename")
+        await self.submit(owner, channel, response.modal, "Тиммейты")
+
+        for privacy in ("1", "0"):
+            response = await self.click(owner, channel, "privacy")
+            await self.select(
+                owner, channel, response.view, "privacy:select", privacy
+            )
+
+        response = await self.click(owner, channel, "get_access")
+        await self.select(
+            owner, channel, response.view, "get_access:select", *guests
+        )
+        response = await self.click(owner, channel, "ban")
+        await self.select(
+            owner, channel, response.view, "ban:select", guests[-1]
+        )
+        response = await self.click(owner, channel, "unban")
+        await self.select(
+            owner, channel, response.view, "unban:select", str(guests[-1].id)
+        )
+
+        for member in (*guests[:-1], owner):
+            member.move(None)
+            await asyncio.sleep(0)
+
+    async def drain(self) -> None:
+        """Wait until every dispatched event is handled"""
+        while True:
+            await self.discord_.settle()
+            if not self.voice.events.depth():
+                # Queued refreshes of the last flush window may be running
+                await asyncio.sleep(self.voice.events.flush_window)
+                if not self.voice.events.depth() and not self.discord_.pending:
+                    return
+            await asyncio.sleep(0.01)
+
+
+async def seed(discord_: Discord, guilds: int):
+    created = []
+    for _ in range(guilds):
+        guild = FakeGuild(discord_, discord_.new_id())
+        discord_.guilds[guild.id] = guild
+        adv_channel = guild.add_text_channel()
+        category = guild.add_category()
+        creator = guild.add_voice_channel("Создать канал", category=category)
+
+        server = await Servers.create(
+            dis_id=guild.id, dis_adv_channel_id=adv_channel.id
+        )
+        await CreatorChannels.create(
+            server=server,
+            dis_id=creator.id,
+            dis_category_id=category.id,
+            def_user_limit=USER_LIMIT,
+        )
+        created.append((guild, creator))
+    return created
+
+
+async def simulate(
+    guilds: int, channels: int, rest_latency: float
+) -> dict[str, float]:
+    await Tortoise.init(
+        db_url="sqlite://:memory:", modules={"models": ["src.models"]}
+    )
+    try:
+        await Tortoise.generate_schemas()
+        discord_ = Discord(rest_latency)
+        created = await seed(discord_, guilds)
+
+        bot = SimBot(discord_)
+        voice, scheduler = Voice(bot), Scheduler(bot)
+        await scheduler.cog_load()
+        simulation = Simulation(discord_, bot, voice)
+
+        started_at = time.perf_counter()
+        await asyncio.gather(
+            *(
+                simulation.session(guild, creator)
+                for guild, creator in created
+                for _ in range(channels)
+            )
+        )
+        await simulation.drain()
+        elapsed = time.perf_counter() - started_at
+
+        voice.cog_unload()
+        await scheduler.cog_unload()
+        await bot.writes.close()
+        left = sum(
+            len(server.all_channels()) for server in bot.servers.values()
+        )
+        if left:
+            raise RuntimeError(f"{left} temp channels were not deleted")
+    finally:
+        await connections.close_all()
+
+    latencies = [
+        value for values in simulation.latencies.values() for value in values
+    ]
+    p99 = statistics.quantiles(latencies, n=100)[98]
+    return {
+        "events": simulation.events,
+        "events_per_sec": simulation.events / elapsed,
+        "latency_p50_ms": statistics.median(latencies),
+        "latency_p99_ms": p99,
+        "rest_calls_per_event": (
+            sum(discord_.rest_calls.values()) / simulation.events
+        ),
+        "max_rss_mib": (
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        ),
+        "by_handler_p50_ms": {
+            kind: statistics.median(values)
+            for kind, values in sorted(simulation.latencies.items())
+        },
+        "rest_calls": dict(sorted(discord_.rest_calls.items())),
+    }
+
+
+def regressions(results: dict, baseline: dict) -> list[str]:
+    found = []
+    for name, (direction, relative, absolute) in TOLERANCES.items():
+        expected, actual = baseline[name], results[name]
+        slack = max(abs(expected) * relative, absolute)
+        if (actual - expected) * direction < -slack:
+            found.append(f"{name}: {actual:.3f} (baseline {expected:.3f})")
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--guilds", type=int, default=50)
+    parser.add_argument("--channels", type=int, default=4)
+    parser.add_argument(
+        "--rest-latency",
+        type=float,
+        default=0.005,
+        help="seconds every fake Discord REST request takes",
+    )
+    parser.add_argument("--baseline", help="JSON baseline to compare with")
+    parser.add_argument("--update-baseline", help="save results as baseline")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    scenario = {
+        "guilds": args.guilds,
+        "channels": args.channels,
+        "rest_latency": args.rest_latency,
+        "flush_window": CFG["voice"]["flush_window"],
+        "update_debounce": CFG["adv"]["update_debounce"],
+    }
+    results = asyncio.run(
+        simulate(args.guilds, args.channels, args.rest_latency)
+    )
+    print(json.dumps({"scenario": scenario, "results": results}, indent=2))
+
+    if args.update_baseline:
+        with open(args.update_baseline, "w") as f:
+            json.dump({"scenario": scenario, "results": results}, f, indent=2)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["scenario"] != scenario:
+            sys.exit(f"Baseline scenario differs: {baseline['scenario']}")
+        if found := regressions(results, baseline["results"]):
+            sys.exit("Regressions:\n  " + "\n  ".join(found))
+        print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Cost per log record paid by the logging thread (the event loop), before
+and after the JSON logging pipeline.
+
+Before: the frame walking InterceptHandler of main.py and a loguru text
+sink with enqueue=True. After: utils.InterceptHandler and JsonLogSink.
+Records are written to /dev/null, only the calling thread is timed.
+
+    python -m benchmarks.log_pipeline --records 20000
+"""
+
+import argparse
+import inspect
+import logging
+import os
+import time
+from collections.abc import Callable
+
+from loguru import logger
+
+from src import services  # noqa: F401 - imports utils in working order
+from src.utils import InterceptHandler, JsonLogSink
+
+
+class FrameWalkingHandler(logging.Handler):
+    """InterceptHandler of main.py before the JSON pipeline"""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        level: str | int
+        try:
+            level = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+
+        frame, depth = inspect.currentframe(), 0
+        while frame and (
+            depth == 0 or frame.f_code.co_filename == logging.__file__
+        ):
+            frame = frame.f_back
+            depth += 1
+
+        logger.opt(depth=depth, exception=record.exc_info).log(
+            level, record.getMessage()
+        )
+
+
+def before(devnull) -> tuple[logging.Handler, Callable[[], None]]:
+    logger.add(devnull, level="INFO", enqueue=True)
+    return FrameWalkingHandler(), logger.complete
+
+
+def after(devnull) -> tuple[logging.Handler, Callable[[], None]]:
+    sink = JsonLogSink(devnull)
+    logger.add(sink, level="INFO", format="{message}")
+    return InterceptHandler(logging.INFO), sink.close
+
+
+def measure(pipeline, records: int) -> dict[str, float]:
+    """:return: microseconds per record by case"""
+    stdlib = logging.getLogger("benchmarks.discord")
+    stdlib.propagate = False
+    stdlib.setLevel(logging.INFO)
+
+    results = {}
+    with open(os.devnull, "w") as devnull:
+        logger.remove()
+        handler, close = pipeline(devnull)
+        stdlib.addHandler(handler)
+        cases = {
+            "discord.py info record": lambda i: stdlib.info(
+                "Shard ID %s has connected to Gateway", i
+            ),
+            "discord.py debug record": lambda i: stdlib.debug(
+                "Dispatching event %s", i
+            ),
+            "loguru info": lambda i: logger.info(
+                f"Temp voice {i} deleted, because its empty."
+            ),
+            "loguru debug": lambda i: logger.debug(
+                "on_voice_state_update event triggered"
+            ),
+        }
+        for case, emit in cases.items():
+            started_at = time.perf_counter()
+            for i in range(records):
+                emit(i)
+            elapsed = time.perf_counter() - started_at
+            results[case] = elapsed / records * 1e6
+        stdlib.removeHandler(handler)
+        close()
+        logger.remove()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=20000)
+    args = parser.parse_args()
+
+    results = {
+        "before": measure(before, args.records),
+        "after": measure(after, args.records),
+    }
+    print(f"{'us per record':<28}{'before':>10}{'after':>10}")
+    for case in results["before"]:
+        print(
+            f"{case:<28}"
+            f"{results['before'][case]:>10.2f}"
+            f"{results['after'][case]:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,503 @@
+"""
+Replay of a recorded event journal against the local Discord stand-in.
+
+Rebuilds the guilds of a journal (src/cogs/journal.py) in the stand-in
+(benchmarks/discord_server.py) and an in-memory SQLite database: creator
+channels, the other voice channels and the members, placed where they were
+when the recording started. The real bot (Voice and Scheduler cogs) is
+connected and the user actions of the journal are sent at their recorded
+times divided by --speed, in order within a guild:
+
+- voice moves of users are replayed; moves the bot made itself (out of a
+  creator channel, out of a deleted channel, kicks) are left to the
+  replayed bot;
+- channel updates which do not echo a bot request are sent as user edits;
+- component interactions and modal submissions use the newest message
+  with that component (or the last modal) the member sees.
+
+Temp channels of the replay are matched to the recorded ones by the member
+the bot moves into them. Latency is measured from a replayed action to the
+bot reaction seen by the stand-in: member moved out of a creator channel
+(create), emptied temp channel deleted (delete), interaction answered
+(component/modal custom id). Bot timers (adv deadlines, debounces) are
+not accelerated.
+
+--save writes the results to JSON, --compare prints the deltas to saved
+results, e.g. of the previous build:
+
+    python -m benchmarks.replay JOURNAL --speed 10 --save before.json
+    python -m benchmarks.replay JOURNAL --speed 10 --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+import discord
+from loguru import logger
+from tortoise import Tortoise, connections
+
+from src import services
+from src.cogs.scheduler import Scheduler
+from src.cogs.voice import Voice
+from src.models import CreatorChannels, Servers
+from src.utils import journal, read_journal
+
+from .discord_server import (
+    CATEGORY,
+    COMPONENT,
+    MODAL_SUBMIT,
+    TEXT,
+    VOICE,
+    DiscordStandIn,
+)
+
+# Seconds a bot reaction to a replayed action is waited for
+REACTION_TIMEOUT = 10.0
+
+
+@dataclass
+class World:
+    """Guilds of a journal, by journal ids"""
+
+    creators: dict[int, set[int]] = field(
+        default_factory=lambda: defaultdict(set)
+    )
+    # Channels which existed before the recording, except creators
+    channels: dict[int, set[int]] = field(
+        default_factory=lambda: defaultdict(set)
+    )
+    # Member -> voice channel when the recording started
+    members: dict[int, dict[int, int | None]] = field(
+        default_factory=lambda: defaultdict(dict)
+    )
+    # Temp channels the bot created during the recording
+    created: set[int] = field(default_factory=set)
+
+    @classmethod
+    def explore(cls, events: list[list]) -> "World":
+        world, seen = cls(), set()
+
+        def channel(guild, channel_id, kind, created=False):
+            if channel_id is None or channel_id in seen:
+                return
+            seen.add(channel_id)
+            if created:
+                world.created.add(channel_id)
+            elif kind == journal.CREATOR:
+                world.creators[guild].add(channel_id)
+            else:
+                world.channels[guild].add(channel_id)
+
+        for event in events:
+            guild = event[2]
+            match event[1]:
+                case journal.VOICE_STATE:
+                    member, before, before_kind, after, after_kind = event[3:]
+                    world.members[guild].setdefault(member, before)
+                    channel(guild, before, before_kind)
+                    channel(
+                        guild,
+                        after,
+                        after_kind,
+                        created=before_kind == journal.CREATOR,
+                    )
+                case journal.CHANNEL_UPDATE:
+                    channel(guild, *event[3:5])
+                case journal.COMPONENT | journal.MODAL_SUBMIT:
+                    channel(guild, *event[3:5])
+                    world.members[guild].setdefault(event[5], None)
+                    # Members picked in user selects
+                    for value in event[-1]:
+                        if isinstance(value, int):
+                            world.members[guild].setdefault(value, None)
+        return world
+
+
+async def seed(standin: DiscordStandIn, world: World) -> dict[int, int]:
+    """:return: journal id -> stand-in id"""
+    ids = {}
+    guilds = (
+        world.creators.keys() | world.channels.keys() | world.members.keys()
+    )
+    for guild in sorted(guilds):
+        guild_id = ids[guild] = standin.add_guild(f"guild {guild}")
+        adv_id = standin.add_channel(guild_id, TEXT, "adv")
+        category_id = standin.add_channel(guild_id, CATEGORY, "voice")
+        server = await Servers.create(
+            dis_id=guild_id, dis_adv_channel_id=adv_id
+        )
+        for creator in world.creators[guild]:
+            ids[creator] = standin.add_channel(
+                guild_id, VOICE, f"creator {creator}", category_id
+            )
+            await CreatorChannels.create(
+                server=server,
+                dis_id=ids[creator],
+                dis_category_id=category_id,
+            )
+        for channel in world.channels[guild]:
+            ids[channel] = standin.add_channel(
+                guild_id, VOICE, f"channel {channel}", category_id
+            )
+        for member, channel in world.members[guild].items():
+            ids[member] = standin.add_member(guild_id, f"member {member}")
+            if channel in ids:
+                standin.move_member(guild_id, ids[member], ids[channel])
+    return ids
+
+
+class Replay:
+    def __init__(self, standin: DiscordStandIn, world: World, ids, speed):
+        self.standin = standin
+        self.world = world
+        self.ids = ids
+        self.speed = speed
+
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.counts: Counter[str] = Counter()
+        self.behind = 0.0  # Max seconds an event was queued behind its time
+
+        self._queues: dict[int, asyncio.Queue] = {}
+        self._workers: list[asyncio.Task] = []
+        self._reactions: set[asyncio.Task] = set()
+        # Member in a creator channel -> reaction returning its new channel
+        self._creating: dict[int, asyncio.Task] = {}
+        self._created: set[int] = set()  # Matched temp channels
+        self._echoes: Counter[int] = Counter()
+
+    async def run(self, events: list[list]) -> None:
+        started_at = time.perf_counter()
+        for event in events:
+            due = started_at + event[0] / 1000 / self.speed
+            if (delay := due - time.perf_counter()) > 0:
+                await asyncio.sleep(delay)
+            self._queue(event[2]).put_nowait((due, event))
+        for queue in self._queues.values():
+            await queue.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._reactions)
+
+    def _queue(self, guild: int) -> asyncio.Queue:
+        if guild not in self._queues:
+            self._queues[guild] = asyncio.Queue()
+            self._workers.append(
+                asyncio.create_task(self._worker(self._queues[guild]))
+            )
+        return self._queues[guild]
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        handlers = {
+            journal.VOICE_STATE: self.voice_state,
+            journal.CHANNEL_UPDATE: self.channel_update,
+            journal.COMPONENT: self.component,
+            journal.MODAL_SUBMIT: self.modal_submit,
+        }
+        while True:
+            due, event = await queue.get()
+            self.behind = max(self.behind, time.perf_counter() - due)
+            try:
+                await handlers[event[1]](*event[2:])
+            except Exception as e:
+                logger.exception(f"Replay of {event} failed: {e}")
+                self.counts["failed"] += 1
+            finally:
+                queue.task_done()
+
+    def _react(self, name: str, done, latency=None, result=None):
+        """Task waiting for done(), latency() defaults to the wait time"""
+
+        async def _reaction():
+            started_at = time.perf_counter()
+            try:
+                async with asyncio.timeout(REACTION_TIMEOUT):
+                    while not done():
+                        await asyncio.sleep(0.002)
+            except TimeoutError:
+                self.counts[f"{name} timed out"] += 1
+                return None
+            self.latencies[name].append(
+                (latency() if latency else time.perf_counter() - started_at)
+                * 1000
+            )
+            return result() if result else None
+
+        task = asyncio.create_task(_reaction())
+        self._reactions.add(task)
+        return task
+
+    def _members_in(self, guild_id: int, channel_id: int) -> int:
+        return sum(
+            state["channel_id"] == str(channel_id)
+            for state in self.standin.voice_states[guild_id].values()
+        )
+
+    async def voice_state(
+        self, guild, member, before, before_kind, after, after_kind
+    ) -> None:
+        guild_id, user_id = self.ids[guild], self.ids[member]
+        if before_kind == journal.CREATOR and after is not None:
+            # Moved by the bot into a new temp channel, match it
+            creating = self._creating.pop(user_id, None)
+            if creating and (channel_id := await creating):
+                self.ids[after] = channel_id
+                self._created.add(channel_id)
+            return
+
+        if after is not None and after not in self.ids:
+            self.counts["skipped: unknown channel"] += 1
+            return
+        target = self.ids.get(after)
+        current = self.standin.voice_channel_of(guild_id, user_id)
+        if current == target:
+            # Kicks, bans and deleted channels, done by the replayed bot
+            self.counts["done by bot"] += 1
+            return
+
+        self.standin.move_member(guild_id, user_id, target)
+        self.counts["voice"] += 1
+        if after in self.world.creators[guild]:
+            self._creating[user_id] = self._react(
+                "create",
+                lambda: self.standin.voice_channel_of(guild_id, user_id)
+                not in (target, None),
+                result=lambda: self.standin.voice_channel_of(guild_id, user_id),
+            )
+        if (
+            current in self._created
+            and current in self.standin.channels
+            and not self._members_in(guild_id, current)
+        ):
+            self._react("delete", lambda: current not in self.standin.channels)
+
+    async def channel_update(self, guild, channel, kind) -> None:
+        if (channel_id := self.ids.get(channel)) not in self.standin.channels:
+            self.counts["skipped: unknown channel"] += 1
+        elif (
+            self.standin.channel_updates[channel_id] > self._echoes[channel_id]
+        ):
+            # Echo of a bot request, the replayed bot made it too
+            self._echoes[channel_id] += 1
+            self.counts["done by bot"] += 1
+        else:
+            self.standin.update_channel(channel_id)
+            self.counts["channel update"] += 1
+
+    async def component(
+        self, guild, channel, kind, member, component_type, custom_id, values
+    ) -> None:
+        guild_id, user_id = self.ids[guild], self.ids[member]
+        channel_id = self.ids.get(channel)
+        if not (
+            message := self.standin.find_component(
+                channel_id, user_id, custom_id
+            )
+        ):
+            self.counts["skipped: no component"] += 1
+            return
+        data = self.standin.component_data(
+            guild_id,
+            component_type,
+            custom_id,
+            [
+                str(self.ids[value]) if isinstance(value, int) else value
+                for value in values
+            ],
+        )
+        await self._interact(
+            custom_id, guild_id, channel_id, user_id, COMPONENT, data, message
+        )
+
+    async def modal_submit(self, guild, channel, kind, member, values) -> None:
+        guild_id, user_id = self.ids[guild], self.ids[member]
+        # The modal was shown in the answer to the previous interaction
+        if not (data := self.standin.modal_data(user_id, values)):
+            self.counts["skipped: no modal"] += 1
+            return
+        await self._interact(
+            data["custom_id"],
+            guild_id,
+            self.ids.get(channel),
+            user_id,
+            MODAL_SUBMIT,
+            data,
+        )
+
+    async def _interact(self, name, guild_id, channel_id, user_id, *args):
+        """
+        Send an interaction and wait for the answer: the next events of the
+        guild may be its effects (kicks, channel edits), made by the bot
+        """
+        interaction = self.standin.interactions[
+            self.standin.interact(guild_id, channel_id, user_id, *args)
+        ]
+        self.counts["interaction"] += 1
+        await self._react(
+            name,
+            lambda: interaction["answered_at"],
+            latency=lambda: (
+                interaction["answered_at"] - interaction["dispatched_at"]
+            ),
+        )
+
+
+async def replay(path: str, speed: float) -> dict:
+    header, events = read_journal(path)
+    world = World.explore(events)
+
+    standin = DiscordStandIn()
+    await Tortoise.init(
+        db_url="sqlite://:memory:", modules={"models": ["src.models"]}
+    )
+    await Tortoise.generate_schemas()
+    ids = await seed(standin, world)
+    await standin.start()
+    standin.point_discord()
+
+    intents = discord.Intents.default()
+    intents.members = True
+    bot = services.PartySysBot(
+        command_prefix="n.", intents=intents, guild_ready_timeout=0.1
+    )
+    voice = Voice(bot)
+    await bot.add_cog(voice)
+    await bot.add_cog(Scheduler(bot))
+
+    connection = None
+    try:
+        await bot.login("standin")
+        connection = asyncio.create_task(bot.connect(reconnect=False))
+        await bot.wait_until_ready()
+        while not voice.channels_restored:
+            await asyncio.sleep(0.01)
+
+        requests_before = Counter(standin.requests)
+        run = Replay(standin, world, ids, speed)
+        started_at = time.perf_counter()
+        await run.run(events)
+        elapsed = time.perf_counter() - started_at
+    finally:
+        await bot.close()
+        if connection:
+            connection.cancel()
+        await standin.stop()
+        await connections.close_all()
+
+    requests = standin.requests - requests_before
+    rest_calls = sum(requests.values())
+    return {
+        "journal": {
+            "path": path,
+            "started_at": header["started_at"],
+            "events": len(events),
+        },
+        "speed": speed,
+        "elapsed_s": elapsed,
+        "max_behind_s": run.behind,
+        "counts": dict(sorted(run.counts.items())),
+        "latency_ms": {
+            name: {
+                "count": len(values),
+                "p50": statistics.median(values),
+                "p99": (
+                    statistics.quantiles(values, n=100, method="inclusive")[98]
+                    if len(values) > 1
+                    else values[0]
+                ),
+            }
+            for name, values in sorted(run.latencies.items())
+        },
+        "rest_calls": rest_calls,
+        "rest_calls_per_event": rest_calls / max(len(events), 1),
+        "requests": dict(requests.most_common()),
+    }
+
+
+def report(results: dict, saved: dict | None = None) -> None:
+    def line(name, value, before=None):
+        if before is None:
+            return f"{name:<60}{value:10.2f}"
+        change = value - before
+        percent = f"{change / before:+9.1%}" if before else ""
+        return f"{name:<60}{value:10.2f}{change:+10.2f}{percent}"
+
+    saved = saved or {}
+    print(
+        f"{results['journal']['events']} events at {results['speed']}x "
+        f"in {results['elapsed_s']:.1f} s, "
+        f"up to {results['max_behind_s']:.2f} s behind\n"
+        f"{results['counts']}\n"
+    )
+    print(f"{'latency ms':<60}{'value':>10}" + ("     delta" if saved else ""))
+    for name, values in results["latency_ms"].items():
+        before = saved.get("latency_ms", {}).get(name, {})
+        for quantile in ("p50", "p99"):
+            print(
+                line(
+                    f"{name} {quantile}", values[quantile], before.get(quantile)
+                )
+            )
+
+    print(f"\n{'REST calls':<60}{'value':>10}")
+    print(
+        line(
+            "per event",
+            results["rest_calls_per_event"],
+            saved.get("rest_calls_per_event"),
+        )
+    )
+    requests = results["requests"]
+    saved_requests = saved.get("requests", {})
+    for route in sorted(
+        requests.keys() | saved_requests.keys(),
+        key=lambda route: -requests.get(route, 0),
+    ):
+        print(
+            line(
+                f"  {route}",
+                requests.get(route, 0),
+                saved_requests.get(route, 0) if saved else None,
+            )
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("journal", help="journal file (.jsonl.gz)")
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="1 is the recorded pace"
+    )
+    parser.add_argument("--save", help="save results to JSON")
+    parser.add_argument("--compare", help="JSON results to compare with")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    # Rate limit warnings of discord.py are counted by the stand-in
+    logging.basicConfig(level=logging.ERROR)
+
+    results = asyncio.run(replay(args.journal, args.speed))
+
+    saved = None
+    if args.compare:
+        with open(args.compare) as f:
+            saved = json.load(f)
+        if saved["journal"] != results["journal"]:
+            sys.exit(f"Results of another journal: {saved['journal']}")
+    report(results, saved)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import os
 import sys
+from urllib.parse import urlencode
 
 import tomllib
 
@@ -9,11 +10,32 @@ else:
     with open('config.toml', 'rb') as config_file:
         CFG = tomllib.load(config_file)
 
+# "mysql" (default) or "sqlite" for single-node deployments
+DB_ENGINE = os.getenv('DB_ENGINE', 'mysql')
+SQLITE_PATH = os.getenv('DB_PATH', 'data/partysys.sqlite3')
+# WAL lets readers work during writes, NORMAL sync is durable with WAL,
+# busy_timeout waits for locks held by other processes (aerich, backups)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -16000,  # KiB
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'ON',
+}
+
+if DB_ENGINE == 'sqlite':
+    DB_URL = f'sqlite://{SQLITE_PATH}?{urlencode(SQLITE_PRAGMAS)}'
+else:
+    DB_URL = (
+        f'mysql://{os.getenv("DB_USER")}:{os.getenv("DB_PASSWORD")}'
+        f'@{os.getenv("DB_HOST")}:{os.getenv("DB_PORT")}'
+        f'/{os.getenv("DB_NAME")}'
+    )
+
 TORTOISE_ORM = {
     "connections": {
-        "default": f'mysql://{os.getenv("DB_USER")}:{os.getenv("DB_PASSWORD")}'
-                   f'@{os.getenv("DB_HOST")}:{os.getenv("DB_PORT")}'
-                   f'/{os.getenv("DB_NAME")}'
+        "default": DB_URL
     },
     "apps": {
         "models": {
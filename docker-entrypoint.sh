@@ -1,5 +1,9 @@
 #!/bin/bash
 
+if [ "$DB_ENGINE" = "sqlite" ]; then
+    mkdir -p "$(dirname "${DB_PATH:-data/partysys.sqlite3}")"
+fi
+
 echo "Try to apply database migrations"
 result=$(aerich upgrade)
 if echo "$result" | grep -q "Success upgrade " ||
@@ -11,4 +15,4 @@ else
 fi
 
 echo "Starting bot"
-python -m main
+exec python -m main
@@ -1,29 +1,41 @@
-import inspect
+import atexit
 import logging
 import os
 import sys
 
 import discord
+import yarl
 from loguru import logger
-from tortoise import Tortoise, run_async
+from tortoise import Tortoise, connections, run_async
 
-from config import TORTOISE_ORM
-from src import services
+from config import CFG, TORTOISE_ORM
+from src import services, utils
 
 logger.remove(0)
 if os.getenv("DEBUG", "0") == "0":
-    logger.add(
-        sys.stderr,
-        level="WARNING",
-        enqueue=True,
-    )
-    logger.add(
-        sys.stdout,
-        level="INFO",
-        filter=lambda record: record["level"].name == "INFO",
-        enqueue=True,
-    )
+    log_level = logging.INFO
+    # JSON lines, errors and warnings to stderr, info to stdout
+    for stream, levels in (
+        (sys.stderr, ("WARNING", "ERROR", "CRITICAL")),
+        (sys.stdout, ("INFO", "SUCCESS")),
+    ):
+        sink = utils.JsonLogSink(
+            stream,
+            CFG["logging"]["capacity"],
+            CFG["logging"]["batch_size"],
+            CFG["logging"]["flush_interval"],
+        )
+        atexit.register(sink.close)
+        logger.add(
+            sink,
+            level="INFO",
+            format="{message}",
+            filter=lambda record, levels=levels: (
+                record["level"].name in levels
+            ),
+        )
 else:
+    log_level = logging.DEBUG
     logger.add(
         sys.stdout,
         level="DEBUG",
@@ -32,30 +44,10 @@ else:
 
 logger.info("Logger initialized.")
 
-
-class InterceptHandler(logging.Handler):
-    def emit(self, record: logging.LogRecord) -> None:
-        # Get corresponding Loguru level if it exists.
-        level: str | int
-        try:
-            level = logger.level(record.levelname).name
-        except ValueError:
-            level = record.levelno
-
-        # Find caller from where originated the logged message.
-        frame, depth = inspect.currentframe(), 0
-        while frame and (
-            depth == 0 or frame.f_code.co_filename == logging.__file__
-        ):
-            frame = frame.f_back
-            depth += 1
-
-        logger.opt(depth=depth, exception=record.exc_info).log(
-            level, record.getMessage()
-        )
-
-
-discord.utils.setup_logging(handler=InterceptHandler())
+# Records below the level are not even created by discord.py loggers
+discord.utils.setup_logging(
+    handler=utils.InterceptHandler(log_level), level=log_level
+)
 
 bot_intents = discord.Intents.default()
 bot_intents.members = True
@@ -64,6 +56,12 @@ bot_intents.messages = True
 bot_intents.message_content = True
 bot_intents.guild_messages = True
 
+# Local Discord stand-in (benchmarks/discord_server.py) for offline tests
+if api_url := os.getenv("DISCORD_API_URL"):
+    discord.http.Route.BASE = api_url
+if gateway_url := os.getenv("DISCORD_GATEWAY_URL"):
+    discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(gateway_url)
+
 bot = services.PartySysBot(
     command_prefix="n.",
     intents=bot_intents,
@@ -78,39 +76,178 @@ async def on_ready():
     await bot.tree.sync(guild=discord.Object(os.getenv("DEV_SERVER_ID")))
 
 
+def add_gauges() -> None:
+    """Gauges read from the state of the bot services on every scrape"""
+    for name, stat, help in (
+        ("rest_queue_depth", "depth", "Discord REST calls waiting"),
+        ("rest_wait_seconds_avg", "avg_wait", "Mean wait of REST calls"),
+        ("rest_shed", "shed", "Discord REST calls shed since start"),
+    ):
+        bot.metrics.gauge(
+            name,
+            f"{help} by priority class",
+            ("priority",),
+            collect=lambda stat=stat: {
+                (priority,): stats[stat]
+                for priority, stats in bot.rest.stats().items()
+            },
+        )
+
+    for stat in bot.bans.stats():
+        bot.metrics.gauge(
+            f"ban_cache_{stat}",
+            f"Creator ban list cache {stat}",
+            collect=lambda stat=stat: {(): bot.bans.stats()[stat]},
+        )
+
+    for name, stat, help in (
+        ("write_behind_pending", "pending", "TempChannels rows to write"),
+        (
+            "write_behind_lag_seconds",
+            "lag",
+            "Seconds the oldest write of the last flush waited",
+        ),
+        ("write_behind_flushes", "flushes", "TempChannels flushes"),
+        ("write_behind_merged", "merged", "TempChannels writes merged"),
+    ):
+        bot.metrics.gauge(
+            name,
+            help,
+            collect=lambda stat=stat: {(): bot.writes.stats()[stat]},
+        )
+
+    def voice_events(stat: str) -> dict[tuple[int], float]:
+        # Queues live in the Voice cog, no values while it's unloaded
+        if not (voice := bot.get_cog("Voice")):
+            return {}
+        return {
+            (guild_id,): stats[stat]
+            for guild_id, stats in voice.events.stats().items()
+        }
+
+    for name, stat, help in (
+        ("voice_queue_depth", "depth", "Voice events waiting"),
+        (
+            "voice_flush_latency_seconds",
+            "flush_latency",
+            "Seconds from the first queued voice event to the last flush",
+        ),
+    ):
+        bot.metrics.gauge(
+            name,
+            f"{help} by guild",
+            ("guild",),
+            collect=lambda stat=stat: voice_events(stat),
+        )
+
+
+def add_health_checks(
+    checks: utils.HealthChecks, loop_lag: utils.LoopLagSampler
+) -> None:
+    async def database() -> bool:
+        await connections.get("default").execute_query("SELECT 1")
+        return True
+
+    checks.add("gateway", lambda: bot.ws is not None and bot.ws.open)
+    checks.add("database", database)
+    checks.add(
+        "loop_lag",
+        lambda: loop_lag.p99() < CFG["health"]["loop_lag_threshold"],
+    )
+    checks.add(
+        "channels_restored",
+        lambda: bot.is_ready()
+        and getattr(bot.get_cog("Voice"), "channels_restored", True),
+        ready_only=True,
+    )
+
+
 async def main():
-    # Initialize Tortoise
+    # Initialize Tortoise, schema of both engines is built by aerich upgrade
     await Tortoise.init(config=TORTOISE_ORM)
+    bot.stages.enabled = CFG["profiling"]["slow_stages"]
+    bot.stages.threshold = CFG["profiling"]["slow_stage_threshold"]
+    utils.instrument_tortoise(
+        bot.metrics.histogram(
+            "db_query_seconds",
+            "Database query time by model and SQL operation",
+            ("model", "operation"),
+        ),
+        bot.stages,
+    )
+
+    bot.rest.max_in_flight = CFG["rest"]["max_in_flight"]
+    bot.rest.background_max_in_flight = CFG["rest"]["background_max_in_flight"]
+    bot.rest.background_limit = CFG["rest"]["background_limit"]
+    bot.rest.background_max_wait = CFG["rest"]["background_max_wait"]
+    bot.bans.resize(CFG["bans"]["cache_size"])
+    bot.writes.flush_interval = CFG["db"]["write_behind_interval"]
+
+    backends = {
+        "sentry": utils.SentryMetrics,
+        "local": lambda: utils.RegistryMetrics(bot.metrics),
+        "file": lambda: utils.FileMetrics(CFG["aggregation"]["file"]),
+    }
+    bot.aggregator.backends = [
+        backends[backend]() for backend in CFG["aggregation"]["backends"]
+    ]
+    bot.aggregator.flush_interval = CFG["aggregation"]["flush_interval"]
+    bot.aggregator.max_tag_values = CFG["aggregation"]["max_tag_values"]
+
+    metrics_server = utils.MetricsServer(
+        bot.metrics, CFG["metrics"]["host"], CFG["metrics"]["port"]
+    )
+    loop_lag = utils.LoopLagSampler(
+        CFG["health"]["loop_lag_interval"],
+        CFG["health"]["loop_lag_window"],
+        warn_after=CFG["health"]["loop_lag_threshold"],
+    )
+    bot.metrics.gauge(
+        "event_loop_lag_p99_seconds",
+        "99th percentile of the event loop lag over the sampling window",
+        collect=lambda: {(): loop_lag.p99()},
+    )
+    add_gauges()
+    add_health_checks(utils.HealthChecks(metrics_server.app), loop_lag)
+    loop_lag.start()
+    await metrics_server.start()
+    logger.info(f"Metrics and health checks served: {metrics_server}")
 
     async with bot:
+        bot.close_on_signals()
         for extension in os.getenv("COGS", "").split(","):
             try:
                 await bot.load_extension(f"src.cogs.{extension}")
                 logger.info(f"Loaded extension {extension}.")
             except Exception as e:
                 logger.error(e)
-        await bot.start(os.getenv("DISCORD_TOKEN"))
+        try:
+            await bot.start(os.getenv("DISCORD_TOKEN"))
+        finally:
+            loop_lag.stop()
+            await metrics_server.stop()
 
 
 if os.getenv("DEBUG", "0") == "0":
-    import sentry_sdk
-
-    sentry_sdk.init(
+    sampler = utils.AdaptiveSampler(bot.metrics, **CFG["tracing"])
+    bot.metrics.gauge(
+        "sentry_thread_cpu_seconds",
+        "CPU time of the Sentry transport and profiler threads",
+        ("thread",),
+        collect=utils.sentry_threads_cpu,
+    )
+    # Low rate for routine events, errors and slow ones promoted, limited by
+    # a budget, see [tracing] in config.toml
+    sampler.init_sentry(
         dsn=os.getenv("SENTRY_DSN"),
         # Enable performance monitoring
         enable_tracing=True,
-        # Set traces_sample_rate to 1.0 to capture 100%
-        # of transactions for performance monitoring.
-        traces_sample_rate=1.0,
-        # Set profiles_sample_rate to 1.0 to profile 100%
-        # of sampled transactions.
-        # We recommend adjusting this value in production.
-        profiles_sample_rate=1.0,
         _experiments={
             # Turns on the metrics module
             "enable_metrics": True,
-            # Enables sending of code locations for metrics
-            "metric_code_locations": True,
+            # Metrics are sent by utils.SentryMetrics, code locations
+            # would all point to it
+            "metric_code_locations": False,
         },
     )
 
@@ -1,7 +1,56 @@
 from tortoise import BaseDBAsyncClient
 
+# SQLite profile (DB_ENGINE=sqlite), the same schema in SQLite SQL
+SQLITE_UPGRADE = """
+        CREATE TABLE IF NOT EXISTS "servers" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "dis_id" BIGINT NOT NULL,
+    "dis_adv_channel_id" BIGINT NOT NULL,
+    "created_at" TIMESTAMP NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMP NOT NULL  DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS "creatorchannels" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "dis_id" BIGINT NOT NULL,
+    "dis_category_id" BIGINT NOT NULL,
+    "def_name" VARCHAR(32) NOT NULL  DEFAULT '{user}',
+    "def_user_limit" SMALLINT,
+    "created_at" TIMESTAMP NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMP NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "server_id" INT NOT NULL REFERENCES "servers" ("id") ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS "tcbans" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "dis_creator_id" BIGINT NOT NULL,
+    "dis_banned_id" BIGINT NOT NULL,
+    "banned" INT NOT NULL  DEFAULT 1,
+    "created_at" TIMESTAMP NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMP NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "server_id" INT NOT NULL REFERENCES "servers" ("id") ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS "tempchannels" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "dis_id" BIGINT NOT NULL,
+    "dis_creator_id" BIGINT NOT NULL,
+    "dis_owner_id" BIGINT NOT NULL,
+    "dis_adv_msg_id" BIGINT,
+    "deleted" INT NOT NULL  DEFAULT 0,
+    "created_at" TIMESTAMP NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMP NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "server_id" INT NOT NULL REFERENCES "servers" ("id") ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS "aerich" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "version" VARCHAR(255) NOT NULL,
+    "app" VARCHAR(100) NOT NULL,
+    "content" JSON NOT NULL
+);"""
+
+
 
 async def upgrade(db: BaseDBAsyncClient) -> str:
+    if db.capabilities.dialect == "sqlite":
+        return SQLITE_UPGRADE
     return """
         CREATE TABLE IF NOT EXISTS `servers` (
     `id` INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
@@ -0,0 +1,24 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    if db.capabilities.dialect == "sqlite":
+        # Schema of SQLite databases created by the bot before migrations
+        # already has the column
+        columns = await db.execute_query_dict(
+            'PRAGMA table_info("creatorchannels")'
+        )
+        if any(column["name"] == "warm_pool_size" for column in columns):
+            return ""
+        return """
+        ALTER TABLE "creatorchannels" ADD "warm_pool_size" SMALLINT NOT NULL  DEFAULT 0;"""
+    return """
+        ALTER TABLE `creatorchannels` ADD `warm_pool_size` SMALLINT NOT NULL  DEFAULT 0;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    if db.capabilities.dialect == "sqlite":
+        return """
+        ALTER TABLE "creatorchannels" DROP COLUMN "warm_pool_size";"""
+    return """
+        ALTER TABLE `creatorchannels` DROP COLUMN `warm_pool_size`;"""
@@ -0,0 +1,52 @@
+from tortoise import BaseDBAsyncClient
+
+# SQLite profile (DB_ENGINE=sqlite), the same steps in SQLite SQL
+SQLITE_UPGRADE = """
+        UPDATE "creatorchannels" SET "server_id" = (SELECT MAX("new"."id") FROM "servers" "old" JOIN "servers" "new" ON "old"."dis_id" = "new"."dis_id" WHERE "old"."id" = "creatorchannels"."server_id") WHERE "server_id" IN (SELECT "old"."id" FROM "servers" "old" JOIN "servers" "new" ON "old"."dis_id" = "new"."dis_id" AND "old"."id" < "new"."id");
+UPDATE "tempchannels" SET "server_id" = (SELECT MAX("new"."id") FROM "servers" "old" JOIN "servers" "new" ON "old"."dis_id" = "new"."dis_id" WHERE "old"."id" = "tempchannels"."server_id") WHERE "server_id" IN (SELECT "old"."id" FROM "servers" "old" JOIN "servers" "new" ON "old"."dis_id" = "new"."dis_id" AND "old"."id" < "new"."id");
+UPDATE "tcbans" SET "server_id" = (SELECT MAX("new"."id") FROM "servers" "old" JOIN "servers" "new" ON "old"."dis_id" = "new"."dis_id" WHERE "old"."id" = "tcbans"."server_id") WHERE "server_id" IN (SELECT "old"."id" FROM "servers" "old" JOIN "servers" "new" ON "old"."dis_id" = "new"."dis_id" AND "old"."id" < "new"."id");
+DELETE FROM "servers" WHERE "id" NOT IN (SELECT MAX("id") FROM "servers" GROUP BY "dis_id");
+DELETE FROM "tempchannels" WHERE "id" NOT IN (SELECT MAX("id") FROM "tempchannels" GROUP BY "dis_id");
+DELETE FROM "tcbans" WHERE "id" NOT IN (SELECT MAX("id") FROM "tcbans" GROUP BY "server_id", "dis_creator_id", "dis_banned_id");
+CREATE UNIQUE INDEX IF NOT EXISTS "uid_servers_dis_id_698ebd" ON "servers" ("dis_id");
+CREATE INDEX IF NOT EXISTS "idx_creatorchan_server__50eff6" ON "creatorchannels" ("server_id");
+CREATE UNIQUE INDEX IF NOT EXISTS "uid_tempchannel_dis_id_49e30b" ON "tempchannels" ("dis_id");
+CREATE INDEX IF NOT EXISTS "idx_tempchannel_deleted_d28a37" ON "tempchannels" ("deleted");
+CREATE UNIQUE INDEX IF NOT EXISTS "uid_tcbans_server__9e6520" ON "tcbans" ("server_id", "dis_creator_id", "dis_banned_id");"""
+
+
+# Duplicates left by older bot versions are dropped before unique indexes,
+# the newest row holds the actual state. Rows of duplicate servers are
+# moved to the newest one first (deleting a server cascades to them), so
+# the temp channels and bans dedupe runs after it.
+# creatorchannels.server_id is indexed on SQLite only: on MySQL InnoDB
+# already indexes every foreign key column (fk_creatorc_servers_291b69e2).
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    if db.capabilities.dialect == "sqlite":
+        return SQLITE_UPGRADE
+    return """
+        UPDATE `creatorchannels` `child` JOIN `servers` `old` ON `child`.`server_id` = `old`.`id` JOIN (SELECT `dis_id`, MAX(`id`) AS `id` FROM `servers` GROUP BY `dis_id`) `new` ON `old`.`dis_id` = `new`.`dis_id` AND `old`.`id` < `new`.`id` SET `child`.`server_id` = `new`.`id`;
+UPDATE `tempchannels` `child` JOIN `servers` `old` ON `child`.`server_id` = `old`.`id` JOIN (SELECT `dis_id`, MAX(`id`) AS `id` FROM `servers` GROUP BY `dis_id`) `new` ON `old`.`dis_id` = `new`.`dis_id` AND `old`.`id` < `new`.`id` SET `child`.`server_id` = `new`.`id`;
+UPDATE `tcbans` `child` JOIN `servers` `old` ON `child`.`server_id` = `old`.`id` JOIN (SELECT `dis_id`, MAX(`id`) AS `id` FROM `servers` GROUP BY `dis_id`) `new` ON `old`.`dis_id` = `new`.`dis_id` AND `old`.`id` < `new`.`id` SET `child`.`server_id` = `new`.`id`;
+DELETE `old` FROM `servers` `old` JOIN `servers` `new` ON `old`.`dis_id` = `new`.`dis_id` AND `old`.`id` < `new`.`id`;
+DELETE `old` FROM `tempchannels` `old` JOIN `tempchannels` `new` ON `old`.`dis_id` = `new`.`dis_id` AND `old`.`id` < `new`.`id`;
+DELETE `old` FROM `tcbans` `old` JOIN `tcbans` `new` ON `old`.`server_id` = `new`.`server_id` AND `old`.`dis_creator_id` = `new`.`dis_creator_id` AND `old`.`dis_banned_id` = `new`.`dis_banned_id` AND `old`.`id` < `new`.`id`;
+ALTER TABLE `servers` ADD UNIQUE INDEX `uid_servers_dis_id_698ebd` (`dis_id`);
+ALTER TABLE `tempchannels` ADD UNIQUE INDEX `uid_tempchannel_dis_id_49e30b` (`dis_id`);
+ALTER TABLE `tempchannels` ADD INDEX `idx_tempchannel_deleted_d28a37` (`deleted`);
+ALTER TABLE `tcbans` ADD UNIQUE INDEX `uid_tcbans_server__9e6520` (`server_id`, `dis_creator_id`, `dis_banned_id`);"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    if db.capabilities.dialect == "sqlite":
+        return """
+        DROP INDEX IF EXISTS "uid_tcbans_server__9e6520";
+DROP INDEX IF EXISTS "idx_tempchannel_deleted_d28a37";
+DROP INDEX IF EXISTS "uid_tempchannel_dis_id_49e30b";
+DROP INDEX IF EXISTS "idx_creatorchan_server__50eff6";
+DROP INDEX IF EXISTS "uid_servers_dis_id_698ebd";"""
+    return """
+        ALTER TABLE `tcbans` DROP INDEX `uid_tcbans_server__9e6520`;
+ALTER TABLE `tempchannels` DROP INDEX `idx_tempchannel_deleted_d28a37`;
+ALTER TABLE `tempchannels` DROP INDEX `uid_tempchannel_dis_id_49e30b`;
+ALTER TABLE `servers` DROP INDEX `uid_servers_dis_id_698ebd`;"""
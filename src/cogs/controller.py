@@ -1,13 +1,17 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 import traceback
+from contextlib import suppress
+from datetime import datetime
 
 import discord
 from discord import app_commands
 
-from src import services, ui
+from config import CFG
+from src import services, ui, utils
 from src.services import errors
 
 
@@ -16,6 +20,7 @@ from src.services import errors
 class Controller(services.BaseCog):
     def __init__(self, bot):
         super().__init__(bot)
+        self._profiling_stop: asyncio.Event | None = None
 
     @staticmethod
     async def on_application_command_error(
@@ -173,6 +178,58 @@ class Controller(services.BaseCog):
             )
             logging.error(traceback.format_exc())
 
+    @app_commands.command(
+        name="profile",
+        description=".",
+    )
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.guilds(int(os.getenv("DEV_SERVER_ID")))
+    async def profile(
+        self,
+        interaction: discord.Interaction,
+        seconds: app_commands.Range[int, 1, 600],
+    ):
+        """Samples the event loop thread, a second call stops it early"""
+        if self._profiling_stop:
+            self._profiling_stop.set()
+            await interaction.response.send_message(
+                "Профилирование остановлено!", ephemeral=True
+            )
+            return
+
+        self._profiling_stop = asyncio.Event()
+        profiler = utils.SamplingProfiler(CFG["profiling"]["interval"])
+        profiler.start()
+        logging.info(
+            f"Пользователь {interaction.user.id} запустил профилирование "
+            f"на {seconds} секунд!"
+        )
+        await interaction.response.send_message(
+            f"Профилирование запущено на {seconds} секунд.", ephemeral=True
+        )
+        try:
+            with suppress(TimeoutError):
+                await asyncio.wait_for(self._profiling_stop.wait(), seconds)
+        finally:
+            self._profiling_stop = None
+            profiler.stop()
+
+        path = os.path.join(
+            CFG["profiling"]["directory"],
+            f"profile-{datetime.now():%Y%m%d-%H%M%S}.folded",
+        )
+        try:
+            await asyncio.to_thread(profiler.write, path)
+            await interaction.followup.send(
+                f"Профиль ({profiler.samples} замеров) записан в {path}",
+                ephemeral=True,
+            )
+        except Exception:
+            await interaction.followup.send(
+                "Произошла ошибка (подробнее в логах)!", ephemeral=True
+            )
+            logging.error(traceback.format_exc())
+
 
 async def setup(bot):
     controller_class = Controller(bot)
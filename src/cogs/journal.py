@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import os
+from datetime import datetime
+
+import discord
+from discord.ext import commands, tasks
+from loguru import logger
+
+from config import CFG
+from src import services, utils
+
+
+class Journal(services.BaseCog):
+    """
+    Opt-in recorder of voice states, channel updates and interactions.
+
+    Loaded like any cog (COGS=voice,scheduler,journal), every bot start
+    writes a new journal (see utils.EventJournal) to the [journal]
+    directory. benchmarks/replay.py feeds a journal back into the cogs.
+    """
+
+    def __init__(self, bot):
+        super().__init__(bot)
+        self.journal = utils.EventJournal(
+            os.path.join(
+                CFG["journal"]["directory"],
+                f"events-{datetime.now():%Y%m%d-%H%M%S}.jsonl.gz",
+            )
+        )
+        self.flusher.change_interval(seconds=CFG["journal"]["flush_interval"])
+
+    async def cog_load(self):
+        logger.info(f"Recording events: {self.journal}")
+        self.flusher.start()
+
+    async def cog_unload(self):
+        self.flusher.cancel()
+        await self.journal.close()  # Waits for a write of the flusher
+
+    @tasks.loop()
+    async def flusher(self):
+        try:
+            await self.journal.flush()
+        except Exception as e:
+            logger.exception(f"Journal flush failed: {e}")
+
+    async def _channel(
+        self, channel: discord.abc.GuildChannel | None
+    ) -> tuple[int, str] | None:
+        if channel is None:
+            return None
+        kind = utils.journal.OTHER
+        if server := await self.bot.server(channel.guild.id):
+            if server.is_creator_channel(channel.id):
+                kind = utils.journal.CREATOR
+            elif server.is_temp_channel(channel.id):
+                kind = utils.journal.TEMP
+        return channel.id, kind
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(
+        self,
+        member: discord.Member,
+        before: discord.VoiceState,
+        after: discord.VoiceState,
+    ) -> None:
+        if after.channel == before.channel:
+            return
+        t = self.journal.clock()
+        self.journal.voice_state(
+            t,
+            member.guild.id,
+            member.id,
+            await self._channel(before.channel),
+            await self._channel(after.channel),
+        )
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(
+        self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel
+    ) -> None:
+        if after.type != discord.ChannelType.voice:
+            return
+        t = self.journal.clock()
+        _, kind = await self._channel(after)
+        self.journal.channel_update(t, after.guild.id, after.id, kind)
+
+    @commands.Cog.listener()
+    async def on_interaction(self, interaction: discord.Interaction) -> None:
+        if not interaction.guild_id or not interaction.channel:
+            return
+        t = self.journal.clock()
+        if interaction.type == discord.InteractionType.component:
+            self.journal.component(
+                t,
+                interaction.guild_id,
+                await self._channel(interaction.channel),
+                interaction.user.id,
+                interaction.data["component_type"],
+                interaction.data["custom_id"],
+                interaction.data.get("values", []),
+            )
+        elif interaction.type == discord.InteractionType.modal_submit:
+            self.journal.modal_submit(
+                t,
+                interaction.guild_id,
+                await self._channel(interaction.channel),
+                interaction.user.id,
+                [
+                    component["value"]
+                    for row in interaction.data["components"]
+                    for component in row["components"]
+                ],
+            )
+
+
+async def setup(bot):
+    await bot.add_cog(Journal(bot))
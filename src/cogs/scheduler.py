@@ -1,58 +1,79 @@
 from __future__ import annotations
 
-from datetime import datetime
-
 from discord.ext import tasks
 from loguru import logger
+from tortoise.functions import Count, Max
 
+from config import CFG
 from src import services
+from src.models import Servers
 
 
 class Scheduler(services.BaseCog):
+    """
+    Runs bot deadlines (adv deletion, reminders) and the settings watcher.
+
+    Deadlines are armed by TempVoice/Adv themselves, this cog only owns
+    the lifetime of the scheduler loop.
+
+    Server settings are cached until invalidated. The watcher reads a
+    change stamp of every server (its updated_at, latest updated_at and
+    count of its creator channels) with one query and invalidates servers
+    whose stamp changed since the previous check.
+    """
+
     def __init__(self, bot):
         super().__init__(bot)
+        self._settings_stamps: dict[int, tuple] | None = None
+        bot.deadlines.lag_histogram = bot.metrics.histogram(
+            "scheduler_lag_seconds",
+            "Seconds between a deadline and its firing",
+        )
+        bot.deadlines.stages = bot.stages
+        self.settings_watcher.change_interval(
+            seconds=CFG["settings"]["check_interval"]
+        )
+
+    async def cog_load(self):
+        self.bot.deadlines.start()
+        logger.info(f"Deadline scheduler started: {self.bot.deadlines}")
+        self.settings_watcher.start()
+
+    async def cog_unload(self):
+        self.bot.deadlines.stop()
+        self.settings_watcher.cancel()
+
+    @tasks.loop()
+    async def settings_watcher(self):
+        try:
+            with self.bot.stages.stage("Scheduler.settings_watcher"):
+                stamps = await self._settings_stamps_query()
+        except Exception as e:
+            logger.exception(f"Settings watcher failed: {e}")
+            return
+
+        if self._settings_stamps is not None:
+            for guild_id, server in self.bot.servers.items():
+                if stamps.get(guild_id) != self._settings_stamps.get(guild_id):
+                    server.invalidate_settings()
+                    logger.info(f"Server {guild_id} settings invalidated")
+        self._settings_stamps = stamps
 
-    @tasks.loop(minutes=1.0)
-    async def adv_deleter(self):
-        for server in self.bot.servers.copy().values():
-            for temp_voice in server.all_channels().values():
-                if (
-                    temp_voice.adv
-                    and temp_voice.adv.delete_after
-                    and datetime.now() >= temp_voice.adv.delete_after
-                ):
-                    await temp_voice.adv.delete()
-
-    @tasks.loop(minutes=1.0)
-    async def reminder_sender(self):
-        for server in list(self.bot.servers.values()):
-            for temp_voice in list(server.all_channels().values()):
-                if (
-                    temp_voice.reminder
-                    and datetime.now() >= temp_voice.reminder
-                ):
-                    logger.debug(f"Sending reminder to {temp_voice.channel.id}")
-                    await temp_voice.send_reminder(server.adv_channel)
-
-    @reminder_sender.before_loop
-    async def before_remind_sender(self):
-        await self.bot.wait_until_ready()
-
-    @adv_deleter.before_loop
-    async def before_adv_deleter(self):
-        await self.bot.wait_until_ready()
-
-    def cog_load(self):
-        if not self.adv_deleter.is_running():
-            self.adv_deleter.start()
-        if not self.reminder_sender.is_running():
-            self.reminder_sender.start()
-
-    def cog_unload(self):
-        if self.adv_deleter.is_running():
-            self.adv_deleter.cancel()
-        if self.reminder_sender.is_running():
-            self.reminder_sender.cancel()
+    @staticmethod
+    async def _settings_stamps_query() -> dict[int, tuple]:
+        return {
+            row["dis_id"]: (
+                row["updated_at"],
+                row["creators_updated_at"],
+                row["creators"],
+            )
+            for row in await Servers.annotate(
+                creators_updated_at=Max("creator_channels__updated_at"),
+                creators=Count("creator_channels"),
+            )
+            .group_by("id")
+            .values("dis_id", "updated_at", "creators_updated_at", "creators")
+        }
 
 
 async def setup(bot) -> None:
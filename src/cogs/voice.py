@@ -1,14 +1,11 @@
 from __future__ import annotations
 
-import asyncio
-
 import discord
 from discord.ext import commands
 from loguru import logger
-from sentry_sdk import metrics
 
+from config import CFG
 from src import services
-from src.models import TempChannels
 
 
 class Voice(services.BaseCog):
@@ -16,6 +13,12 @@ class Voice(services.BaseCog):
         super().__init__(bot)
 
         self.channels_restored = False
+        self.events = services.VoiceEventQueue(
+            bot, CFG["voice"]["flush_window"]
+        )
+
+    def cog_unload(self):
+        self.events.close()
 
     @commands.Cog.listener()
     async def on_voice_state_update(
@@ -34,28 +37,22 @@ class Voice(services.BaseCog):
             and after.channel.type == discord.ChannelType.voice
             and (after_server := await self.bot.server(after.channel.guild.id))
         ):
-            await after_server.update_settings()
             if after_server.is_creator_channel(after.channel.id):
                 logger.debug("User joined to creator channel")
                 # Check if user join in Creator channel
-                if temp_voice := await after_server.create_channel(
+                self.events.guild(after_server.guild.id).create(
                     member, after.channel.id
-                ):
-                    logger.info(
-                        f"Temp voice {temp_voice.id} created and user "
-                        f"{member.id} moved into."
-                    )
-            elif after_server.is_temp_channel(after.channel.id) and (
-                after_temp_voice := after_server.channel(after.channel.id)
-            ):
+                )
+            elif after_server.is_temp_channel(after.channel.id):
                 logger.debug("User joined to temp channel")
-                metrics.incr(
+                self.bot.aggregator.incr(
                     "temp_channel_user_join",
                     1,
                     tags={"server": after_server.guild.id},
                 )
-                after_temp_voice.updated()
-                await after_temp_voice.adv.update()
+                self.events.guild(after_server.guild.id).refresh(
+                    after.channel.id, services.ChannelEvent.JOIN
+                )
 
         if (
             before.channel
@@ -63,21 +60,12 @@ class Voice(services.BaseCog):
             and (
                 before_server := await self.bot.server(before.channel.guild.id)
             )
+            and before_server.is_temp_channel(before.channel.id)
         ):
-            await before_server.update_settings()
-            if before_server.is_temp_channel(before.channel.id):
-                # Check if user leave Temp channel
-                if not len(before.channel.members):
-                    await before_server.del_channel(before.channel.id)
-                    logger.info(
-                        f"Temp voice {before.channel.id} deleted, because "
-                        f"its empty."
-                    )
-                elif before_temp_voice := before_server.channel(
-                    before.channel.id
-                ):
-                    before_temp_voice.updated()
-                    await before_temp_voice.adv.update()
+            # User leave Temp channel, it will be deleted if empty
+            self.events.guild(before_server.guild.id).refresh(
+                before.channel.id, services.ChannelEvent.LEAVE
+            )
 
     @commands.Cog.listener()
     async def on_guild_channel_update(
@@ -91,31 +79,19 @@ class Voice(services.BaseCog):
         """
         if after.type == discord.ChannelType.voice and (
             (server := await self.bot.server(after.guild.id))
-            and (temp_voice := server.channel(before.id))
+            and server.is_temp_channel(before.id)
         ):
-            temp_voice.updated()
-            if temp_voice.adv:
-                await temp_voice.adv.update()
+            self.events.guild(server.guild.id).refresh(
+                before.id, services.ChannelEvent.UPDATE
+            )
 
     @commands.Cog.listener()
     async def on_ready(self):
         if not self.channels_restored:
-            for raw_channel in await TempChannels.filter(deleted=0):
-                if (channel := self.bot.get_channel(raw_channel.dis_id)) and (
-                    server := await self.bot.server(channel.guild.id)
-                ):
-                    temp_channel = await server.restore_channel(
-                        channel,
-                        raw_channel.dis_owner_id,
-                        raw_channel.dis_creator_id,
-                        raw_channel.dis_adv_msg_id,
-                    )
-                    if not temp_channel.channel.members:
-                        await server.del_channel(channel.id)
-                    logger.info(f"Channel {channel.id} restored")
-                await asyncio.sleep(0.1)
+            await services.ChannelRestorer(
+                self.bot, CFG["restore"]["concurrency"]
+            ).restore()
             self.channels_restored = True
-            logger.info("Channels restore done")
 
 
 async def setup(bot):
@@ -3,7 +3,7 @@ from tortoise import fields, models
 
 class Servers(models.Model):
     id = fields.IntField(primary_key=True)
-    dis_id = fields.BigIntField()
+    dis_id = fields.BigIntField(unique=True)
     dis_adv_channel_id = fields.BigIntField()
 
     creator_channels: fields.ReverseRelation["CreatorChannels"]
@@ -27,6 +27,8 @@ class CreatorChannels(models.Model):
     dis_category_id = fields.BigIntField()
     def_name = fields.CharField(default="{user}", max_length=32)
     def_user_limit = fields.SmallIntField(null=True)
+    # Max idle pre-created channels, 0 disables warm pool
+    warm_pool_size = fields.SmallIntField(default=0)
 
     created_at = fields.DatetimeField(auto_now_add=True)
     updated_at = fields.DatetimeField(auto_now=True)
@@ -37,7 +39,7 @@ class CreatorChannels(models.Model):
 
 class TempChannels(models.Model):
     id = fields.IntField(primary_key=True)
-    dis_id = fields.BigIntField()
+    dis_id = fields.BigIntField(unique=True)
     server: fields.ForeignKeyRelation[Servers] = fields.ForeignKeyField(
         'models.Servers',
         related_name='temp_channels',
@@ -45,7 +47,7 @@ class TempChannels(models.Model):
     dis_creator_id = fields.BigIntField()
     dis_owner_id = fields.BigIntField()
     dis_adv_msg_id = fields.BigIntField(null=True)
-    deleted = fields.BooleanField(default=False)
+    deleted = fields.BooleanField(default=False, db_index=True)
 
     created_at = fields.DatetimeField(auto_now_add=True)
     updated_at = fields.DatetimeField(auto_now=True)
@@ -67,5 +69,8 @@ class TCBans(models.Model):
     created_at = fields.DatetimeField(auto_now_add=True)
     updated_at = fields.DatetimeField(auto_now=True)
 
+    class Meta:
+        unique_together = (('server', 'dis_creator_id', 'dis_banned_id'),)
+
     def __str__(self):
         return f'{self.dis_creator_id} banned user {self.dis_banned_id}'
@@ -1,4 +1,6 @@
 from .base import BaseCog
 from .bot_class import PartySysBot
+from .events import ChannelEvent, VoiceEventQueue
+from .restore import ChannelRestorer
 from .server import Server
 from .temp_voice import TempVoice
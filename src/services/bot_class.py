@@ -1,20 +1,112 @@
 from __future__ import annotations
 
+import asyncio
+import signal
+import time
+
+import discord
+from loguru import logger
+
 from src import utils
 
 from .server import Server
 
 
 class PartySysBot(utils.BotABC):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics.gauge(
+            "temp_channels",
+            "Live temp channels",
+            ("guild",),
+            collect=lambda: {
+                (guild_id,): len(server.all_channels())
+                for guild_id, server in self.servers.items()
+            },
+        )
+        self._time_requests()
+
+    def _time_requests(self) -> None:
+        """Times every Discord REST request by its route template"""
+        histogram = self.metrics.histogram(
+            "discord_request_seconds",
+            "Discord REST request time, rate limit waits included",
+            ("method", "route"),
+        )
+        request = self.http.request
+
+        async def timed_request(route: discord.http.Route, **kwargs):
+            started_at = time.perf_counter()
+            try:
+                with (
+                    self.stages.stage(f"rest {route.method} {route.path}"),
+                    utils.span("http.client", f"{route.method} {route.path}"),
+                ):
+                    return await request(route, **kwargs)
+            finally:
+                histogram.observe(
+                    time.perf_counter() - started_at,
+                    method=route.method,
+                    route=route.path,
+                )
+
+        self.http.request = timed_request
+
+    async def _run_event(self, coro, event_name, *args, **kwargs):
+        name = getattr(coro, "__qualname__", event_name)
+        with utils.transaction(f"event.{event_name}", name):
+            if not self.stages.enabled:
+                return await super()._run_event(
+                    coro, event_name, *args, **kwargs
+                )
+
+            with self.stages.stage(name, self._event_guild(args)):
+                await super()._run_event(coro, event_name, *args, **kwargs)
+
+    @staticmethod
+    def _event_guild(args: tuple) -> int | None:
+        for arg in args:
+            if guild_id := getattr(arg, "guild_id", None):
+                return guild_id
+            if guild := getattr(arg, "guild", None):
+                return guild.id
+        return None
+
     async def server(self, guild_id):
         if guild_id not in self.servers:
             if guild := self.get_guild(guild_id):
-                self.servers[guild_id] = await Server.new(self, guild)
+                server = await Server.new(self, guild)
 
-                return self.servers[guild_id]
+                # Concurrent first events of a guild must share one server
+                return self.servers.setdefault(guild_id, server)
             else:
                 return None
-        elif self.servers[guild_id].id:
-            return self.servers[guild_id]
-        else:
-            return None
+
+        server = self.servers[guild_id]
+        await server.update_settings()  # No-op until settings invalidated
+        return server if server.id else None
+
+    def close_on_signals(self) -> None:
+        """
+        Closes the bot on SIGTERM and SIGINT, so pending writes, metrics and
+        the journal are flushed on a normal stop. Call in the running loop.
+        """
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self._close_on_signal, signum)
+
+    def _close_on_signal(self, signum: int) -> None:
+        logger.info(f"{signal.Signals(signum).name} received, closing")
+        # Referenced, so the task isn't garbage collected while flushing
+        self._closing = asyncio.create_task(self.close())
+
+    async def close(self):
+        try:
+            await self.writes.close()  # Pending TempChannels writes
+        except Exception as e:
+            logger.exception(f"Final TempChannels flush failed: {e}")
+        try:
+            await self.aggregator.close()  # Metrics of the last interval
+        except Exception as e:
+            logger.exception(f"Final metrics flush failed: {e}")
+        await super().close()
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from contextlib import suppress
+
+import discord
+from loguru import logger
+from tortoise.exceptions import BaseORMException
+
+from src import utils
+from src.models import CreatorChannels, TempChannels
+
+# Pool keeps as many channels as were claimed during this window (seconds)
+DEMAND_WINDOW = 600.0
+
+
+class ChannelPool:
+    """
+    Warm pool of idle voice channels of a creator channel.
+
+    Idle channels are pre-created hidden in the creator category with
+    def_name and def_user_limit, so temp voice creation only has to rename
+    and reveal one of them. Idle channels are saved in TempChannels with
+    the bot as owner, so after restart they are dropped by restore as
+    empty temp channels. A drained pool deletes its idle channels.
+    """
+
+    __slots__ = (
+        "server",
+        "creator_channel",
+        "hits",
+        "misses",
+        "_idle",
+        "_discarded",
+        "_claims",
+        "_drained",
+        "_refill_task",
+    )
+
+    def __init__(
+        self, server: utils.ServerABC, creator_channel: CreatorChannels
+    ):
+        self.server = server
+        self.creator_channel = creator_channel
+
+        self.hits = 0
+        self.misses = 0
+
+        self._idle: deque[discord.VoiceChannel] = deque()
+        self._discarded: list[discord.VoiceChannel] = []
+        self._claims: deque[float] = deque()  # Monotonic time of claims
+        self._drained = False
+        self._refill_task: asyncio.Task | None = None
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} "
+            f"creator_channel={self.creator_channel} "
+            f"idle={len(self._idle)}/{self.target_size} "
+            f"hits={self.hits} "
+            f"misses={self.misses}"
+            f">"
+        )
+
+    @property
+    def target_size(self) -> int:
+        if self._drained:
+            return 0
+        now = time.monotonic()
+        while self._claims and now - self._claims[0] > DEMAND_WINDOW:
+            self._claims.popleft()
+        return min(
+            self.creator_channel.warm_pool_size, max(1, len(self._claims))
+        )
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "idle": len(self._idle),
+            "target": self.target_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def claim(self) -> discord.VoiceChannel | None:
+        self._claims.append(time.monotonic())
+
+        channel = None
+        while self._idle:
+            candidate = self._idle.popleft()
+            # Skip channels deleted or joined while idle
+            if (
+                self.server.bot.get_channel(candidate.id)
+                and not candidate.members
+            ):
+                channel = candidate
+                break
+
+        if channel:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self.server.bot.aggregator.incr(
+            "temp_channel_pool_hit" if channel else "temp_channel_pool_miss",
+            1,
+            tags={"server": self.server.guild.id},
+        )
+
+        self.refill()
+        return channel
+
+    def discard(self, channel: discord.VoiceChannel) -> None:
+        """Delete claimed channel which failed to be turned into temp voice"""
+        self._discarded.append(channel)
+        self.refill()
+
+    def drain(self) -> None:
+        """Delete idle channels, the pool is not used after"""
+        self._drained = True
+        self.refill()
+
+    def refill(self) -> None:
+        if not self._refill_task or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill())
+
+    async def _refill(self) -> None:
+        category = self.server.bot.get_channel(
+            self.creator_channel.dis_category_id
+        )
+
+        try:
+            while True:
+                if self._discarded:
+                    await self._delete_idle(self._discarded.pop())
+                elif len(self._idle) > self.target_size:
+                    await self._delete_idle(self._idle.pop())
+                elif len(self._idle) < self.target_size and isinstance(
+                    category, discord.CategoryChannel
+                ):
+                    self._idle.append(await self._create_idle(category))
+                else:
+                    break
+        except (
+            discord.HTTPException,
+            utils.RequestShedError,
+            BaseORMException,
+        ) as e:
+            logger.warning(f"Warm pool {self} refill failed: {e!r}")
+
+    async def _create_idle(
+        self, category: discord.CategoryChannel
+    ) -> discord.VoiceChannel:
+        # Hidden for everyone the category overwrites let in, except the bot
+        me = category.guild.me
+        overwrites = {}
+        for target in (category.guild.default_role, *category.overwrites):
+            overwrite = category.overwrites.get(
+                target, discord.PermissionOverwrite()
+            )
+            if target == me or target in me.roles:
+                overwrites[target] = overwrite
+                continue
+            hidden = discord.PermissionOverwrite.from_pair(*overwrite.pair())
+            hidden.update(view_channel=False, connect=False)
+            overwrites[target] = hidden
+
+        channel = await self.server.bot.rest.call(
+            utils.Priority.BACKGROUND,
+            category.create_voice_channel,
+            name=self.creator_channel.def_name[:32],
+            user_limit=self.creator_channel.def_user_limit,
+            overwrites=overwrites,
+            reason="Warm temp voice pool",
+        )
+        try:
+            await TempChannels.create(
+                dis_id=channel.id,
+                dis_creator_id=self.server.bot.user.id,
+                dis_owner_id=self.server.bot.user.id,
+                server_id=self.server.id,
+            )
+        except BaseORMException:
+            # Restore would never clean up a channel without its row
+            await self._delete_idle(channel)
+            raise
+        return channel
+
+    async def _delete_idle(self, channel: discord.VoiceChannel) -> None:
+        with suppress(discord.NotFound):
+            await self.server.bot.rest.call(
+                utils.Priority.BACKGROUND,
+                channel.delete,
+                reason="Warm temp voice pool shrink",
+            )
+        self.server.bot.writes.delete(channel.id)
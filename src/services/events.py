@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import suppress
+from enum import IntFlag
+
+import discord
+from loguru import logger
+
+from src import utils
+
+
+class ChannelEvent(IntFlag):
+    JOIN = 1
+    LEAVE = 2
+    UPDATE = 4
+
+
+class GuildEventQueue:
+    """
+    Serialized event worker of a single guild.
+
+    Joins to creator channels are handled one by one and wake the worker
+    immediately, all other events are folded into one refresh per temp
+    channel and flush window.
+    """
+
+    __slots__ = (
+        "bot",
+        "guild_id",
+        "flush_window",
+        "flush_latency",
+        "flushes",
+        "_handling",
+        "_creations",
+        "_refreshes",
+        "_first_event_at",
+        "_wakeup",
+        "_urgent",
+        "_worker",
+    )
+
+    def __init__(self, bot: utils.BotABC, guild_id: int, flush_window: float):
+        self.bot = bot
+        self.guild_id = guild_id
+        self.flush_window = flush_window
+
+        self.flush_latency = 0.0  # Seconds from first queued event to flush
+        self.flushes = 0
+        self._handling = bot.metrics.histogram(
+            "voice_event_seconds",
+            "Voice event handling time, create or refresh of a temp channel",
+            ("kind",),
+        )
+
+        self._creations: list[tuple[discord.Member, int]] = []
+        self._refreshes: dict[int, ChannelEvent] = {}
+        self._first_event_at: float | None = None
+
+        self._wakeup = asyncio.Event()
+        self._urgent = asyncio.Event()
+        self._worker: asyncio.Task | None = None
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} "
+            f"guild_id={self.guild_id} "
+            f"depth={len(self)}"
+            f">"
+        )
+
+    def __len__(self) -> int:
+        return len(self._creations) + len(self._refreshes)
+
+    def create(self, member: discord.Member, creator_channel_id: int) -> None:
+        self._creations.append((member, creator_channel_id))
+        self._urgent.set()
+        self._wake()
+
+    def refresh(self, channel_id: int, event: ChannelEvent) -> None:
+        self._refreshes[channel_id] = (
+            self._refreshes.get(channel_id, ChannelEvent(0)) | event
+        )
+        self._wake()
+
+    def close(self) -> None:
+        if self._worker:
+            self._worker.cancel()
+            self._worker = None
+
+    def _wake(self) -> None:
+        if self._first_event_at is None:
+            self._first_event_at = time.monotonic()
+        if not self._worker:
+            self._worker = asyncio.create_task(self._run())
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            # Give the burst time to settle, unless someone waits for a channel
+            with suppress(TimeoutError):
+                await asyncio.wait_for(self._urgent.wait(), self.flush_window)
+            self._wakeup.clear()
+            self._urgent.clear()
+
+            try:
+                await self._flush()
+            except Exception as e:
+                logger.exception(e)
+
+    async def _flush(self) -> None:
+        creations, self._creations = self._creations, []
+        refreshes, self._refreshes = self._refreshes, {}
+        first_event_at, self._first_event_at = self._first_event_at, None
+
+        if server := await self.bot.server(self.guild_id):
+            await server.update_settings()
+            for member, creator_channel_id in creations:
+                started_at = time.perf_counter()
+                try:
+                    with (
+                        self.bot.stages.stage("voice create", self.guild_id),
+                        utils.transaction("voice.create", "create"),
+                    ):
+                        await self._create(server, member, creator_channel_id)
+                except Exception as e:
+                    logger.exception(e)
+                self._handling.observe(
+                    time.perf_counter() - started_at, kind="create"
+                )
+            for channel_id, events in refreshes.items():
+                started_at = time.perf_counter()
+                try:
+                    with (
+                        self.bot.stages.stage("voice refresh", self.guild_id),
+                        utils.transaction("voice.refresh", "refresh"),
+                    ):
+                        await self._refresh(server, channel_id, events)
+                except Exception as e:
+                    logger.exception(e)
+                self._handling.observe(
+                    time.perf_counter() - started_at, kind="refresh"
+                )
+
+        self.flushes += 1
+        if first_event_at is not None:
+            self.flush_latency = time.monotonic() - first_event_at
+
+    @staticmethod
+    async def _create(
+        server: utils.ServerABC,
+        member: discord.Member,
+        creator_channel_id: int,
+    ) -> None:
+        if temp_voice := await server.create_channel(
+            member, creator_channel_id
+        ):
+            logger.info(
+                f"Temp voice {temp_voice.id} created and user "
+                f"{member.id} moved into."
+            )
+
+    @staticmethod
+    async def _refresh(
+        server: utils.ServerABC, channel_id: int, events: ChannelEvent
+    ) -> None:
+        if not (temp_voice := server.channel(channel_id)):
+            return
+
+        if events & ChannelEvent.LEAVE and not temp_voice.channel.members:
+            await server.del_channel(channel_id)
+            logger.info(f"Temp voice {channel_id} deleted, because its empty.")
+            return
+
+        temp_voice.updated()
+        if events & (ChannelEvent.JOIN | ChannelEvent.LEAVE) or temp_voice.adv:
+            await temp_voice.adv.update()
+
+
+class VoiceEventQueue:
+    """Per-guild event queues, guilds are processed in parallel."""
+
+    __slots__ = ("bot", "flush_window", "_queues")
+
+    def __init__(self, bot: utils.BotABC, flush_window: float):
+        self.bot = bot
+        self.flush_window = flush_window
+        self._queues: dict[int, GuildEventQueue] = {}
+
+    def guild(self, guild_id: int) -> GuildEventQueue:
+        if guild_id not in self._queues:
+            self._queues[guild_id] = GuildEventQueue(
+                self.bot, guild_id, self.flush_window
+            )
+        return self._queues[guild_id]
+
+    def depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def stats(self) -> dict[int, dict[str, float]]:
+        return {
+            guild_id: {
+                "depth": len(queue),
+                "flush_latency": queue.flush_latency,
+                "flushes": queue.flushes,
+            }
+            for guild_id, queue in self._queues.items()
+        }
+
+    def close(self) -> None:
+        for queue in self._queues.values():
+            queue.close()
+        self._queues.clear()
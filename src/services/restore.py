@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import defaultdict
+from contextlib import suppress
+from datetime import timedelta
+
+import discord
+from loguru import logger
+
+from src import utils
+from src.models import TempChannels
+
+# Discord bulk delete accepts up to 100 messages not older than 2 weeks
+BULK_DELETE_MAX_COUNT = 100
+BULK_DELETE_MAX_AGE = timedelta(days=14)
+# Adv channel messages read per guild, older ads are fetched one by one
+HISTORY_SCAN_LIMIT = 500
+
+
+class ChannelRestorer:
+    """
+    Restores temp channels saved in DB after bot restart.
+
+    Rows are grouped by guild: channels of one guild are restored one by
+    one (server state is not shared between tasks), guilds are restored
+    concurrently. There is no fixed pacing, requests are throttled by
+    discord.py per rate-limit bucket using the headers Discord returns.
+
+    Adv messages are matched with one paginated history scan of the adv
+    channel per guild (capped, older ads are fetched one by one), ads left
+    without a live channel are bulk-deleted, the ones older than 2 weeks
+    are deleted one by one.
+    """
+
+    __slots__ = (
+        "bot",
+        "concurrency",
+        "total",
+        "done",
+        "elapsed",
+        "_progress_step",
+    )
+
+    def __init__(self, bot: utils.BotABC, concurrency: int):
+        self.bot = bot
+        self.concurrency = concurrency
+
+        self.total = 0
+        self.done = 0
+        self.elapsed = 0.0
+        self._progress_step = 1
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} "
+            f"done={self.done}/{self.total} "
+            f"elapsed={self.elapsed:.1f}s"
+            f">"
+        )
+
+    async def restore(self) -> None:
+        started_at = time.monotonic()
+
+        guilds: dict[int, list[tuple[discord.VoiceChannel, TempChannels]]] = (
+            defaultdict(list)
+        )
+        for raw_channel in await TempChannels.filter(deleted=0):
+            if channel := self.bot.get_channel(raw_channel.dis_id):
+                guilds[channel.guild.id].append((channel, raw_channel))
+
+        self.total = sum(len(channels) for channels in guilds.values())
+        self._progress_step = max(1, self.total // 10)
+        logger.info(
+            f"Restoring {self.total} channels of {len(guilds)} servers "
+            f"(concurrency {self.concurrency})"
+        )
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(
+            *(
+                self._restore_guild(semaphore, guild_id, channels)
+                for guild_id, channels in guilds.items()
+            )
+        )
+
+        self.elapsed = time.monotonic() - started_at
+        logger.info(
+            f"Channels restore done: {self.done}/{self.total} "
+            f"in {self.elapsed:.1f}s"
+        )
+
+    async def _restore_guild(
+        self,
+        semaphore: asyncio.Semaphore,
+        guild_id: int,
+        channels: list[tuple[discord.VoiceChannel, TempChannels]],
+    ) -> None:
+        async with semaphore:
+            server = await self.bot.server(guild_id)
+            adv_messages = {}
+            if server:
+                try:
+                    adv_messages = await self._reconcile_adv(server, channels)
+                except discord.HTTPException as e:
+                    logger.exception(
+                        f"Adv reconcile of server {guild_id} failed: {e}"
+                    )
+
+            for channel, raw_channel in channels:
+                if server:
+                    try:
+                        await self._restore_channel(
+                            server,
+                            channel,
+                            raw_channel,
+                            adv_messages.get(raw_channel.dis_adv_msg_id),
+                        )
+                    except Exception as e:
+                        logger.exception(
+                            f"Channel {channel.id} restore failed: {e}"
+                        )
+                self._progress()
+
+    def _is_adv(self, message: discord.Message) -> bool:
+        # Adv is the only bot message with an embed and a "join" link button
+        return (
+            message.author.id == self.bot.user.id
+            and bool(message.embeds)
+            and any(
+                isinstance(child, discord.Button) and child.url
+                for row in message.components
+                if isinstance(row, discord.ActionRow)
+                for child in row.children
+            )
+        )
+
+    async def _reconcile_adv(
+        self,
+        server: utils.ServerABC,
+        channels: list[tuple[discord.VoiceChannel, TempChannels]],
+    ) -> dict[int, discord.Message]:
+        """
+        Read adv channel history once instead of fetching every adv message
+        :return: adv message id -> message of channels which will be restored
+        """
+        if not server.adv_channel:
+            return {}
+
+        wanted, stale = set(), set()
+        for channel, raw_channel in channels:
+            if raw_channel.dis_adv_msg_id:
+                (wanted if channel.members else stale).add(
+                    raw_channel.dis_adv_msg_id
+                )
+        bulk_delete_after = discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+        after = discord.utils.time_snowflake(bulk_delete_after)
+        if wanted or stale:
+            after = min(after, min(wanted | stale) - 1)
+
+        # Newest first, so with the scan capped the recent ads are read
+        found, orphans, scanned, oldest = {}, [], 0, after
+        async for message in server.adv_channel.history(
+            limit=HISTORY_SCAN_LIMIT,
+            after=discord.Object(after),
+            oldest_first=False,
+        ):
+            scanned, oldest = scanned + 1, message.id
+            if message.id in wanted:
+                found[message.id] = message
+            elif message.created_at > bulk_delete_after and self._is_adv(
+                message
+            ):
+                orphans.append(message)
+
+        missing = wanted - found.keys()
+        if scanned >= HISTORY_SCAN_LIMIT:
+            missing = await self._fetch_past_scan(
+                server, missing, oldest, found
+            )
+
+        await self._delete_orphans(server, orphans, stale)
+        if missing:
+            await TempChannels.filter(dis_adv_msg_id__in=missing).update(
+                dis_adv_msg_id=None
+            )
+
+        logger.info(
+            f"Server {server.guild.id} ads reconciled: {len(found)} found, "
+            f"{len(missing)} missing, {len(orphans)} orphans deleted"
+        )
+        return found
+
+    async def _delete_orphans(
+        self,
+        server: utils.ServerABC,
+        orphans: list[discord.Message],
+        stale: set[int],
+    ) -> None:
+        try:
+            for i in range(0, len(orphans), BULK_DELETE_MAX_COUNT):
+                await self.bot.rest.call(
+                    utils.Priority.BACKGROUND,
+                    server.adv_channel.delete_messages,
+                    orphans[i : i + BULK_DELETE_MAX_COUNT],
+                    reason="Orphaned temp voice adv.",
+                )
+            # Ads of empty channels too old for bulk delete or past the scan
+            for msg_id in stale - {message.id for message in orphans}:
+                with suppress(discord.NotFound):
+                    await self.bot.rest.call(
+                        utils.Priority.BACKGROUND,
+                        server.adv_channel.get_partial_message(msg_id).delete,
+                    )
+        except utils.RequestShedError:
+            logger.warning(f"Server {server.guild.id} orphan ads cleanup shed")
+
+    async def _fetch_past_scan(
+        self,
+        server: utils.ServerABC,
+        missing: set[int],
+        oldest: int,
+        found: dict[int, discord.Message],
+    ) -> set[int]:
+        """
+        Fetch one by one ads older than the capped history scan reached
+        :return: ads confirmed missing
+        """
+        confirmed = {msg_id for msg_id in missing if msg_id >= oldest}
+        try:
+            for msg_id in sorted(missing - confirmed):
+                try:
+                    found[msg_id] = await self.bot.rest.call(
+                        utils.Priority.BACKGROUND,
+                        server.adv_channel.fetch_message,
+                        msg_id,
+                    )
+                except discord.NotFound:
+                    confirmed.add(msg_id)
+        except utils.RequestShedError:
+            logger.warning(f"Server {server.guild.id} ads fetch shed")
+        return confirmed
+
+    @staticmethod
+    async def _restore_channel(
+        server: utils.ServerABC,
+        channel: discord.VoiceChannel,
+        raw_channel: TempChannels,
+        adv_msg: discord.Message | None,
+    ) -> None:
+        temp_channel = await server.restore_channel(
+            channel,
+            raw_channel.dis_owner_id,
+            raw_channel.dis_creator_id,
+            adv_msg,
+        )
+        if not temp_channel.channel.members:
+            await server.del_channel(channel.id)
+        logger.info(f"Channel {channel.id} restored")
+
+    def _progress(self) -> None:
+        self.done += 1
+        if self.done % self._progress_step == 0 or self.done == self.total:
+            logger.info(f"Channels restore progress: {self.done}/{self.total}")
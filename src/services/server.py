@@ -1,15 +1,13 @@
 from __future__ import annotations
 
-import datetime
-from contextlib import suppress
 from types import MappingProxyType
 
 import discord
-from sentry_sdk import metrics
 
 from src import ui, utils
 from src.models import CreatorChannels, Servers
 
+from .channel_pool import ChannelPool
 from .temp_voice import TempVoice
 
 ROMAN_NUMBERS = {
@@ -46,9 +44,12 @@ class Server(utils.ServerABC):
         "adv_channel",
         "_creator_channels",
         "_temp_channels",
+        "_owners",
+        "_creators",
+        "_pools",
         "_random_names",
         "_random_names_index",
-        "_last_data_update",
+        "_settings_dirty",
     )
 
     def _get_random_squad_name(self) -> str:
@@ -64,7 +65,6 @@ class Server(utils.ServerABC):
         if server := await Servers.get_or_none(dis_id=guild_id):
             self.id = server.id
             self.adv_channel = self.bot.get_channel(server.dis_adv_channel_id)
-            self._last_data_update = datetime.datetime.now()
 
             self._creator_channels = MappingProxyType(
                 {
@@ -75,19 +75,50 @@ class Server(utils.ServerABC):
                 }
             )
 
+        self._settings_dirty = False
+
     async def update_settings(self):
-        if (
-            datetime.datetime.now() - self._last_data_update
-            >= datetime.timedelta(seconds=10)
-        ):
+        if self._settings_dirty:
             await self._update_settings(self.guild.id)
 
+    def invalidate_settings(self):
+        self._settings_dirty = True
+        # Pools are created again with the reloaded settings on next claim
+        for pool in self._pools.values():
+            pool.drain()
+        self._pools = {}
+
+    @staticmethod
+    def _index(index, member, temp_voice):
+        if member:
+            index.setdefault(member.id, {})[temp_voice.channel.id] = temp_voice
+
+    @staticmethod
+    def _unindex(index, member, channel_id):
+        if member and (channels := index.get(member.id)):
+            channels.pop(channel_id, None)
+            if not channels:
+                del index[member.id]
+
+    def _add_channel(self, temp_voice):
+        self._temp_channels[temp_voice.channel.id] = temp_voice
+        self._index(self._owners, temp_voice.owner, temp_voice)
+        self._index(self._creators, temp_voice.creator, temp_voice)
+
+    def _remove_channel(self, channel_id):
+        if temp_voice := self._temp_channels.pop(channel_id, None):
+            self._unindex(self._owners, temp_voice.owner, channel_id)
+            self._unindex(self._creators, temp_voice.creator, channel_id)
+
+    def update_owner_index(self, temp_voice, old_owner):
+        self._unindex(self._owners, old_owner, temp_voice.channel.id)
+        self._index(self._owners, temp_voice.owner, temp_voice)
+
     async def del_channel(self, channel_id):
         try:
             await self._temp_channels[channel_id].delete()
         finally:
-            if channel_id in self._temp_channels:
-                del self._temp_channels[channel_id]
+            self._remove_channel(channel_id)
 
     async def create_channel(self, member, creator_channel_id):
         if creator_channel_id not in self._creator_channels:
@@ -107,20 +138,24 @@ class Server(utils.ServerABC):
                 roman_num=to_roman(len(self._temp_channels) + 1),
             )[:32]
 
+        creator_channel = self._creator_channels[creator_channel_id]
         try:
             temp_voice = await TempVoice.create(
                 creator_category,
-                self._creator_channels[creator_channel_id],
+                creator_channel,
                 member,
                 _channel_name_formatter,
                 self,
+                self._pool(creator_channel).claim()
+                if creator_channel.warm_pool_size
+                else None,
             )
         except (discord.NotFound, discord.HTTPException):
             return None
 
-        self._temp_channels[temp_voice.channel.id] = temp_voice
+        self._add_channel(temp_voice)
 
-        metrics.incr(
+        self.bot.aggregator.incr(
             "temp_channel_created",
             1,
             tags={"server": self.guild.id},
@@ -132,6 +167,23 @@ class Server(utils.ServerABC):
             else None
         )
 
+    def _pool(self, creator_channel):
+        if not (pool := self._pools.get(creator_channel.dis_id)):
+            pool = self._pools[creator_channel.dis_id] = ChannelPool(
+                self, creator_channel
+            )
+        pool.creator_channel = creator_channel  # Settings could be reloaded
+        return pool
+
+    def discard_warm_channel(self, creator_channel, channel):
+        self._pool(creator_channel).discard(channel)
+
+    def pools_stats(self):
+        return {
+            creator_channel_id: pool.stats()
+            for creator_channel_id, pool in self._pools.items()
+        }
+
     def is_creator_channel(self, channel_id):
         return channel_id in self._creator_channels
 
@@ -146,9 +198,8 @@ class Server(utils.ServerABC):
         ):
             return self._temp_channels[interaction_channel_id]
 
-        for temp_channel in self._temp_channels.values():
-            if temp_channel.owner == member:
-                return temp_channel
+        if channels := self._owners.get(member.id):
+            return next(iter(channels.values()))
         return False
 
     def get_member_transferred_tv(self, member):
@@ -157,9 +208,8 @@ class Server(utils.ServerABC):
         :param member:
         :return:
         """
-        for temp_channel in self._temp_channels.values():
-            if temp_channel.creator == member:
-                return temp_channel
+        if channels := self._creators.get(member.id):
+            return next(iter(channels.values()))
         return False
 
     def get_creator_channels_ids(self):
@@ -176,7 +226,7 @@ class Server(utils.ServerABC):
         channel,
         owner_id,
         creator_id,
-        adv_msg_id=None,
+        adv_msg=None,
     ):
         owner = self.guild.get_member(owner_id)
         creator = (
@@ -192,13 +242,11 @@ class Server(utils.ServerABC):
             creator,
         )
 
-        self._temp_channels[channel.id] = temp_voice
-        if adv_msg_id:
-            with suppress(discord.NotFound):
-                if adv_msg := await self.adv_channel.fetch_message(adv_msg_id):
-                    temp_voice.adv = ui.Adv(
-                        temp_voice,
-                        adv_msg,
-                    )
-                    await temp_voice.adv.update()
+        self._add_channel(temp_voice)
+        if adv_msg:
+            temp_voice.adv = ui.Adv(
+                temp_voice,
+                adv_msg,
+            )
+            await temp_voice.adv.update()
         return temp_voice
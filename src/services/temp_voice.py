@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import asyncio
 from contextlib import suppress
 from datetime import datetime, timedelta
 from typing import Self
 
 import discord
+from loguru import logger
 
 from config import CFG
 from src import ui, utils
@@ -24,6 +26,30 @@ class TempVoice(utils.TempVoiceABC):
         "_invite_url",
     )
 
+    @staticmethod
+    async def build_overwrites(category, member, server):
+        overwrites = {
+            member: discord.PermissionOverwrite(
+                move_members=True,
+            )
+        }
+
+        # Owner ban list is applied to the new channel
+        for banned_id in await server.bot.bans.get(server.id, member.id):
+            if banned_member := category.guild.get_member(banned_id):
+                overwrites[banned_member] = discord.PermissionOverwrite(
+                    view_channel=False,
+                    connect=False,
+                    speak=False,
+                    send_messages=False,
+                    add_reactions=False,
+                    send_messages_in_threads=False,
+                )
+
+        # Explicit overwrites disable category sync, so inherit them by hand
+        overwrites.update(category.overwrites)
+        return overwrites
+
     @classmethod
     async def create(
         cls,
@@ -32,11 +58,39 @@ class TempVoice(utils.TempVoiceABC):
         member,
         name_formatter,
         server,
+        warm_channel=None,
     ) -> Self:
-        channel = await category.create_voice_channel(
-            name=name_formatter(creator_channel.def_name),
-            user_limit=creator_channel.def_user_limit,
-        )
+        rest = server.bot.rest
+        overwrites = await cls.build_overwrites(category, member, server)
+
+        # Channel gets its final permissions in one request: warm channel is
+        # renamed and revealed, otherwise a new one is created
+        channel = None
+        if warm_channel:
+            try:
+                await rest.call(
+                    utils.Priority.CRITICAL,
+                    warm_channel.edit,
+                    name=name_formatter(creator_channel.def_name),
+                    user_limit=creator_channel.def_user_limit,
+                    overwrites=overwrites,
+                    reason="Claim warm temp voice",
+                )
+                channel = warm_channel
+            except discord.NotFound:
+                pass
+            except discord.HTTPException as e:
+                logger.warning(f"Warm channel {warm_channel.id} claim: {e!r}")
+                server.discard_warm_channel(creator_channel, warm_channel)
+        if not channel:
+            channel = await rest.call(
+                utils.Priority.CRITICAL,
+                category.create_voice_channel,
+                name=name_formatter(creator_channel.def_name),
+                user_limit=creator_channel.def_user_limit,
+                overwrites=overwrites,
+                reason="Create temp voice",
+            )
         temp_voice = cls(
             channel,
             member,
@@ -44,69 +98,61 @@ class TempVoice(utils.TempVoiceABC):
             member,
         )
 
-        temp_voice.reminder = datetime.now() + timedelta(
-            minutes=CFG["adv"]["before_auto_pub"]
-        )
-
-        await TempChannels.create(
-            dis_id=channel.id,
-            dis_creator_id=member.id,
-            dis_owner_id=member.id,
-            server_id=server.id,
+        temp_voice.set_reminder(
+            datetime.now() + timedelta(minutes=CFG["adv"]["before_auto_pub"])
         )
 
         try:
-            await member.move_to(
+            await rest.call(
+                utils.Priority.CRITICAL,
+                member.move_to,
                 channel,
                 reason="Move to created temp voice",
             )
         except discord.HTTPException as e:
-            if e.code == 40032:
-                # If owner leaved from creator channel delete temp voice
-                await temp_voice.delete()
+            # Owner leaved from creator channel (40032) or can't be moved,
+            # nobody will join this temp voice, so delete it
+            await temp_voice.delete()
             raise e
 
-        overwrites = {
-            member: discord.PermissionOverwrite(
-                move_members=True,
+        # Member is already moved, DB row and interface are not awaited
+        # one after another
+        for result in await asyncio.gather(
+            TempChannels.filter(dis_id=channel.id).update(
+                dis_creator_id=member.id,
+                dis_owner_id=member.id,
             )
-        }
-
-        # Next get owner ban list and restore them to the new channel
-        for raw_ban in await TCBans.filter(
-            server=server.id, dis_creator_id=member.id, banned=True
+            if channel is warm_channel
+            else TempChannels.create(
+                dis_id=channel.id,
+                dis_creator_id=member.id,
+                dis_owner_id=member.id,
+                server_id=server.id,
+            ),
+            temp_voice.send_interface(),
+            return_exceptions=True,
         ):
-            if banned_member := channel.guild.get_member(raw_ban.dis_banned_id):
-                overwrites[banned_member] = discord.PermissionOverwrite(
-                    view_channel=False,
-                    connect=False,
-                    speak=False,
-                    send_messages=False,
-                    add_reactions=False,
-                    send_messages_in_threads=False,
-                )
-
-        try:
-            overwrites.update(channel.overwrites)
-            await channel.edit(overwrites=overwrites, reason="Set permissions")
-
-            await temp_voice.send_interface()
-        except (discord.NotFound, discord.HTTPException) as err:
-            await temp_voice.delete()
-            raise err
+            if isinstance(result, BaseException):
+                await temp_voice.delete()
+                raise result
 
         return temp_voice
 
     async def invite_url(self):
         if not self._invite_url:
-            for inv in await self.channel.invites():
+            rest = self.server.bot.rest
+            for inv in await rest.call(
+                utils.Priority.INTERACTIVE, self.channel.invites
+            ):
                 if inv.inviter.id == self.server.bot.user.id:
                     self._invite_url = inv.url
                     return self._invite_url
 
             self._invite_url = (
-                await self.channel.create_invite(
-                    reason="Join link to this temp voice."
+                await rest.call(
+                    utils.Priority.INTERACTIVE,
+                    self.channel.create_invite,
+                    reason="Join link to this temp voice.",
                 )
             ).url
         return self._invite_url
@@ -121,39 +167,65 @@ class TempVoice(utils.TempVoiceABC):
             and self.reminder is not False
             and self.channel.user_limit > len(self.channel.members)
         ):
-            self.reminder = datetime.now() + timedelta(
-                minutes=CFG["adv"]["before_auto_pub"]
+            self.set_reminder(
+                datetime.now()
+                + timedelta(minutes=CFG["adv"]["before_auto_pub"])
             )
         elif self.reminder:
-            self.reminder = None
+            self.set_reminder(None)
+
+    def set_reminder(self, when):
+        self.reminder = when
+        if when:
+            self.server.bot.deadlines.arm(
+                ("reminder", self.channel.id),
+                when,
+                lambda: self.send_reminder(self.server.adv_channel),
+            )
+        else:
+            self.server.bot.deadlines.cancel(("reminder", self.channel.id))
 
     async def send_reminder(self, adv_channel):
+        self.set_reminder(None)
         if self.privacy == utils.Privacy.PUBLIC and not self.adv:
-            await self.adv.send("")
-            await self.channel.send(
-                embed=ui.ReminderEmbed(),
-                view=ui.AdvInterface(self.server.bot),
-                delete_after=120,
-            )  # Notify users in channel that adv sent
-        self.reminder = None
+            try:
+                await self.adv.send("", utils.Priority.BACKGROUND)
+                await self.server.bot.rest.call(
+                    utils.Priority.BACKGROUND,
+                    self.channel.send,
+                    embed=ui.ReminderEmbed(),
+                    view=ui.AdvInterface(self.server.bot),
+                    delete_after=120,
+                )  # Notify users in channel that adv sent
+            except utils.RequestShedError:
+                logger.debug(f"Reminder of {self.channel.id} shed")
 
     async def change_owner(self, new_owner):
-        self.owner = new_owner
-        await self.channel.set_permissions(
-            target=self.creator, overwrite=None
+        old_owner, self.owner = self.owner, new_owner
+        self.server.update_owner_index(self, old_owner)
+        rest = self.server.bot.rest
+        await rest.call(
+            utils.Priority.INTERACTIVE,
+            self.channel.set_permissions,
+            target=self.creator,
+            overwrite=None,
         )  # Reset temp voice old owner permissions
-        await self.channel.set_permissions(
+        await rest.call(
+            utils.Priority.INTERACTIVE,
+            self.channel.set_permissions,
             target=self.owner,
             overwrite=discord.PermissionOverwrite(
                 move_members=True,  # deafen_members=True,
             ),
         )  # Get temp voice new owner permissions
-        await TempChannels.filter(dis_id=self.channel.id).update(
-            dis_owner_id=new_owner.id
+        self.server.bot.writes.update(
+            self.channel.id, dis_owner_id=new_owner.id
         )
 
     async def get_access(self, member):
-        await self.channel.set_permissions(
+        await self.server.bot.rest.call(
+            utils.Priority.INTERACTIVE,
+            self.channel.set_permissions,
             target=member,
             overwrite=discord.PermissionOverwrite(
                 view_channel=True,
@@ -169,42 +241,73 @@ class TempVoice(utils.TempVoiceABC):
             and member.voice.channel
             and member.voice.channel == self.channel
         ):
-            await member.move_to(channel=None, reason="Kicked by channel owner")
+            await self.server.bot.rest.call(
+                utils.Priority.INTERACTIVE,
+                member.move_to,
+                channel=None,
+                reason="Kicked by channel owner",
+            )
 
-    async def take_access(self, member):
+    async def take_access(self, *members):
         """
-        Set block overwrites for user
-        :param member:
+        Set block overwrites for users, one overwrite request per user, so
+        overwrites changed meanwhile by others are not reverted
+        :param members:
         :return:
         """
-        await self.channel.set_permissions(
-            target=member,
-            overwrite=discord.PermissionOverwrite(
-                view_channel=False,
-                read_messages=False,
-                connect=False,
-                send_messages=False,
-            ),
+        await asyncio.gather(
+            *(
+                self.server.bot.rest.call(
+                    utils.Priority.INTERACTIVE,
+                    self.channel.set_permissions,
+                    target=member,
+                    overwrite=discord.PermissionOverwrite(
+                        view_channel=False,
+                        read_messages=False,
+                        connect=False,
+                        send_messages=False,
+                    ),
+                )
+                for member in members
+            )
+        )
+        for member in members:
+            await self.kick(member)
+
+    async def ban(self, *members):
+        # One upsert for all members, re-ban reuses the unbanned row
+        await TCBans.bulk_create(
+            [
+                TCBans(
+                    server_id=self.server.id,
+                    dis_creator_id=self.creator.id,
+                    dis_banned_id=member.id,
+                )
+                for member in members
+            ],
+            on_conflict=["server_id", "dis_creator_id", "dis_banned_id"],
+            update_fields=["banned", "updated_at"],
         )
-        await self.kick(member)
+        for member in members:
+            self.server.bot.bans.add(self.server.id, self.creator.id, member.id)
+        await self.take_access(*members)
 
-    async def ban(self, member):
-        await TCBans.update_or_create(
+    async def unban(self, member_id):
+        if await TCBans.filter(
             server_id=self.server.id,
             dis_creator_id=self.creator.id,
-            dis_banned_id=member.id,
+            dis_banned_id=member_id,
             banned=True,
-        )
-        await self.take_access(member)
-
-    async def unban(self, ban_id):
-        ban = await TCBans.get_or_none(id=ban_id)
-        if ban and ban.banned:
-            ban.banned = False
-            await ban.save()
-            if member := self.channel.guild.get_member(ban.dis_banned_id):
-                await self.channel.set_permissions(
-                    target=member, overwrite=None
+        ).update(banned=False):
+            self.server.bot.bans.discard(
+                self.server.id, self.creator.id, member_id
+            )
+            if member := self.channel.guild.get_member(member_id):
+                await self.server.bot.rest.call(
+                    utils.Priority.INTERACTIVE,
+                    self.channel.set_permissions,
+                    target=member,
+                    overwrite=None,
                 )  # Drop overwrite on this user
                 return member.id
             else:
@@ -240,22 +343,32 @@ class TempVoice(utils.TempVoiceABC):
                 raise ValueError("Invalid mode")
 
         self.privacy = mode
-        await self.channel.set_permissions(
-            target=self.channel.guild.default_role, overwrite=overwrite
+        await self.server.bot.rest.call(
+            utils.Priority.INTERACTIVE,
+            self.channel.set_permissions,
+            target=self.channel.guild.default_role,
+            overwrite=overwrite,
         )
 
     async def send_interface(self):
-        await self.channel.send(
+        await self.server.bot.rest.call(
+            utils.Priority.INTERACTIVE,
+            self.channel.send,
             embed=ui.ChannelControlEmbed(),
             content=self.owner.mention,
             view=ui.ControlInterface(self.server.bot),
         )
 
     async def delete(self):
+        self.set_reminder(None)
+        self.server.bot.deadlines.cancel(("adv", self.channel.id))
+        self.server.bot.deadlines.cancel(("adv_update", self.channel.id))
         with suppress(discord.NotFound):
-            await self.channel.delete(
-                reason="Temp channel is empty or deleted by owner."
+            await self.server.bot.rest.call(
+                utils.Priority.CRITICAL,
+                self.channel.delete,
+                reason="Temp channel is empty or deleted by owner.",
             )
             await self.adv.delete()
 
-            await TempChannels.filter(dis_id=self.channel.id).delete()
+            self.server.bot.writes.delete(self.channel.id)
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
+import json
 from contextlib import suppress
 from datetime import datetime, timedelta
 
 import discord
+from loguru import logger
 
 from config import CFG
 from src import utils
-from src.models import TempChannels
 from src.services import errors
 
 from .base import BaseView
@@ -22,6 +23,12 @@ class Adv:
         "_message",
         "text",
         "delete_after",
+        "edits_saved",
+        "renders",
+        "render_skips",
+        "_priority",
+        "_rendered_state",
+        "_fingerprint",
     )
 
     def __init__(
@@ -33,6 +40,13 @@ class Adv:
         self.text = ""
         self.delete_after: datetime | None = None
 
+        self.edits_saved = 0  # Updates coalesced into a pending edit
+        self._priority = utils.Priority.BACKGROUND  # Of the pending edit
+        self.renders = 0
+        self.render_skips = 0  # Renders without visible changes, not sent
+        self._rendered_state: tuple[bool, bool] | None = None
+        self._fingerprint: int | None = None  # Of the last sent content
+
     def __repr__(self) -> str:
         return (
             f"<{self.__class__.__name__} "
@@ -44,20 +58,85 @@ class Adv:
     def __bool__(self):
         return self._message is not None
 
-    async def send(self, text: str) -> int:
+    @property
+    def skip_rate(self) -> float:
+        return self.render_skips / self.renders if self.renders else 0.0
+
+    async def send(
+        self, text: str, priority: utils.Priority | None = None
+    ) -> int:
+        self._cancel_pending()
         self.text = text
         self._set_delete_after()
-        self._message = await self._send_or_edit_message()
-        await TempChannels.filter(dis_id=self.temp_voice.channel.id).update(
-            dis_adv_msg_id=self._message.id
+        self._message = await self._send_or_edit_message(
+            priority or utils.Priority.INTERACTIVE
+        )
+        self.temp_voice.server.bot.writes.update(
+            self.temp_voice.channel.id, dis_adv_msg_id=self._message.id
         )
         return self._message.id
 
-    async def update(self, text: str = "") -> None:
+    async def update(
+        self,
+        text: str = "",
+        priority: utils.Priority | None = None,
+    ) -> None:
+        """
+        Edit adv message with the latest channel state.
+
+        Background updates are coalesced within the debounce window, only
+        the last state is rendered. Updates with explicit priority and
+        fill or empty transitions of the channel are flushed immediately.
+        """
         if text:
             self.text = text
+
+        deadlines = self.temp_voice.server.bot.deadlines
+        deadline_key = ("adv_update", self.temp_voice.channel.id)
+        if priority is None and self._fill_state() == self._rendered_state:
+            if deadline_key in deadlines:
+                self._edit_saved()
+            else:
+                deadlines.arm(
+                    deadline_key,
+                    datetime.now()
+                    + timedelta(seconds=CFG["adv"]["update_debounce"]),
+                    self._flush,
+                )
+            return
+
+        if deadline_key in deadlines:  # Pending edit is replaced by this one
+            self._edit_saved()
+        self._cancel_pending()
+        self._priority = priority or utils.Priority.BACKGROUND
+        await self._flush()
+
+    async def _flush(self) -> None:
+        priority, self._priority = self._priority, utils.Priority.BACKGROUND
         self._set_delete_after()
-        await self._send_or_edit_message()
+        try:
+            await self._send_or_edit_message(priority)
+        except utils.RequestShedError:
+            logger.debug(f"Adv update of {self.temp_voice.channel.id} shed")
+
+    def _edit_saved(self) -> None:
+        self.edits_saved += 1
+        self.temp_voice.server.bot.aggregator.incr(
+            "adv_edit_saved",
+            1,
+            tags={"server": self.temp_voice.server.guild.id},
+        )
+
+    def _cancel_pending(self) -> None:
+        self.temp_voice.server.bot.deadlines.cancel(
+            ("adv_update", self.temp_voice.channel.id)
+        )
+
+    def _fill_state(self) -> tuple[bool, bool]:
+        """:return: whether the channel is full and whether it is empty"""
+        members = len(self.temp_voice.channel.members)
+        user_limit = self.temp_voice.channel.user_limit
+        return bool(user_limit) and members >= user_limit, not members
 
     def _set_delete_after(self) -> None:
         if not self.temp_voice.channel.user_limit:
@@ -74,16 +153,48 @@ class Adv:
         else:
             self.delete_after = None
 
-    async def _send_or_edit_message(self) -> discord.Message:
+        deadline_key = ("adv", self.temp_voice.channel.id)
+        if self.delete_after:
+            self.temp_voice.server.bot.deadlines.arm(
+                deadline_key, self.delete_after, self.delete
+            )
+        else:
+            self.temp_voice.server.bot.deadlines.cancel(deadline_key)
+
+    async def _send_or_edit_message(
+        self, priority: utils.Priority
+    ) -> discord.Message:
+        rest = self.temp_voice.server.bot.rest
+        self._rendered_state = self._fill_state()
         embed = AdvEmbed(temp_voice=self.temp_voice, text=self.text)
+        disabled = (
+            len(self.temp_voice.channel.members)
+            >= self.temp_voice.channel.user_limit
+        )
+
+        self.renders += 1
+        fingerprint = self._content_fingerprint(embed, disabled)
+        if self._message and fingerprint == self._fingerprint:
+            self.render_skips += 1
+            self.temp_voice.server.bot.aggregator.incr(
+                "adv_render_skip",
+                1,
+                tags={"server": self.temp_voice.server.guild.id},
+            )
+            return self._message
+
         view = JoinInterface(
-            invite_url=await self.temp_voice.invite_url(),
-            disabled=len(self.temp_voice.channel.members)
-            >= self.temp_voice.channel.user_limit,
+            invite_url=await self.temp_voice.invite_url(), disabled=disabled
         )
         if self._message:
             try:
-                await self._message.edit(embed=embed, view=view)
+                await rest.call(
+                    priority, self._message.edit, embed=embed, view=view
+                )
+                self._fingerprint = fingerprint
+                self.temp_voice.server.bot.metrics.counter(
+                    "adv_edits_total", "Adv messages edited"
+                ).inc()
             except discord.NotFound:
                 await self.temp_voice.adv.delete()
             except discord.HTTPException as e:
@@ -94,32 +205,50 @@ class Adv:
                 else:
                     raise e
         else:
-            self._message = await self.temp_voice.server.adv_channel.send(
-                embed=embed, view=view
+            self._message = await rest.call(
+                priority,
+                self.temp_voice.server.adv_channel.send,
+                embed=embed,
+                view=view,
             )
+            self._fingerprint = fingerprint
         return self._message
 
+    @staticmethod
+    def _content_fingerprint(embed: discord.Embed, disabled: bool) -> int:
+        content = embed.to_dict()
+        content.pop("timestamp", None)  # Changes on every render
+        return hash((json.dumps(content, sort_keys=True), disabled))
+
     async def delete(self) -> bool:
         if not self:
             return False
 
+        rest = self.temp_voice.server.bot.rest
         try:
-            await self._message.delete()
+            await rest.call(utils.Priority.INTERACTIVE, self._message.delete)
         except discord.NotFound:
             pass
         except discord.DiscordServerError as e:
             if e.code == 0:
                 with suppress(discord.NotFound):
-                    msg = await self._message.fetch()
-                    await msg.delete()
+                    msg = await rest.call(
+                        utils.Priority.INTERACTIVE, self._message.fetch
+                    )
+                    await rest.call(utils.Priority.INTERACTIVE, msg.delete)
             else:
                 raise e
 
-        await TempChannels.filter(dis_id=self.temp_voice.channel.id).update(
-            dis_adv_msg_id=None
+        self.temp_voice.server.bot.writes.update(
+            self.temp_voice.channel.id, dis_adv_msg_id=None
         )
 
         self._message, self.delete_after = None, None
+        self._rendered_state, self._fingerprint = None, None
+        self.temp_voice.server.bot.deadlines.cancel(
+            ("adv", self.temp_voice.channel.id)
+        )
+        self._cancel_pending()
         return True
 
 
@@ -145,7 +274,7 @@ class AdvControlInterface(BaseView):
         emoji="🗑️", custom_id="adv:delete", style=discord.ButtonStyle.red
     )
     async def adv_delete(self, interaction: discord.Interaction, *_):
-        self.temp_voice.reminder = False  # Disable reminder
+        self.temp_voice.set_reminder(False)  # Disable reminder
         await self.temp_voice.adv.delete()
         await interaction.response.edit_message(
             view=None, embed=SuccessEmbed("Объявление было удалено.")
@@ -32,6 +32,15 @@ class BaseView(discord.ui.View):
 
         return True
 
+    async def _scheduled_task(self, item: discord.ui.Item, interaction):
+        # Check and callback of the item, as one stage and transaction
+        name = f"{self.__class__.__name__} {item.custom_id}"
+        with (
+            self.bot.stages.stage(name, interaction.guild_id),
+            utils.transaction("ui.view", name),
+        ):
+            await super()._scheduled_task(item, interaction)
+
     async def on_error(
         self,
         interaction: discord.Interaction,
@@ -65,6 +74,14 @@ class BaseView(discord.ui.View):
 
 
 class BaseModal(discord.ui.Modal):
+    async def _scheduled_task(self, interaction: Interaction, components):
+        name = self.__class__.__name__
+        with (
+            interaction.client.stages.stage(name, interaction.guild_id),
+            utils.transaction("ui.modal", name),
+        ):
+            await super()._scheduled_task(interaction, components)
+
     async def on_error(self, interaction: Interaction, error: Exception, /):
         error = getattr(error, "original", error)
 
@@ -3,7 +3,6 @@ from __future__ import annotations
 import discord
 
 from src import utils
-from src.models import TCBans
 from src.services import errors
 
 from .adv import AdvInterface
@@ -183,14 +182,12 @@ class ControlInterface(AdvInterface):
         if not server:
             raise errors.BotNotConfiguredError
 
-        if ban_list_raw := await TCBans.filter(
-            server_id=server.id,
-            dis_creator_id=interaction.user.id,
-            banned=True,
+        if banned_ids := await self.bot.bans.get(
+            server.id, interaction.user.id
         ):
             await interaction.response.send_message(
                 ephemeral=True,
-                view=UnbanInterface(self.bot, interaction.guild, ban_list_raw),
+                view=UnbanInterface(self.bot, interaction.guild, banned_ids),
                 embed=InterfaceEmbed(
                     title="Разбанить пользователя",
                     text="Выбранный пользователь будет убран с вашего "
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import discord
-from sentry_sdk import metrics
 
 from src import utils
 from src.services import errors
@@ -36,7 +35,9 @@ class AdvModal(BaseModal):
 
     async def on_submit(self, interaction: discord.Interaction):
         if self.temp_voice.adv:
-            await self.temp_voice.adv.update(self.text_inp.value)
+            await self.temp_voice.adv.update(
+                self.text_inp.value, utils.Priority.INTERACTIVE
+            )
             await interaction.response.edit_message(
                 view=None,
                 embed=SuccessEmbed("Объявление было отредактировано."),
@@ -55,7 +56,7 @@ class AdvModal(BaseModal):
                 ),
             )
 
-            metrics.incr(
+            self.temp_voice.server.bot.aggregator.incr(
                 "adv_manual_send",
                 1,
                 tags={"server": self.temp_voice.server.id},
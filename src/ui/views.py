@@ -1,12 +1,12 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
+
 import discord
 from discord import Interaction
 from discord.ui import View
-from sentry_sdk import metrics
 
 from src import utils
-from src.models import TCBans
 from src.services import errors
 
 from .base import BaseView
@@ -51,7 +51,7 @@ class KickInterface(BaseView):
             ),
         )
 
-        metrics.incr(
+        self.bot.aggregator.incr(
             "temp_channel_user_kick",
             1,
             tags={"server": interaction.guild_id},
@@ -94,7 +94,7 @@ class TransferOwnerInterface(BaseView):
             ),
         )
 
-        metrics.incr(
+        self.bot.aggregator.incr(
             "temp_channel_change_owner",
             1,
             tags={"server": interaction.guild_id},
@@ -109,6 +109,7 @@ class BanInterface(BaseView):
 
     @discord.ui.select(
         cls=discord.ui.UserSelect,
+        max_values=10,
         custom_id="ban:select",
         placeholder="Кого баним?",
     )
@@ -117,20 +118,20 @@ class BanInterface(BaseView):
     ):
         await super().interaction_check(interaction)
 
-        await self.temp_voice.ban(select.values[0])
+        await self.temp_voice.ban(*select.values)
 
         await interaction.response.edit_message(
             embed=SuccessEmbed(
-                f"{select.values[0].mention} теперь не сможет "
-                f"подключиться к текущему и к "
-                f"будущем голосовым каналам, созданными вами."
+                ", ".join(member.mention for member in select.values)
+                + " теперь не смогут подключиться к текущему и к "
+                "будущем голосовым каналам, созданными вами."
             ),
             view=None,
         )
 
-        metrics.incr(
+        self.bot.aggregator.incr(
             "temp_channel_user_ban",
-            1,
+            len(select.values),
             tags={"server": interaction.guild_id},
         )
 
@@ -142,22 +143,23 @@ class UnbanInterface(BaseView):
         self,
         bot: utils.BotABC,
         guild: discord.Guild,
-        ban_list_raw: list[TCBans],
+        banned_ids: Iterable[int],
     ):
         super().__init__(bot)
 
         self.select_user = discord.ui.Select(
             custom_id="unban:select", placeholder="Кому даруем помилование?"
         )
-        for ban in ban_list_raw:
-            user = guild.get_member(ban.dis_banned_id)
+        for banned_id in banned_ids:
+            user = guild.get_member(banned_id)
             if user:
                 self.select_user.add_option(
-                    label=f"{user.display_name} (ID: {user.id})", value=ban.id
+                    label=f"{user.display_name} (ID: {user.id})",
+                    value=str(banned_id),
                 )
             else:
                 self.select_user.add_option(
-                    label=f"ID: {ban.dis_banned_id}", value=ban.id
+                    label=f"ID: {banned_id}", value=str(banned_id)
                 )
 
         self.add_item(self.select_user)
@@ -168,7 +170,9 @@ class UnbanInterface(BaseView):
         unbanned = await self.temp_voice.unban(int(self.select_user.values[0]))
         if unbanned == 1:
             await interaction.response.edit_message(
-                embed=SuccessEmbed(f"Бан #{self.select_user.values[0]} снят."),
+                embed=SuccessEmbed(
+                    f"Бан ID: {self.select_user.values[0]} снят."
+                ),
                 view=None,
             )
         elif unbanned:
@@ -182,7 +186,7 @@ class UnbanInterface(BaseView):
                 "повторяется - обратитесь в тех.поддержку бота."
             )
 
-        metrics.incr(
+        self.bot.aggregator.incr(
             "temp_channel_user_unban",
             1,
             tags={"server": interaction.guild_id},
@@ -206,10 +210,8 @@ class TakeAccessInterface(BaseView):
     ):
         await super().interaction_check(interaction)
 
-        mentions = []
-        for selected_member in select.values:
-            await self.temp_voice.take_access(selected_member)
-            mentions.append(selected_member.mention)
+        await self.temp_voice.take_access(*select.values)
+        mentions = [member.mention for member in select.values]
 
         await interaction.response.edit_message(
             embed=SuccessEmbed(
@@ -224,7 +226,7 @@ class TakeAccessInterface(BaseView):
             view=None,
         )
 
-        metrics.incr(
+        self.bot.aggregator.incr(
             "temp_channel_user_restrict_access",
             1,
             tags={"server": interaction.guild_id},
@@ -262,7 +264,7 @@ class GetAccessInterface(BaseView):
             view=None,
         )
 
-        metrics.incr(
+        self.bot.aggregator.incr(
             "temp_channel_user_get_access",
             1,
             tags={"server": interaction.guild_id},
@@ -320,7 +322,7 @@ class PrivacyInterface(BaseView):
             view=None,
         )
 
-        metrics.incr(
+        self.bot.aggregator.incr(
             "temp_channel_privacy_changed",
             1,
             tags={"server": interaction.guild_id},
@@ -1,2 +1,19 @@
 from .abc import BotABC, ServerABC, TempVoiceABC
-from .enums import Privacy
+from .aggregator import (
+    FileMetrics,
+    MetricAggregator,
+    RegistryMetrics,
+    SentryMetrics,
+)
+from .ban_cache import BanCache
+from .deadlines import DeadlineScheduler
+from .dispatcher import RequestShedError, RestDispatcher
+from .enums import Priority, Privacy
+from .health import HealthChecks, LoopLagSampler
+from .journal import EventJournal, read_journal
+from .logs import InterceptHandler, JsonLogSink
+from .metrics import MetricsRegistry, MetricsServer, instrument_tortoise
+from .profiler import SamplingProfiler
+from .stages import SlowStages
+from .tracing import AdaptiveSampler, sentry_threads_cpu, span, transaction
+from .write_behind import TempChannelsWriteBehind
@@ -11,7 +11,14 @@ from config import CFG
 from src import ui
 from src.models import CreatorChannels
 
+from .aggregator import MetricAggregator
+from .ban_cache import BanCache
+from .deadlines import DeadlineScheduler
+from .dispatcher import RestDispatcher
 from .enums import Privacy
+from .metrics import MetricsRegistry
+from .stages import SlowStages
+from .write_behind import TempChannelsWriteBehind
 
 
 class TempVoiceABC(abc.ABC):
@@ -53,7 +60,14 @@ class TempVoiceABC(abc.ABC):
         member: discord.Member,
         name_formatter: Callable[[str], str],
         server: "ServerABC",
-    ) -> Self: ...
+        warm_channel: discord.VoiceChannel | None = None,
+    ) -> Self:
+        """
+        Create temp voice and move member into it
+        :param warm_channel: idle channel from warm pool to use instead of
+        creating a new one
+        """
+        ...
 
     @abc.abstractmethod
     async def invite_url(self) -> str: ...
@@ -61,6 +75,17 @@ class TempVoiceABC(abc.ABC):
     @abc.abstractmethod
     def updated(self): ...
 
+    @abc.abstractmethod
+    def set_reminder(
+        self, when: datetime.datetime | Literal[False] | None
+    ) -> None:
+        """
+        Set (or disable with False) reminder and arm it in bot deadlines
+        :param when:
+        :return:
+        """
+        ...
+
     @abc.abstractmethod
     async def send_reminder(self, adv_channel: discord.TextChannel): ...
 
@@ -80,13 +105,27 @@ class TempVoiceABC(abc.ABC):
     async def kick(self, member: discord.Member) -> None: ...
 
     @abc.abstractmethod
-    async def take_access(self, member: discord.Member) -> None: ...
+    async def take_access(self, *members: discord.Member) -> None: ...
 
     @abc.abstractmethod
-    async def ban(self, member: discord.Member) -> None: ...
+    async def ban(self, *members: discord.Member) -> None:
+        """
+        Add members to ban list of the channel creator (one DB upsert)
+        and take their access to this channel
+        :param members:
+        :return:
+        """
+        ...
 
     @abc.abstractmethod
-    async def unban(self, ban_id: int) -> int: ...
+    async def unban(self, member_id: int) -> int:
+        """
+        Remove member from ban list of the channel creator
+        :param member_id: discord id of the banned member
+        :return: member id, or 1 if member left the guild
+        :raise UserNotBannedError:
+        """
+        ...
 
     @abc.abstractmethod
     async def change_privacy(self, mode: Privacy) -> None: ...
@@ -113,6 +152,10 @@ class ServerABC(abc.ABC):
             MappingProxyType({})
         )
         self._temp_channels: dict[int, TempVoiceABC] = {}
+        # Member id -> {channel id: temp voice} indexes of owners and creators
+        self._owners: dict[int, dict[int, TempVoiceABC]] = {}
+        self._creators: dict[int, dict[int, TempVoiceABC]] = {}
+        self._pools: dict = {}  # Creator channel id -> warm channel pool
 
         # Random iterator for temp voice random squad name
         self._random_names = tuple(
@@ -120,7 +163,8 @@ class ServerABC(abc.ABC):
         )
         self._random_names_index = 0
 
-        self._last_data_update = datetime.datetime.fromtimestamp(0.0)
+        # Settings are loaded once and reloaded only after invalidation
+        self._settings_dirty = False
 
     def __repr__(self) -> str:
         return (
@@ -144,7 +188,14 @@ class ServerABC(abc.ABC):
     async def _update_settings(self, guild_id: int) -> None: ...
 
     @abc.abstractmethod
-    async def update_settings(self) -> None: ...
+    async def update_settings(self) -> None:
+        """Reload settings from DB if they were invalidated"""
+        ...
+
+    @abc.abstractmethod
+    def invalidate_settings(self) -> None:
+        """Mark settings as changed, next update_settings reloads them"""
+        ...
 
     @abc.abstractmethod
     def _get_random_squad_name(self) -> str: ...
@@ -174,6 +225,21 @@ class ServerABC(abc.ABC):
         member_id: discord.Member,
     ) -> TempVoiceABC | Literal[False]: ...
 
+    @abc.abstractmethod
+    def update_owner_index(
+        self, temp_voice: TempVoiceABC, old_owner: discord.Member | None
+    ) -> None: ...
+
+    @abc.abstractmethod
+    def discard_warm_channel(
+        self, creator_channel: CreatorChannels, channel: discord.VoiceChannel
+    ) -> None:
+        """Delete warm channel which failed to be claimed"""
+        ...
+
+    @abc.abstractmethod
+    def pools_stats(self) -> dict[int, dict[str, int]]: ...
+
     @abc.abstractmethod
     def get_creator_channels_ids(self) -> list[int]: ...
 
@@ -189,13 +255,20 @@ class ServerABC(abc.ABC):
         channel: discord.VoiceChannel,
         owner_id: int,
         creator_id: int,
-        adv_msg_id: int | None = None,
+        adv_msg: discord.Message | None = None,
     ) -> TempVoiceABC: ...
 
 
 # Use commands.AutoShardedBot if you have more than 1k guilds
 class BotABC(abc.ABC, commands.Bot):
     servers: ClassVar[dict[int, ServerABC]] = {}
+    deadlines: ClassVar[DeadlineScheduler] = DeadlineScheduler()
+    rest: ClassVar[RestDispatcher] = RestDispatcher()
+    bans: ClassVar[BanCache] = BanCache()
+    writes: ClassVar[TempChannelsWriteBehind] = TempChannelsWriteBehind()
+    metrics: ClassVar[MetricsRegistry] = MetricsRegistry()
+    aggregator: ClassVar[MetricAggregator] = MetricAggregator()
+    stages: ClassVar[SlowStages] = SlowStages()
 
     @abc.abstractmethod
     async def server(self, guild_id: int) -> ServerABC | None: ...
@@ -0,0 +1,247 @@
+import abc
+import asyncio
+import json
+import os
+import time
+from collections.abc import Iterable
+from contextlib import suppress
+
+from loguru import logger
+from sentry_sdk import metrics as sentry_metrics
+
+from .metrics import MetricsRegistry
+
+# Value a tag gets once max_tag_values other values of it are seen
+OTHER = "other"
+
+Tags = tuple[tuple[str, str], ...]
+
+
+class MetricAggregator:
+    """
+    Counters and distributions accumulated in memory per tag set and
+    flushed to the backends every flush_interval.
+
+    Recording is a dict update, backends (Sentry, the local registry, a
+    file) get one value per counter and tag set per interval. Each tag of
+    a metric takes at most max_tag_values distinct values (the first
+    seen), further ones are counted as "other", so guild tags keep the
+    number of series bounded. Without backends nothing is recorded.
+    """
+
+    __slots__ = (
+        "backends",
+        "flush_interval",
+        "max_tag_values",
+        "flushes",
+        "_counters",
+        "_distributions",
+        "_tag_values",
+        "_series",
+        "_worker",
+    )
+
+    def __init__(
+        self,
+        backends: Iterable["MetricsBackend"] = (),
+        flush_interval: float = 10.0,
+        max_tag_values: int = 100,
+    ):
+        self.backends = list(backends)
+        self.flush_interval = flush_interval
+        self.max_tag_values = max_tag_values
+        self.flushes = 0
+
+        self._counters: dict[tuple[str, Tags], float] = {}
+        self._distributions: dict[tuple[str, Tags], list[float]] = {}
+        self._tag_values: dict[tuple[str, str], set[str]] = {}
+        # Series of key and tags as passed, for tag values within the cap
+        self._series: dict[tuple, tuple[str, Tags]] = {}
+        self._worker: asyncio.Task | None = None
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} "
+            f"backends={[type(backend).__name__ for backend in self.backends]} "
+            f"pending={len(self)}"
+            f">"
+        )
+
+    def __len__(self) -> int:
+        return len(self._counters) + len(self._distributions)
+
+    def incr(
+        self, key: str, value: float = 1, tags: dict | None = None
+    ) -> None:
+        if not self.backends:
+            return
+        series = self._series_of(key, tags)
+        self._counters[series] = self._counters.get(series, 0) + value
+        if self._worker is None:
+            self._wake()
+
+    def distribution(
+        self, key: str, value: float, tags: dict | None = None
+    ) -> None:
+        if not self.backends:
+            return
+        series = self._series_of(key, tags)
+        if (values := self._distributions.get(series)) is None:
+            values = self._distributions[series] = []
+        values.append(value)
+        if self._worker is None:
+            self._wake()
+
+    async def flush(self) -> None:
+        counters, self._counters = self._counters, {}
+        distributions, self._distributions = self._distributions, {}
+        if not counters and not distributions:
+            return
+
+        for backend in self.backends:
+            try:
+                await backend.flush(counters, distributions)
+            except Exception as e:
+                logger.exception(f"Metrics flush to {backend} failed: {e}")
+        self.flushes += 1
+
+    async def close(self) -> None:
+        """Stop the worker and flush everything pending"""
+        if self._worker:
+            self._worker.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._worker
+            self._worker = None
+        await self.flush()
+
+    def _series_of(self, key: str, tags: dict | None) -> tuple[str, Tags]:
+        if not tags:
+            return key, ()
+        passed = (key, *tags.items())
+        if (series := self._series.get(passed)) is not None:
+            return series
+
+        capped, other = [], False
+        for tag, value in sorted(tags.items()):
+            value = str(value)
+            seen = self._tag_values.setdefault((key, tag), set())
+            if value not in seen:
+                if len(seen) >= self.max_tag_values:
+                    value, other = OTHER, True
+                else:
+                    seen.add(value)
+            capped.append((tag, value))
+        series = key, tuple(capped)
+        if not other:  # Bounded by the cap
+            self._series[passed] = series
+        return series
+
+    def _wake(self) -> None:
+        self._worker = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        try:
+            while len(self):
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+        finally:
+            self._worker = None
+
+
+class MetricsBackend(abc.ABC):
+    __slots__ = ()
+
+    @abc.abstractmethod
+    async def flush(
+        self,
+        counters: dict[tuple[str, Tags], float],
+        distributions: dict[tuple[str, Tags], list[float]],
+    ) -> None: ...
+
+
+class SentryMetrics(MetricsBackend):
+    """Sentry metrics, one incr per counter and tag set"""
+
+    __slots__ = ()
+
+    async def flush(self, counters, distributions) -> None:
+        for (key, tags), value in counters.items():
+            sentry_metrics.incr(key, value, tags=dict(tags))
+        for (key, tags), values in distributions.items():
+            for value in values:
+                sentry_metrics.distribution(key, value, tags=dict(tags))
+
+
+class RegistryMetrics(MetricsBackend):
+    """
+    Local registry served on /metrics: counters as <key>_total, and
+    distributions as histograms, tags are labels. A series whose tag names
+    differ from the ones its metric is registered with is dropped.
+    """
+
+    __slots__ = ("registry",)
+
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+
+    async def flush(self, counters, distributions) -> None:
+        for (key, tags), value in counters.items():
+            if counter := self._metric(
+                self.registry.counter, f"{key}_total", key, tags
+            ):
+                counter.inc(value, **dict(tags))
+        for (key, tags), values in distributions.items():
+            if histogram := self._metric(
+                self.registry.histogram, key, key, tags
+            ):
+                for value in values:
+                    histogram.observe(value, **dict(tags))
+
+    @staticmethod
+    def _metric(register, name: str, key: str, tags: Tags):
+        try:
+            return register(name, key, [tag for tag, _ in tags])
+        except ValueError as e:
+            logger.warning(f"Metrics series {key} {dict(tags)} dropped: {e}")
+            return None
+
+
+class FileMetrics(MetricsBackend):
+    """
+    JSON line per flush appended to path: counters as [key, tags, value],
+    distributions as [key, tags, count, sum, min, max].
+    """
+
+    __slots__ = ("path",)
+
+    def __init__(self, path: str):
+        self.path = path
+
+    async def flush(self, counters, distributions) -> None:
+        line = json.dumps(
+            {
+                "time": time.time(),
+                "counters": [
+                    [key, dict(tags), value]
+                    for (key, tags), value in counters.items()
+                ],
+                "distributions": [
+                    [
+                        key,
+                        dict(tags),
+                        len(values),
+                        sum(values),
+                        min(values),
+                        max(values),
+                    ]
+                    for (key, tags), values in distributions.items()
+                ],
+            },
+            separators=(",", ":"),
+        )
+        await asyncio.to_thread(self._append, line)
+
+    def _append(self, line: str) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(line + "\n")
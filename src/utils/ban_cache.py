@@ -0,0 +1,116 @@
+from collections import OrderedDict
+
+from src.models import TCBans
+
+BanKey = tuple[int, int]  # (server id in DB, creator discord id)
+
+
+class BanCache:
+    """
+    LRU cache of active ban lists of temp voice creators.
+
+    A miss loads the whole ban list of the creator with one query, bans
+    and unbans write through the cached list, so the cache never has to
+    be invalidated. Bans and unbans made while a list loads are applied
+    to the loaded one. The least recently used lists are evicted above
+    max_size.
+    """
+
+    __slots__ = (
+        "max_size",
+        "hits",
+        "misses",
+        "evictions",
+        "_bans",
+        "_loading",
+    )
+
+    def __init__(self, max_size: int = 10_000):
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._bans: OrderedDict[BanKey, set[int]] = OrderedDict()
+        # Changes (banned id, is banned) made during each load of a key
+        self._loading: dict[BanKey, list[list[tuple[int, bool]]]] = {}
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} "
+            f"size={len(self)}/{self.max_size} "
+            f"hits={self.hits} "
+            f"misses={self.misses}"
+            f">"
+        )
+
+    def __len__(self) -> int:
+        return len(self._bans)
+
+    async def get(self, server_id: int, creator_id: int) -> frozenset[int]:
+        """:return: discord ids of members banned by the creator"""
+        key = (server_id, creator_id)
+        if key in self._bans:
+            self.hits += 1
+            self._bans.move_to_end(key)
+            return frozenset(self._bans[key])
+
+        self.misses += 1
+        changes = []
+        self._loading.setdefault(key, []).append(changes)
+        try:
+            banned = set(
+                await TCBans.filter(
+                    server_id=server_id, dis_creator_id=creator_id, banned=True
+                ).values_list("dis_banned_id", flat=True)
+            )
+        finally:
+            loads = self._loading[key]
+            loads.remove(changes)
+            if not loads:
+                del self._loading[key]
+
+        for banned_id, is_banned in changes:
+            if is_banned:
+                banned.add(banned_id)
+            else:
+                banned.discard(banned_id)
+        # A concurrent load was cached first and kept up to date since
+        if (cached := self._bans.get(key)) is not None:
+            return frozenset(cached)
+        self._bans[key] = banned
+        self._evict()
+        return frozenset(banned)
+
+    def add(self, server_id: int, creator_id: int, banned_id: int) -> None:
+        self._change((server_id, creator_id), banned_id, True)
+
+    def discard(self, server_id: int, creator_id: int, banned_id: int) -> None:
+        self._change((server_id, creator_id), banned_id, False)
+
+    def resize(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._evict()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _change(self, key: BanKey, banned_id: int, is_banned: bool) -> None:
+        if (banned := self._bans.get(key)) is not None:
+            if is_banned:
+                banned.add(banned_id)
+            else:
+                banned.discard(banned_id)
+        for changes in self._loading.get(key, ()):
+            changes.append((banned_id, is_banned))
+
+    def _evict(self) -> None:
+        while len(self._bans) > self.max_size:
+            self._bans.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,140 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from contextlib import suppress
+from datetime import datetime
+
+from loguru import logger
+
+from .metrics import Histogram
+from .stages import SlowStages
+
+# Rebuild the heap when cancelled entries outnumber live ones by this factor
+_COMPACT_RATIO = 2
+
+
+class DeadlineScheduler:
+    """
+    Fires callbacks at their deadlines using a min-heap on monotonic clock.
+
+    Every key has at most one live deadline, arming an armed key re-arms it.
+    Re-armed and cancelled entries stay in the heap marked as dead and are
+    skipped when popped, so every change costs O(log n).
+    """
+
+    __slots__ = (
+        "lag",
+        "fired",
+        "lag_histogram",
+        "stages",
+        "_heap",
+        "_entries",
+        "_counter",
+        "_wakeup",
+        "_runner",
+        "_tasks",
+    )
+
+    def __init__(self):
+        self.lag = 0.0  # Seconds between the last deadline and its firing
+        self.fired = 0
+        self.lag_histogram: Histogram | None = None  # Set by Scheduler cog
+        self.stages: SlowStages | None = None  # Set by Scheduler cog
+
+        self._heap: list[list] = []
+        self._entries: dict[Hashable, list] = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._runner: asyncio.Task | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} "
+            f"armed={len(self)} "
+            f"running={self.is_running()}"
+            f">"
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def arm(
+        self,
+        key: Hashable,
+        when: datetime,
+        callback: Callable[[], Awaitable],
+    ) -> None:
+        self.cancel(key)
+
+        deadline = time.monotonic() + max(
+            0.0, (when - datetime.now()).total_seconds()
+        )
+        entry = [deadline, next(self._counter), key, callback]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+
+        if self._heap[0] is entry:
+            self._wakeup.set()
+
+    def cancel(self, key: Hashable) -> None:
+        if entry := self._entries.pop(key, None):
+            entry[-1] = None  # Mark as dead, heap drops it lazily
+            if len(self._heap) > _COMPACT_RATIO * (len(self._entries) + 1):
+                self._heap = list(self._entries.values())
+                heapq.heapify(self._heap)
+
+    def is_running(self) -> bool:
+        return self._runner is not None and not self._runner.done()
+
+    def start(self) -> None:
+        if not self.is_running():
+            self._runner = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._runner:
+            self._runner.cancel()
+            self._runner = None
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            while self._heap and self._heap[0][-1] is None:
+                heapq.heappop(self._heap)
+
+            timeout = (
+                self._heap[0][0] - time.monotonic() if self._heap else None
+            )
+            if timeout is None or timeout > 0:
+                with suppress(TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                continue
+
+            deadline, _, key, callback = heapq.heappop(self._heap)
+            del self._entries[key]
+
+            self.lag = time.monotonic() - deadline
+            self.fired += 1
+            if self.lag_histogram:
+                self.lag_histogram.observe(self.lag)
+
+            task = asyncio.create_task(self._fire(key, callback))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fire(
+        self, key: Hashable, callback: Callable[[], Awaitable]
+    ) -> None:
+        try:
+            if self.stages:
+                with self.stages.stage(f"deadline {key}"):
+                    await callback()
+            else:
+                await callback()
+        except Exception as e:
+            logger.exception(f"Deadline {key} callback failed: {e}")
@@ -0,0 +1,174 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+from .enums import Priority
+
+T = TypeVar("T")
+
+
+class RequestShedError(Exception):
+    """Background request dropped because Discord REST is saturated"""
+
+
+class RestDispatcher:
+    """
+    Orders Discord REST calls of the bot by priority class.
+
+    At most max_in_flight calls run at once (critical calls are never held
+    back), waiting calls are started by priority. Background calls take at
+    most background_max_in_flight of the slots, so ones sleeping in
+    discord.py rate-limit waits don't hold back interactive calls.
+    Discord.py keeps its rate-limit buckets private, so saturation of the
+    in-flight slots is the pressure signal: background calls are shed when
+    too many of them wait or when they waited longer than
+    background_max_wait.
+    """
+
+    __slots__ = (
+        "max_in_flight",
+        "background_max_in_flight",
+        "background_limit",
+        "background_max_wait",
+        "_in_flight",
+        "_background_in_flight",
+        "_waiters",
+        "_counter",
+        "_depth",
+        "_calls",
+        "_wait",
+        "_shed",
+    )
+
+    def __init__(
+        self,
+        max_in_flight: int = 10,
+        background_max_in_flight: int = 4,
+        background_limit: int = 50,
+        background_max_wait: float = 30.0,
+    ):
+        self.max_in_flight = max_in_flight
+        self.background_max_in_flight = background_max_in_flight
+        self.background_limit = background_limit
+        self.background_max_wait = background_max_wait
+
+        self._in_flight = 0
+        self._background_in_flight = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+        self._depth = dict.fromkeys(Priority, 0)
+        self._calls = dict.fromkeys(Priority, 0)
+        self._wait = dict.fromkeys(Priority, 0.0)
+        self._shed = dict.fromkeys(Priority, 0)
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} "
+            f"in_flight={self._in_flight}/{self.max_in_flight} "
+            f"background={self._background_in_flight}"
+            f"/{self.background_max_in_flight} "
+            f"waiting={len(self._waiters)}"
+            f">"
+        )
+
+    async def call(
+        self,
+        priority: Priority,
+        func: Callable[..., Awaitable[T]],
+        *args: Any,
+        **kwargs: Any,
+    ) -> T:
+        """
+        Await REST call func(*args, **kwargs) in its priority turn
+        :raise RequestShedError: if background call was shed
+        """
+        await self._acquire(priority)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            self._release(priority)
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        return {
+            priority.name.lower(): {
+                "depth": self._depth[priority],
+                "calls": self._calls[priority],
+                "avg_wait": self._wait[priority] / self._calls[priority]
+                if self._calls[priority]
+                else 0.0,
+                "shed": self._shed[priority],
+            }
+            for priority in Priority
+        }
+
+    async def _acquire(self, priority: Priority) -> None:
+        if priority == Priority.CRITICAL or (
+            self._has_slot(priority)
+            # Nobody of this or higher priority waits
+            and (not self._waiters or priority < self._waiters[0][0])
+        ):
+            self._start(priority)
+            self._calls[priority] += 1
+            return
+
+        if (
+            priority == Priority.BACKGROUND
+            and self._depth[priority] >= self.background_limit
+        ):
+            self._shed[priority] += 1
+            raise RequestShedError
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        self._depth[priority] += 1
+        started_at = time.monotonic()
+        try:
+            await asyncio.wait_for(
+                future,
+                self.background_max_wait
+                if priority == Priority.BACKGROUND
+                else None,
+            )
+        except TimeoutError:
+            if future.done() and not future.cancelled():
+                # Slot was handed over right at the timeout
+                self._release(priority)
+            self._shed[priority] += 1
+            raise RequestShedError from None
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(priority)
+            raise
+        finally:
+            self._depth[priority] -= 1
+            self._wait[priority] += time.monotonic() - started_at
+        self._calls[priority] += 1
+
+    def _has_slot(self, priority: Priority) -> bool:
+        return self._in_flight < self.max_in_flight and (
+            priority != Priority.BACKGROUND
+            or self._background_in_flight < self.background_max_in_flight
+        )
+
+    def _start(self, priority: Priority) -> None:
+        self._in_flight += 1
+        if priority == Priority.BACKGROUND:
+            self._background_in_flight += 1
+
+    def _release(self, priority: Priority) -> None:
+        self._in_flight -= 1
+        if priority == Priority.BACKGROUND:
+            self._background_in_flight -= 1
+
+        # Waiters are ordered by priority, behind a background one there
+        # are only background ones
+        while self._waiters and self._has_slot(self._waiters[0][0]):
+            waiting, _, future = heapq.heappop(self._waiters)
+            if future.done():  # Shed or cancelled while waiting
+                continue
+            self._start(waiting)
+            future.set_result(None)
@@ -1,7 +1,15 @@
-from enum import Enum
+from enum import Enum, IntEnum
 
 
 class Privacy(Enum):
     PUBLIC = "0"
     PRIVATE = "1"
     HIDDEN = "2"
+
+
+class Priority(IntEnum):
+    """Discord REST request priority class, lower goes first"""
+
+    CRITICAL = 0  # Channel create/delete and member moves
+    INTERACTIVE = 1  # Control panel actions
+    BACKGROUND = 2  # Adv edits, reminders, cleanup (can be shed)
@@ -0,0 +1,130 @@
+import asyncio
+import inspect
+import math
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+
+from aiohttp import web
+from loguru import logger
+
+
+class LoopLagSampler:
+    """
+    Measures event loop lag: how late a sleep of interval seconds wakes up.
+
+    Keeps the samples of the last window seconds for p99(). A lag over
+    warn_after is logged when noticed, a loop blocked by sync code shows up
+    here before Discord interactions (3 seconds to answer) time out.
+    """
+
+    __slots__ = ("interval", "warn_after", "lag", "_samples", "_runner")
+
+    def __init__(self, interval: float, window: float, warn_after: float):
+        self.interval = interval
+        self.warn_after = warn_after
+        self.lag = 0.0  # Seconds, the last sample
+
+        self._samples: deque[float] = deque(
+            maxlen=max(1, round(window / interval))
+        )
+        self._runner: asyncio.Task | None = None
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} "
+            f"interval={self.interval} "
+            f"p99={self.p99():.4f} "
+            f"running={self._runner is not None}"
+            f">"
+        )
+
+    def p99(self) -> float:
+        if not self._samples:
+            return 0.0
+        samples = sorted(self._samples)
+        return samples[math.ceil(len(samples) * 0.99) - 1]
+
+    def start(self) -> None:
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._runner:
+            self._runner.cancel()
+            self._runner = None
+
+    async def _run(self) -> None:
+        while True:
+            started_at = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lag = max(
+                0.0, time.perf_counter() - started_at - self.interval
+            )
+            self._samples.append(self.lag)
+            if self.lag > self.warn_after:
+                logger.warning(f"Event loop was blocked for {self.lag:.3f}s")
+
+
+Check = Callable[[], bool | Awaitable[bool]]
+
+
+class HealthChecks:
+    """
+    GET /healthz and /readyz of an aiohttp app.
+
+    Both run their checks concurrently and answer 200 if all pass or 503,
+    with a JSON object of check results. Liveness checks are part of both,
+    readiness ones of /readyz only. A check failing by exception or
+    by timeout is failed.
+    """
+
+    __slots__ = ("timeout", "_live", "_ready")
+
+    def __init__(self, app: web.Application, timeout: float = 2.0):
+        self.timeout = timeout
+        self._live: dict[str, Check] = {}
+        self._ready: dict[str, Check] = {}
+
+        app.router.add_get("/healthz", self._healthz)
+        app.router.add_get("/readyz", self._readyz)
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} "
+            f"live={list(self._live)} "
+            f"ready={list(self._ready)}"
+            f">"
+        )
+
+    def add(self, name: str, check: Check, ready_only: bool = False) -> None:
+        (self._ready if ready_only else self._live)[name] = check
+
+    async def run(self, ready: bool) -> dict[str, bool]:
+        checks = {**self._live, **self._ready} if ready else self._live
+        results = await asyncio.gather(
+            *(self._run_check(name, check) for name, check in checks.items())
+        )
+        return dict(zip(checks, results))
+
+    async def _run_check(self, name: str, check: Check) -> bool:
+        try:
+            result = check()
+            if inspect.isawaitable(result):
+                result = await asyncio.wait_for(result, self.timeout)
+            return bool(result)
+        except Exception as e:
+            logger.warning(f"Health check {name} failed: {e!r}")
+            return False
+
+    async def _respond(self, ready: bool) -> web.Response:
+        results = await self.run(ready)
+        return web.json_response(
+            results, status=200 if all(results.values()) else 503
+        )
+
+    async def _healthz(self, request: web.Request) -> web.Response:
+        return await self._respond(ready=False)
+
+    async def _readyz(self, request: web.Request) -> web.Response:
+        return await self._respond(ready=True)
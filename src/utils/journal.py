@@ -0,0 +1,222 @@
+import asyncio
+import gzip
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Iterable
+
+VOICE_STATE, CHANNEL_UPDATE, COMPONENT, MODAL_SUBMIT = "v", "u", "i", "m"
+CREATOR, TEMP, OTHER = "c", "t", "o"
+
+JOURNAL_VERSION = 1
+
+
+class EventJournal:
+    """
+    Compact journal of the gateway events the cogs receive, for replays.
+
+    Every line is a JSON array starting with milliseconds since the journal
+    start and the event kind:
+
+        [t, "v", guild, member, before, before kind, after, after kind]
+        [t, "u", guild, channel, kind]
+        [t, "i", guild, channel, kind, member, component, custom_id, values]
+        [t, "m", guild, channel, kind, member, values]
+
+    Channel kind is "c" (creator), "t" (temp) or "o" (other), a channel of
+    a voice state may be None. Discord ids are replaced by numbers in order
+    of their first appearance, valid within one journal only. Typed text is
+    replaced by "x" of the same length, digits (limits, select options) are
+    kept. The first line is a header object.
+
+    Lines are buffered in memory, flush() appends them to the gzip file in
+    a thread, so recording never blocks the event loop on disk. Writes run
+    one at a time, a write of a cancelled flush is finished before the
+    next one or close().
+    """
+
+    __slots__ = (
+        "path",
+        "events",
+        "_ids",
+        "_lines",
+        "_started_at",
+        "_file",
+        "_lock",
+        "_writing",
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        self.events = 0
+
+        self._ids: dict[int, int] = {}
+        self._lines: list[str] = [
+            json.dumps(
+                {
+                    "version": JOURNAL_VERSION,
+                    "started_at": datetime.now(timezone.utc).isoformat(),
+                }
+            )
+        ]
+        self._started_at = time.monotonic()
+        self._file: gzip.GzipFile | None = None
+        self._lock = asyncio.Lock()
+        self._writing: asyncio.Future | None = None
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} "
+            f"path={self.path} "
+            f"events={self.events} "
+            f"ids={len(self._ids)}"
+            f">"
+        )
+
+    def clock(self) -> int:
+        """Milliseconds since the journal start"""
+        return round((time.monotonic() - self._started_at) * 1000)
+
+    def anonymize(self, discord_id: int | None) -> int | None:
+        if discord_id is None:
+            return None
+        return self._ids.setdefault(discord_id, len(self._ids) + 1)
+
+    def voice_state(
+        self,
+        t: int,
+        guild_id: int,
+        member_id: int,
+        before: tuple[int, str] | None,
+        after: tuple[int, str] | None,
+    ) -> None:
+        """before and after are (channel id, kind) or None"""
+        self._append(
+            t,
+            VOICE_STATE,
+            self.anonymize(guild_id),
+            self.anonymize(member_id),
+            *self._channel(before),
+            *self._channel(after),
+        )
+
+    def channel_update(
+        self, t: int, guild_id: int, channel_id: int, kind: str
+    ) -> None:
+        self._append(
+            t,
+            CHANNEL_UPDATE,
+            self.anonymize(guild_id),
+            self.anonymize(channel_id),
+            kind,
+        )
+
+    def component(
+        self,
+        t: int,
+        guild_id: int,
+        channel: tuple[int, str],
+        member_id: int,
+        component_type: int,
+        custom_id: str,
+        values: Iterable[str],
+    ) -> None:
+        self._append(
+            t,
+            COMPONENT,
+            self.anonymize(guild_id),
+            *self._channel(channel),
+            self.anonymize(member_id),
+            component_type,
+            custom_id,
+            [self._value(value) for value in values],
+        )
+
+    def modal_submit(
+        self,
+        t: int,
+        guild_id: int,
+        channel: tuple[int, str],
+        member_id: int,
+        values: Iterable[str],
+    ) -> None:
+        self._append(
+            t,
+            MODAL_SUBMIT,
+            self.anonymize(guild_id),
+            *self._channel(channel),
+            self.anonymize(member_id),
+            [self._value(value) for value in values],
+        )
+
+    async def flush(self) -> None:
+        async with self._lock:
+            await self._written()
+            lines, self._lines = self._lines, []
+            if lines:
+                self._writing = asyncio.ensure_future(
+                    asyncio.to_thread(self._write, lines)
+                )
+                # Cancelling the flush doesn't stop the thread writing
+                await asyncio.shield(self._writing)
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._written()
+            lines, self._lines = self._lines, []
+            await asyncio.to_thread(self._close, lines)
+
+    async def _written(self) -> None:
+        """Wait for the write of a cancelled flush"""
+        if self._writing:
+            await asyncio.wait([self._writing])
+            self._writing = None
+
+    def _channel(self, channel: tuple[int, str] | None) -> tuple:
+        if channel is None:
+            return None, None
+        return self.anonymize(channel[0]), channel[1]
+
+    def _value(self, value: str) -> int | str:
+        if value.isdigit():
+            # Snowflakes (users of selects) are ids, short numbers are data
+            return self.anonymize(int(value)) if len(value) >= 15 else value
+        return "x" * len(value)
+
+    def _append(self, *event) -> None:
+        self._lines.append(json.dumps(event, separators=(",", ":")))
+        self.events += 1
+
+    def _close(self, lines: list[str]) -> None:
+        if lines:
+            self._write(lines)
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _write(self, lines: list[str]) -> None:
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = gzip.open(self.path, "ab")
+        self._file.write(("\n".join(lines) + "\n").encode())
+        # Sync flush keeps the written part readable if the bot crashes
+        self._file.flush()
+
+
+def read_journal(path: str) -> tuple[dict, list[list]]:
+    """:return: header and events ordered by time"""
+    header, events = None, []
+    with gzip.open(path, "rt") as f:
+        try:
+            for line in f:
+                if header is None:
+                    header = json.loads(line)
+                else:
+                    events.append(json.loads(line))
+        except EOFError:
+            pass  # Journal of a crashed bot, the synced part is complete
+    if not header or header.get("version") != JOURNAL_VERSION:
+        raise ValueError(f"{path} is not a journal of version 1")
+    events.sort(key=lambda event: event[0])
+    return header, events
@@ -0,0 +1,180 @@
+import json
+import logging
+import threading
+import traceback
+from collections import deque
+from typing import TextIO
+
+from loguru import logger
+
+# Loguru level names of the stdlib levels, custom levels pass as numbers
+_LEVELS = {
+    logging.DEBUG: "DEBUG",
+    logging.INFO: "INFO",
+    logging.WARNING: "WARNING",
+    logging.ERROR: "ERROR",
+    logging.CRITICAL: "CRITICAL",
+}
+
+# Stdlib record being forwarded by the current thread
+_forwarded = threading.local()
+
+
+def _caller_of_forwarded(record: dict) -> None:
+    if (source := getattr(_forwarded, "record", None)) is not None:
+        record["name"] = source.name
+        record["module"] = source.module
+        record["function"] = source.funcName
+        record["line"] = source.lineno
+
+
+_stdlib_logger = logger.patch(_caller_of_forwarded)
+
+
+class InterceptHandler(logging.Handler):
+    """
+    Forwards stdlib records (discord.py, Tortoise) to loguru.
+
+    Set the same level for the stdlib loggers: records below it are then
+    never created. The caller is the one stdlib has already resolved for
+    the record, no frames are walked here.
+    """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        _forwarded.record = record
+        try:
+            (
+                _stdlib_logger.opt(exception=record.exc_info)
+                if record.exc_info
+                else _stdlib_logger
+            ).log(
+                _LEVELS.get(record.levelno, record.levelno), record.getMessage()
+            )
+        finally:
+            _forwarded.record = None
+
+
+class JsonLogSink:
+    """
+    Loguru sink writing records as JSON lines from a background thread.
+
+    Logging call only appends a tuple of the record fields to a bounded
+    queue, the writer thread serializes and writes them in batches every
+    flush_interval seconds or when batch_size records are pending. When
+    the queue is full new records are dropped and counted, so a stuck
+    stream never blocks the event loop.
+    """
+
+    __slots__ = (
+        "stream",
+        "capacity",
+        "batch_size",
+        "flush_interval",
+        "written",
+        "dropped",
+        "_pending",
+        "_wakeup",
+        "_closed",
+        "_writer",
+    )
+
+    def __init__(
+        self,
+        stream: TextIO,
+        capacity: int = 10000,
+        batch_size: int = 256,
+        flush_interval: float = 0.5,
+    ):
+        self.stream = stream
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+
+        self._pending: deque[tuple] = deque()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._run, name="json-log-sink", daemon=True
+        )
+        self._writer.start()
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} "
+            f"pending={len(self._pending)} "
+            f"written={self.written} "
+            f"dropped={self.dropped}"
+            f">"
+        )
+
+    def __call__(self, message) -> None:
+        if len(self._pending) >= self.capacity:
+            self.dropped += 1
+            return
+
+        record = message.record
+        exception = None
+        if record["exception"]:
+            exception = "".join(
+                traceback.format_exception(*record["exception"])
+            )
+        self._pending.append(
+            (
+                record["time"],
+                record["level"].name,
+                record["name"],
+                record["function"],
+                record["line"],
+                record["message"],
+                record["extra"] or None,
+                exception,
+            )
+        )
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def close(self) -> None:
+        """Writes the pending records and stops the writer"""
+        self._closed = True
+        self._wakeup.set()
+        self._writer.join()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._write()
+        self._write()
+
+    def _write(self) -> None:
+        lines = []
+        while self._pending:
+            lines.append(self._serialize(*self._pending.popleft()))
+        if not lines:
+            return
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+            self.written += len(lines)
+        except Exception:
+            self.dropped += len(lines)
+
+    @staticmethod
+    def _serialize(
+        time, level, name, function, line, message, extra, exception
+    ) -> str:
+        fields = {
+            "time": time.isoformat(),
+            "level": level,
+            "logger": name,
+            "function": function,
+            "line": line,
+            "message": message,
+        }
+        if extra:
+            fields["extra"] = extra
+        if exception:
+            fields["exception"] = exception
+        return json.dumps(fields, ensure_ascii=False, default=str)
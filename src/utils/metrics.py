@@ -0,0 +1,356 @@
+import re
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from contextlib import contextmanager, nullcontext
+
+from aiohttp import web
+from loguru import logger
+
+from .stages import SlowStages
+
+# Seconds, from a cached lookup to a slow Discord request
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Table of a SQL statement, the first one for joins
+_SQL_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+[`\"]?(\w+)", re.IGNORECASE)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base of registry metrics, values are kept per label values tuple"""
+
+    kind = "untyped"
+
+    __slots__ = ("name", "help", "labels", "_values")
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: dict[tuple[str, ...], object] = {}
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} "
+            f"name={self.name} "
+            f"series={len(self._values)}"
+            f">"
+        )
+
+    def _key(self, labels: dict[str, object]) -> tuple[str, ...]:
+        if len(labels) != len(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}")
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def _selector(self, key: tuple[str, ...], *extra: tuple[str, str]) -> str:
+        pairs = [*zip(self.labels, key), *extra]
+        if not pairs:
+            return ""
+        return (
+            "{"
+            + ",".join(f'{label}="{_escape(value)}"' for label, value in pairs)
+            + "}"
+        )
+
+    def samples(self) -> Iterable[str]:
+        for key, value in self._values.items():
+            yield f"{self.name}{self._selector(key)} {_number(value)}"
+
+    def render(self) -> str:
+        return "\n".join(
+            (
+                f"# HELP {self.name} {self.help}",
+                f"# TYPE {self.name} {self.kind}",
+                *self.samples(),
+            )
+        )
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    __slots__ = ()
+
+    def inc(self, value: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + value
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    """
+    Current value of something, set by the code or, with collect, read from
+    the bot state on every scrape: collect returns values by label tuples.
+    """
+
+    kind = "gauge"
+
+    __slots__ = ("collect",)
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Iterable[str] = (),
+        collect: Callable[[], dict[tuple[str, ...], float]] | None = None,
+    ):
+        super().__init__(name, help, labels)
+        self.collect = collect
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = value
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterable[str]:
+        if self.collect:
+            try:
+                self._values = {
+                    tuple(map(str, key)): value
+                    for key, value in self.collect().items()
+                }
+            except Exception as e:
+                logger.exception(f"Gauge {self.name} collect failed: {e}")
+        return super().samples()
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values in cumulative buckets.
+
+    Every series keeps a count per bucket, a sum and a count of values,
+    observe() is a binary search and two increments.
+    """
+
+    kind = "histogram"
+
+    __slots__ = ("buckets",)
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        if (series := self._values.get(key)) is None:
+            # Bucket counts, +Inf included, then sum
+            series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes seconds spent in the with block"""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._values.get(self._key(labels))
+        return sum(series[:-1]) if series else 0
+
+    def samples(self) -> Iterable[str]:
+        for key, series in self._values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), series):
+                cumulative += count
+                selector = self._selector(key, ("le", _number(bound)))
+                yield f"{self.name}_bucket{selector} {cumulative}"
+            selector = self._selector(key)
+            yield f"{self.name}_sum{selector} {_number(series[-1])}"
+            yield f"{self.name}_count{selector} {cumulative}"
+
+
+class MetricsRegistry:
+    """
+    In-process metrics rendered in the Prometheus text format.
+
+    counter(), gauge() and histogram() return the registered metric of the
+    name or register a new one, so every component may declare the metrics
+    it updates. Values live in memory only and are read by scraping
+    MetricsServer.
+    """
+
+    __slots__ = ("_metrics",)
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} metrics={len(self._metrics)}>"
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._metrics
+
+    def __getitem__(self, name: str) -> Metric:
+        return self._metrics[name]
+
+    def counter(
+        self, name: str, help: str, labels: Iterable[str] = ()
+    ) -> Counter:
+        return self._register(Counter, name, help, labels)
+
+    def gauge(
+        self,
+        name: str,
+        help: str,
+        labels: Iterable[str] = (),
+        collect: Callable[[], dict[tuple[str, ...], float]] | None = None,
+    ) -> Gauge:
+        gauge = self._register(Gauge, name, help, labels)
+        if collect:
+            gauge.collect = collect  # The latest bot state owner wins
+        return gauge
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, help, labels, buckets=buckets)
+
+    def render(self) -> str:
+        return "".join(
+            metric.render() + "\n" for metric in self._metrics.values()
+        )
+
+    def _register(self, cls: type, name: str, help: str, labels, **kwargs):
+        if (metric := self._metrics.get(name)) is None:
+            metric = self._metrics[name] = cls(name, help, labels, **kwargs)
+        elif not isinstance(metric, cls) or metric.labels != tuple(labels):
+            raise ValueError(f"Metric {name} is registered as {metric}")
+        return metric
+
+
+def instrument_tortoise(
+    histogram: Histogram, stages: SlowStages | None = None
+) -> None:
+    """
+    Times queries of the initialized Tortoise connections.
+
+    Observed with labels model (model of the queried table, "other" for raw
+    queries) and operation (first SQL keyword), queries are "db" stages of
+    stages. Call after Tortoise.init.
+    """
+    from tortoise import Tortoise, connections
+
+    from .tracing import span
+
+    models = {
+        model._meta.db_table: model.__name__
+        for app in Tortoise.apps.values()
+        for model in app.values()
+    }
+
+    stage = stages.stage if stages else lambda name: nullcontext()
+
+    def timed(execute):
+        async def _execute(query: str, *args, **kwargs):
+            table = _SQL_TABLE.search(query)
+            model = models.get(table and table[1], "other")
+            operation = query.lstrip().split(None, 1)[0].upper()
+            started_at = time.perf_counter()
+            try:
+                with (
+                    stage(f"db {model} {operation}"),
+                    span("db", query),
+                ):
+                    return await execute(query, *args, **kwargs)
+            finally:
+                histogram.observe(
+                    time.perf_counter() - started_at,
+                    model=model,
+                    operation=operation,
+                )
+
+        return _execute
+
+    for connection in connections.all():
+        for method in (
+            "execute_insert",
+            "execute_many",
+            "execute_query",
+            "execute_query_dict",
+        ):
+            setattr(connection, method, timed(getattr(connection, method)))
+
+
+class MetricsServer:
+    """Local HTTP server of GET /metrics, other routes may be added to app"""
+
+    __slots__ = ("registry", "host", "port", "app", "_runner")
+
+    def __init__(self, registry: MetricsRegistry, host: str, port: int):
+        self.registry = registry
+        self.host = host
+        self.port = port
+
+        self.app = web.Application()
+        self.app.router.add_get("/metrics", self._metrics)
+        self._runner: web.AppRunner | None = None
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} "
+            f"host={self.host} "
+            f"port={self.port} "
+            f"running={self._runner is not None}"
+            f">"
+        )
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if self.port == 0:  # Random port, for tests
+            self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _metrics(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text=self.registry.render(),
+            content_type="text/plain",
+            charset="utf-8",
+        )
@@ -0,0 +1,85 @@
+import os
+import sys
+import threading
+from collections import Counter
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread (the event loop's by default) from a
+    background thread every interval seconds.
+
+    Samples are kept as folded stacks ("outer;inner;innermost count" per
+    line), the input of flamegraph.pl and speedscope. Sampling costs the
+    profiled thread only the GIL switches, no tracing hooks are set.
+    """
+
+    __slots__ = (
+        "interval",
+        "thread_id",
+        "samples",
+        "_stacks",
+        "_stopped",
+        "_sampler",
+    )
+
+    def __init__(self, interval: float = 0.005, thread_id: int | None = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples = 0
+
+        self._stacks: Counter[str] = Counter()
+        self._stopped = threading.Event()
+        self._sampler: threading.Thread | None = None
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} "
+            f"interval={self.interval} "
+            f"samples={self.samples} "
+            f"running={self.is_running()}"
+            f">"
+        )
+
+    def is_running(self) -> bool:
+        return self._sampler is not None and self._sampler.is_alive()
+
+    def start(self) -> None:
+        if self.is_running():
+            raise RuntimeError("Profiler is already running")
+        self._stopped.clear()
+        self._sampler = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._sampler:
+            self._sampler.join()
+            self._sampler = None
+
+    def write(self, path: str) -> None:
+        """Writes folded stacks, most sampled first"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None or self.thread_id == own_id:
+                break
+            stack = []
+            while frame:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}"
+                    f":{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            del frame
+            self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
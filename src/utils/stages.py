@@ -0,0 +1,74 @@
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+from loguru import logger
+
+# Path and guild of the innermost running stage of the current task
+_current: ContextVar[tuple[str, int | None] | None] = ContextVar(
+    "stage", default=None
+)
+
+_DISABLED = nullcontext()
+
+
+class _Stage:
+    __slots__ = ("stages", "name", "guild_id", "_token", "_started_at")
+
+    def __init__(self, stages: "SlowStages", name: str, guild_id: int | None):
+        self.stages = stages
+        self.name = name
+        self.guild_id = guild_id
+
+    def __enter__(self) -> None:
+        if parent := _current.get():
+            self.name = f"{parent[0]} > {self.name}"
+            if self.guild_id is None:
+                self.guild_id = parent[1]
+        self._token = _current.set((self.name, self.guild_id))
+        self._started_at = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        elapsed = time.perf_counter() - self._started_at
+        _current.reset(self._token)
+        if elapsed >= self.stages.threshold:
+            self.stages.slow += 1
+            logger.warning(
+                f"Slow stage {self.name} of guild {self.guild_id}: "
+                f"{elapsed * 1000:.0f} ms"
+            )
+
+
+class SlowStages:
+    """
+    Opt-in detector of slow awaited stages of the event handling.
+
+    Listeners, view and modal callbacks and deadlines run as stages, REST
+    requests and DB queries as their nested stages. A stage taking longer
+    than threshold is logged with the whole path and guild, e.g.
+    "Voice.on_voice_state_update > rest PATCH /channels/{channel_id}".
+    A slow stage without slow nested ones spent its time on CPU work or
+    other awaits, a loop blocked by CPU work is also logged by the
+    LoopLagSampler. Disabled stage() returns a shared no-op context.
+    """
+
+    __slots__ = ("enabled", "threshold", "slow")
+
+    def __init__(self):
+        self.enabled = False
+        self.threshold = 0.25  # Seconds
+        self.slow = 0  # Slow stages logged
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} "
+            f"enabled={self.enabled} "
+            f"threshold={self.threshold} "
+            f"slow={self.slow}"
+            f">"
+        )
+
+    def stage(self, name: str, guild_id: int | None = None):
+        if not self.enabled:
+            return _DISABLED
+        return _Stage(self, name, guild_id)
@@ -0,0 +1,240 @@
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+
+import sentry_sdk
+from sentry_sdk.tracing import Transaction
+
+from .metrics import MetricsRegistry
+
+# Threads of the Sentry transport and profiler
+_SENTRY_THREADS = ("raven-sentry.", "sentry.")
+_NO_SPAN = nullcontext()
+# Set by AdaptiveSampler.init_sentry, promotes unsampled transactions
+_sampler: "AdaptiveSampler | None" = None
+
+
+def _timestamp(value: str | datetime) -> datetime:
+    # Transaction events come to before_send_transaction serialized
+    if isinstance(value, str):
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%fZ")
+    return value
+
+
+class AdaptiveSampler:
+    """
+    Sentry sampling hooks deciding which transactions are recorded and sent.
+
+    Whether a transaction is recorded, with its spans, is decided at the
+    start at the rate of its op from overrides or at rate, while the per
+    minute budget lasts. Unsampled ones that errored (its status or an
+    error captured during it) or were slow are promoted at the end and sent
+    without spans. Errored and slow ones are sent at priority_rate, routine
+    ones as sampled. Profiles are decided at the start at profiles_rate.
+    Every decision is counted in metrics: unsampled, error, slow, routine
+    (sent), error_dropped, slow_dropped and over_budget. The event loop time
+    spent on starting and finishing transactions is counted too.
+    """
+
+    __slots__ = (
+        "rate",
+        "overrides",
+        "priority_rate",
+        "slow_threshold",
+        "profiles_rate",
+        "budget_per_minute",
+        "_decisions",
+        "_loop_seconds",
+        "_window_started_at",
+        "_window_sent",
+    )
+
+    def __init__(
+        self,
+        metrics: MetricsRegistry,
+        rate: float,
+        priority_rate: float,
+        slow_threshold: float,
+        profiles_rate: float,
+        budget_per_minute: int,
+        overrides: dict[str, float] | None = None,
+    ):
+        self.rate = rate
+        self.overrides = overrides or {}
+        self.priority_rate = priority_rate
+        self.slow_threshold = slow_threshold
+        self.profiles_rate = profiles_rate
+        self.budget_per_minute = budget_per_minute
+
+        self._decisions = metrics.counter(
+            "sentry_transactions_total",
+            "Sentry transactions by op and sampling decision",
+            ("op", "decision"),
+        )
+        self._loop_seconds = metrics.counter(
+            "sentry_loop_seconds_total",
+            "Event loop time spent starting and finishing Sentry transactions",
+            ("op",),
+        )
+        self._window_started_at = time.monotonic()
+        self._window_sent = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} "
+            f"rate={self.rate} "
+            f"priority_rate={self.priority_rate} "
+            f"budget_per_minute={self.budget_per_minute}"
+            f">"
+        )
+
+    def init_sentry(self, **options) -> None:
+        """sentry_sdk.init with the hooks of this sampler"""
+        global _sampler
+        _sampler = self
+        sentry_sdk.init(
+            traces_sampler=self.traces_sampler,
+            profiles_sampler=self.profiles_sampler,
+            before_send=self.before_send,
+            before_send_transaction=self.before_send_transaction,
+            **options,
+        )
+
+    def traces_sampler(self, sampling_context: dict) -> float:
+        op = sampling_context["transaction_context"].get("op")
+        if not self._budget_left():
+            self._decisions.inc(op=op, decision="over_budget")
+            return 0.0
+        if random.random() < self.overrides.get(op, self.rate):
+            return 1.0
+        self._decisions.inc(op=op, decision="unsampled")
+        return 0.0
+
+    def profiles_sampler(self, sampling_context: dict) -> float:
+        return self.profiles_rate
+
+    def before_send(self, event: dict, hint: dict) -> dict:
+        """Marks the transaction an error event is captured in as errored"""
+        if transaction := sentry_sdk.Hub.current.scope.transaction:
+            transaction.set_status("internal_error")
+        return event
+
+    def before_send_transaction(self, event: dict, hint: dict) -> dict | None:
+        trace = event.get("contexts", {}).get("trace", {})
+        op = trace.get("op")
+        duration = (
+            _timestamp(event["timestamp"])
+            - _timestamp(event["start_timestamp"])
+        ).total_seconds()
+
+        if trace.get("status") not in (None, "ok"):
+            decision, rate = "error", self.priority_rate
+        elif duration >= self.slow_threshold:
+            decision, rate = "slow", self.priority_rate
+        else:
+            # Sampled at the start already
+            decision, rate = "routine", 1.0
+
+        sent = False
+        if random.random() >= rate:
+            decision += "_dropped"
+        elif not self._budget_left():
+            decision = "over_budget"
+        else:
+            self._window_sent += 1
+            sent = True
+
+        self._decisions.inc(op=op, decision=decision)
+        return event if sent else None
+
+    def promote(
+        self, trace: Transaction, hub: sentry_sdk.Hub, duration: float
+    ) -> None:
+        """Sends an unsampled transaction, if errored or slow, without spans"""
+        if trace.status in (None, "ok") and duration < self.slow_threshold:
+            return
+        if not self._budget_left():
+            self._decisions.inc(op=trace.op, decision="over_budget")
+            return
+        promoted = Transaction(
+            op=trace.op,
+            name=trace.name,
+            trace_id=trace.trace_id,
+            span_id=trace.span_id,
+            status=trace.status,
+            start_timestamp=trace.start_timestamp,
+            sampled=True,
+        )
+        promoted.set_tag("sampling", "promoted")
+        hub.start_transaction(promoted)
+        promoted.finish(
+            hub,
+            end_timestamp=trace.start_timestamp + timedelta(seconds=duration),
+        )
+
+    def observe_loop(self, op: str, seconds: float) -> None:
+        self._loop_seconds.inc(seconds, op=op)
+
+    def _budget_left(self) -> bool:
+        if time.monotonic() - self._window_started_at >= 60:
+            self._window_started_at = time.monotonic()
+            self._window_sent = 0
+        return self._window_sent < self.budget_per_minute
+
+
+@contextmanager
+def transaction(op: str, name: str):
+    """
+    Sentry transaction in a hub of its own, so spans of concurrent tasks
+    don't mix. Unsampled ones are promoted by the sampler of init_sentry. A
+    no-op transaction when Sentry is not initialized.
+    """
+    started_at = time.perf_counter()
+    with sentry_sdk.Hub(sentry_sdk.Hub.current) as hub:
+        trace = hub.start_transaction(op=op, name=name)
+        block = 0.0
+        try:
+            with trace:
+                block = time.perf_counter()
+                try:
+                    yield
+                finally:
+                    block = time.perf_counter() - block
+        finally:
+            if _sampler:
+                if not trace.sampled:
+                    _sampler.promote(trace, hub, block)
+                _sampler.observe_loop(
+                    op, time.perf_counter() - started_at - block
+                )
+
+
+def span(op: str, description: str):
+    """
+    Span in the current transaction. A no-op one unless the transaction is
+    sampled, spans of the others are never sent.
+    """
+    trace = sentry_sdk.Hub.current.scope.transaction
+    if trace is None or not trace.sampled:
+        return _NO_SPAN
+    return sentry_sdk.start_span(op=op, description=description)
+
+
+def sentry_threads_cpu() -> dict[tuple[str], float]:
+    """CPU seconds of the Sentry threads by name, empty where no /proc"""
+    ticks = os.sysconf("SC_CLK_TCK")
+    cpu = {}
+    for thread in threading.enumerate():
+        if not thread.name.startswith(_SENTRY_THREADS):
+            continue
+        try:
+            with open(f"/proc/self/task/{thread.native_id}/stat") as f:
+                # Fields after the command, utime and stime are 14 and 15
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        cpu[(thread.name,)] = (int(fields[11]) + int(fields[12])) / ticks
+    return cpu
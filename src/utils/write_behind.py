@@ -0,0 +1,144 @@
+import asyncio
+import time
+from collections import defaultdict
+from contextlib import suppress
+
+from loguru import logger
+from pypika import Case, Field
+
+from src.models import TempChannels
+
+
+class TempChannelsWriteBehind:
+    """
+    Write-behind queue of TempChannels row updates and deletes.
+
+    Mutations are applied in memory and written by a background flush every
+    flush_interval, so voice handling does not wait for the DB. Updates of
+    the same row are merged (the last value wins), a delete drops pending
+    updates of its row. A flush costs one DELETE plus one UPDATE per
+    changed column (CASE over channel ids). Failed flushes are retried.
+    """
+
+    __slots__ = (
+        "flush_interval",
+        "lag",
+        "flushes",
+        "merged",
+        "_updates",
+        "_deletes",
+        "_first_write_at",
+        "_worker",
+    )
+
+    def __init__(self, flush_interval: float = 1.0):
+        self.flush_interval = flush_interval
+
+        self.lag = 0.0  # Seconds the oldest write of the last flush waited
+        self.flushes = 0
+        self.merged = 0  # Writes merged into an already pending one
+
+        self._updates: dict[int, dict[str, int | None]] = {}
+        self._deletes: set[int] = set()
+        self._first_write_at: float | None = None
+        self._worker: asyncio.Task | None = None
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} "
+            f"pending={len(self)} "
+            f"lag={self.lag:.3f}s"
+            f">"
+        )
+
+    def __len__(self) -> int:
+        return len(self._updates) + len(self._deletes)
+
+    def update(self, channel_id: int, **fields: int | None) -> None:
+        if channel_id in self._deletes:
+            return
+        if channel_id in self._updates:
+            self.merged += 1
+        self._updates.setdefault(channel_id, {}).update(fields)
+        self._wake()
+
+    def delete(self, channel_id: int) -> None:
+        if self._updates.pop(channel_id, None) is not None:
+            self.merged += 1
+        self._deletes.add(channel_id)
+        self._wake()
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "pending": len(self),
+            "lag": self.lag,
+            "flushes": self.flushes,
+            "merged": self.merged,
+        }
+
+    async def close(self) -> None:
+        """Stop the worker and write everything pending"""
+        if self._worker:
+            self._worker.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._worker  # Lets an interrupted flush requeue
+            self._worker = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        updates, self._updates = self._updates, {}
+        deletes, self._deletes = self._deletes, set()
+        first_write_at, self._first_write_at = self._first_write_at, None
+        if not updates and not deletes:
+            return
+
+        try:
+            if deletes:
+                await TempChannels.filter(dis_id__in=list(deletes)).delete()
+            for field, values in self._by_field(updates).items():
+                case = Case()
+                for channel_id, value in values.items():
+                    case = case.when(Field("dis_id") == channel_id, value)
+                await TempChannels.filter(dis_id__in=list(values)).update(
+                    **{field: case.else_(Field(field))}
+                )
+        except BaseException:
+            # Keep failed (or cancelled) writes, newer ones queued meanwhile win
+            self._deletes |= deletes
+            for channel_id, fields in updates.items():
+                if channel_id not in self._deletes:
+                    self._updates[channel_id] = fields | self._updates.get(
+                        channel_id, {}
+                    )
+            for channel_id in self._deletes:
+                self._updates.pop(channel_id, None)
+            self._first_write_at = first_write_at
+            raise
+
+        self.flushes += 1
+        if first_write_at is not None:
+            self.lag = time.monotonic() - first_write_at
+
+    @staticmethod
+    def _by_field(
+        updates: dict[int, dict[str, int | None]],
+    ) -> dict[str, dict[int, int | None]]:
+        by_field = defaultdict(dict)
+        for channel_id, fields in updates.items():
+            for field, value in fields.items():
+                by_field[field][channel_id] = value
+        return by_field
+
+    def _wake(self) -> None:
+        if self._first_write_at is None:
+            self._first_write_at = time.monotonic()
+        if not self._worker or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while len(self):
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.exception(f"TempChannels write-behind flush failed: {e}")
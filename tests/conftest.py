@@ -0,0 +1,3 @@
+# src.services has to be imported before src.utils (as main.py does),
+# otherwise src.utils -> src.ui -> src.services import cycle breaks.
+import src.services  # noqa: F401
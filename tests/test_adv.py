@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import discord
+import pytest
+from pytest_mock import MockFixture
+
+from src import ui
+from src.utils import DeadlineScheduler
+
+
+@pytest.fixture
+async def adv(mocker: MockFixture):
+    mocker.patch.dict(
+        "src.ui.adv.CFG",
+        {"adv": {"update_debounce": 0.02, "delete_after_fillment": 4.0}},
+    )
+    deadlines = DeadlineScheduler()
+    deadlines.start()
+
+    temp_voice = mocker.Mock()
+    temp_voice.server.bot.deadlines = deadlines
+    temp_voice.channel.user_limit = 3
+    temp_voice.channel.members = [mocker.Mock()]
+
+    adv = ui.Adv(temp_voice, mocker.Mock())
+
+    async def render(self, priority):
+        self._rendered_state = self._fill_state()
+        return self._message
+
+    mocker.patch.object(
+        ui.Adv, "_send_or_edit_message", autospec=True, side_effect=render
+    )
+    yield adv
+    deadlines.stop()
+
+
+@pytest.mark.asyncio
+async def test_updates_coalesced(adv: ui.Adv):
+    await adv.update()  # First render is immediate
+    for _ in range(5):
+        await adv.update()
+
+    assert adv._send_or_edit_message.await_count == 1
+    await asyncio.sleep(0.06)
+    assert adv._send_or_edit_message.await_count == 2
+    assert adv.edits_saved == 4
+
+
+@pytest.mark.asyncio
+async def test_fill_transition_flushed(adv: ui.Adv):
+    await adv.update()
+    await adv.update()  # Pending
+    adv.temp_voice.channel.members.extend([object(), object()])
+    await adv.update()
+
+    assert adv._send_or_edit_message.await_count == 2
+    assert adv.edits_saved == 1
+    await asyncio.sleep(0.06)
+    assert adv._send_or_edit_message.await_count == 2
+
+
+def test_fingerprint_ignores_timestamp():
+    def embed(description, timestamp):
+        return discord.Embed(description=description, timestamp=timestamp)
+
+    now = datetime.now()
+    fingerprint = ui.Adv._content_fingerprint
+
+    assert fingerprint(embed("a", now), False) == fingerprint(
+        embed("a", now + timedelta(seconds=5)), False
+    )
+    assert fingerprint(embed("a", now), False) != fingerprint(
+        embed("a", now), True
+    )
+    assert fingerprint(embed("a", now), False) != fingerprint(
+        embed("b", now), False
+    )
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from src.utils import (
+    FileMetrics,
+    MetricAggregator,
+    MetricsRegistry,
+    RegistryMetrics,
+)
+from src.utils.aggregator import MetricsBackend
+
+
+@pytest.mark.asyncio
+async def test_flush_capped_tags(tmp_path):
+    registry = MetricsRegistry()
+    path = tmp_path / "metrics.jsonl"
+    aggregator = MetricAggregator(
+        [RegistryMetrics(registry), FileMetrics(str(path))],
+        flush_interval=60,
+        max_tag_values=2,
+    )
+    for guild_id in (1, 2, 1, 3, 4):
+        aggregator.incr("temp_channel_created", 1, tags={"server": guild_id})
+    aggregator.distribution("adv_users", 3)
+    aggregator.distribution("adv_users", 5)
+    assert len(aggregator) == 4
+
+    await aggregator.close()
+
+    counter = registry["temp_channel_created_total"]
+    assert counter.value(server=1) == 2
+    assert counter.value(server=2) == 1
+    assert counter.value(server="other") == 2
+    assert registry["adv_users"].count() == 2
+    assert json.loads(path.read_text())["distributions"] == [
+        ["adv_users", {}, 2, 8, 3, 5]
+    ]
+    assert len(aggregator) == 0
+
+
+def test_no_backends_records_nothing():
+    aggregator = MetricAggregator()
+    aggregator.incr("temp_channel_created", 1, tags={"server": 1})
+    assert len(aggregator) == 0
+
+
+@pytest.mark.asyncio
+async def test_registry_drops_mismatched_tags(tmp_path):
+    registry = MetricsRegistry()
+    path = tmp_path / "metrics.jsonl"
+    aggregator = MetricAggregator(
+        [RegistryMetrics(registry), FileMetrics(str(path))],
+        flush_interval=60,
+    )
+    aggregator.incr("button_clicks", 1, tags={"server": 1})
+    aggregator.incr("button_clicks", 1, tags={"server": 1, "kind": "full"})
+    aggregator.incr("temp_channel_created", 1, tags={"server": 1})
+
+    await aggregator.close()
+
+    assert registry["button_clicks_total"].value(server=1) == 1
+    assert registry["temp_channel_created_total"].value(server=1) == 1
+    assert len(json.loads(path.read_text())["counters"]) == 3
+
+
+def test_backend_without_flush():
+    class Backend(MetricsBackend):
+        __slots__ = ()
+
+    with pytest.raises(TypeError):
+        Backend()
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+from pytest_mock import MockFixture
+
+from src.utils import BanCache
+
+
+@pytest.fixture
+def mock_filter(mocker: MockFixture):
+    mock_filter = mocker.patch("src.utils.ban_cache.TCBans.filter")
+    mock_filter.return_value.values_list = mocker.AsyncMock(return_value=[2, 3])
+    return mock_filter
+
+
+@pytest.mark.asyncio
+async def test_write_through(mock_filter):
+    bans = BanCache()
+
+    assert await bans.get(1, 10) == {2, 3}
+    bans.add(1, 10, 4)
+    bans.discard(1, 10, 2)
+    bans.add(1, 11, 5)  # Not cached, loaded from DB on demand
+
+    assert await bans.get(1, 10) == {3, 4}
+    mock_filter.assert_called_once_with(
+        server_id=1, dis_creator_id=10, banned=True
+    )
+    assert (bans.hits, bans.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction(mock_filter):
+    bans = BanCache(max_size=2)
+
+    await bans.get(1, 10)
+    await bans.get(1, 11)
+    await bans.get(1, 10)  # 11 becomes least recently used
+    await bans.get(1, 12)
+
+    assert bans.evictions == 1
+    await bans.get(1, 10)
+    await bans.get(1, 11)
+    assert mock_filter.call_count == 4
+
+
+@pytest.mark.asyncio
+async def test_changes_during_load(mock_filter):
+    loaded = asyncio.Event()
+
+    async def values_list(*_, **__):
+        await loaded.wait()
+        return [2, 3]  # Read before the ban and unban below
+
+    mock_filter.return_value.values_list = values_list
+    bans = BanCache()
+
+    loading = asyncio.create_task(bans.get(1, 10))
+    await asyncio.sleep(0)
+    bans.add(1, 10, 4)
+    bans.discard(1, 10, 2)
+    loaded.set()
+
+    assert await loading == {3, 4}
+    assert await bans.get(1, 10) == {3, 4}
+    assert not bans._loading
@@ -0,0 +1,97 @@
+import asyncio
+
+import discord
+import pytest
+from pytest_mock import MockFixture
+from tortoise.exceptions import OperationalError
+
+from src.services.channel_pool import ChannelPool
+from src.utils import RestDispatcher
+
+
+@pytest.fixture
+def pool(mocker: MockFixture) -> ChannelPool:
+    me, role, member, everyone = (mocker.Mock() for _ in range(4))
+    me.roles = []
+    category = mocker.Mock(spec=discord.CategoryChannel)
+    category.guild.me = me
+    category.guild.default_role = everyone
+    category.overwrites = {
+        role: discord.PermissionOverwrite(view_channel=True, connect=True),
+        member: discord.PermissionOverwrite(speak=True),
+        me: discord.PermissionOverwrite(view_channel=True),
+    }
+    created = iter(range(100, 200))
+    category.create_voice_channel = mocker.AsyncMock(
+        side_effect=lambda **_: mocker.Mock(
+            id=next(created), members=[], delete=mocker.AsyncMock()
+        )
+    )
+    mocker.patch(
+        "src.services.channel_pool.TempChannels.create", mocker.AsyncMock()
+    )
+
+    server = mocker.Mock()
+    server.bot.rest = RestDispatcher()
+    server.bot.get_channel.return_value = category
+    return ChannelPool(
+        server,
+        mocker.Mock(warm_pool_size=2, def_name="Канал", def_user_limit=0),
+    )
+
+
+@pytest.mark.asyncio
+async def test_idle_hidden_for_every_overwrite(pool):
+    pool.refill()
+    await pool._refill_task
+
+    category = pool.server.bot.get_channel.return_value
+    overwrites = category.create_voice_channel.call_args.kwargs["overwrites"]
+    for target in (category.guild.default_role, *category.overwrites):
+        if target is category.guild.me:
+            assert overwrites[target].view_channel
+            continue
+        assert overwrites[target].view_channel is False
+        assert overwrites[target].connect is False
+    assert len(pool._idle) == 1
+
+
+@pytest.mark.asyncio
+async def test_drain_and_discard_delete_channels(mocker: MockFixture, pool):
+    pool.refill()
+    await pool._refill_task
+    idle = pool.claim()
+    await pool._refill_task
+    discarded = mocker.Mock(delete=mocker.AsyncMock())
+
+    pool.discard(discarded)
+    pool.drain()
+    await pool._refill_task
+    await asyncio.sleep(0)
+
+    discarded.delete.assert_awaited_once()
+    idle.delete.assert_not_awaited()  # Claimed, not the pool's anymore
+    assert not pool._idle
+    deleted = {
+        call.args[0] for call in pool.server.bot.writes.delete.call_args_list
+    }
+    assert len(deleted) == 2  # Discarded and the refilled idle channel
+
+
+@pytest.mark.asyncio
+async def test_idle_deleted_when_not_saved(mocker: MockFixture, pool):
+    mocker.patch(
+        "src.services.channel_pool.TempChannels.create",
+        mocker.AsyncMock(side_effect=OperationalError("gone away")),
+    )
+
+    category = pool.server.bot.get_channel.return_value
+    channel = mocker.Mock(id=100, members=[], delete=mocker.AsyncMock())
+    category.create_voice_channel = mocker.AsyncMock(return_value=channel)
+
+    pool.refill()
+    await pool._refill_task  # The error is logged, not raised
+
+    channel.delete.assert_awaited_once()
+    pool.server.bot.writes.delete.assert_called_once_with(100)
+    assert not pool._idle
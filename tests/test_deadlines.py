@@ -0,0 +1,78 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from pytest_mock import MockFixture
+
+from src.utils import DeadlineScheduler
+
+
+def soon(seconds: float) -> datetime:
+    return datetime.now() + timedelta(seconds=seconds)
+
+
+@pytest.fixture
+async def deadlines():
+    deadlines = DeadlineScheduler()
+    deadlines.start()
+    yield deadlines
+    deadlines.stop()
+
+
+@pytest.mark.asyncio
+async def test_fire_in_order(mocker: MockFixture, deadlines):
+    fired = []
+
+    async def callback(key):
+        fired.append(key)
+
+    deadlines.arm("b", soon(0.04), lambda: callback("b"))
+    deadlines.arm("a", soon(0.02), lambda: callback("a"))
+    deadlines.arm("past", soon(-5), lambda: callback("past"))
+    assert len(deadlines) == 3
+
+    await asyncio.sleep(0.1)
+
+    assert fired == ["past", "a", "b"]
+    assert len(deadlines) == 0
+    assert deadlines.fired == 3
+    assert deadlines.lag < 0.05
+
+
+@pytest.mark.asyncio
+async def test_rearm_and_cancel(mocker: MockFixture, deadlines):
+    callback = mocker.AsyncMock()
+
+    deadlines.arm("rearmed", soon(0.02), callback)
+    deadlines.arm("rearmed", soon(10), callback)
+    deadlines.arm("cancelled", soon(0.02), callback)
+    deadlines.cancel("cancelled")
+
+    await asyncio.sleep(0.06)
+
+    callback.assert_not_awaited()
+    assert "rearmed" in deadlines
+    assert "cancelled" not in deadlines
+
+
+@pytest.mark.asyncio
+async def test_compaction_keeps_live_entries(mocker: MockFixture, deadlines):
+    callback = mocker.AsyncMock()
+
+    for _ in range(100):
+        deadlines.arm("key", soon(0.02), callback)
+
+    assert len(deadlines._heap) <= 4
+    await asyncio.sleep(0.06)
+    callback.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_failed_callback_keeps_running(mocker: MockFixture, deadlines):
+    callback = mocker.AsyncMock()
+
+    deadlines.arm("fail", soon(0), mocker.AsyncMock(side_effect=ValueError))
+    deadlines.arm("ok", soon(0.02), callback)
+
+    await asyncio.sleep(0.06)
+    callback.assert_awaited_once()
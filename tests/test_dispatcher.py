@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from src.utils import Priority, RequestShedError, RestDispatcher
+
+
+@pytest.mark.asyncio
+async def test_waiters_start_by_priority():
+    rest = RestDispatcher(max_in_flight=1)
+    started = []
+    gate = asyncio.Event()
+
+    async def request(name, wait=True):
+        started.append(name)
+        if wait:
+            await gate.wait()
+
+    first = asyncio.create_task(rest.call(Priority.INTERACTIVE, request, 0))
+    await asyncio.sleep(0)
+    waiting = [
+        asyncio.create_task(rest.call(priority, request, priority.name))
+        for priority in (Priority.BACKGROUND, Priority.INTERACTIVE)
+    ]
+    await asyncio.sleep(0)
+    # Critical calls are never held back
+    await rest.call(Priority.CRITICAL, request, "CRITICAL", wait=False)
+
+    gate.set()
+    await asyncio.gather(first, *waiting)
+
+    assert started == [0, "CRITICAL", "INTERACTIVE", "BACKGROUND"]
+    assert rest._in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_background_shed():
+    rest = RestDispatcher(
+        max_in_flight=1, background_limit=1, background_max_wait=0.02
+    )
+    gate = asyncio.Event()
+
+    busy = asyncio.create_task(rest.call(Priority.CRITICAL, gate.wait))
+    await asyncio.sleep(0)
+    timed_out = asyncio.create_task(rest.call(Priority.BACKGROUND, gate.wait))
+    await asyncio.sleep(0)
+
+    with pytest.raises(RequestShedError):  # Queue limit
+        await rest.call(Priority.BACKGROUND, gate.wait)
+    with pytest.raises(RequestShedError):  # Max wait
+        await timed_out
+
+    gate.set()
+    await busy
+    assert rest.stats()["background"]["shed"] == 2
+    assert rest._in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_background_slots_capped():
+    rest = RestDispatcher(max_in_flight=3, background_max_in_flight=1)
+    gate = asyncio.Event()
+    started = []
+
+    async def request(name):
+        started.append(name)
+        await gate.wait()
+
+    calls = [
+        asyncio.create_task(rest.call(priority, request, name))
+        for priority, name in (
+            (Priority.BACKGROUND, "adv 1"),
+            (Priority.BACKGROUND, "adv 2"),
+            (Priority.INTERACTIVE, "panel"),
+        )
+    ]
+    await asyncio.sleep(0)
+
+    # Second background call waits for the background slot, the
+    # interactive one is not queued behind it
+    assert started == ["adv 1", "panel"]
+    assert rest.stats()["background"]["depth"] == 1
+
+    gate.set()
+    await asyncio.gather(*calls)
+    assert started == ["adv 1", "panel", "adv 2"]
+    assert rest._in_flight == rest._background_in_flight == 0
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+from pytest_mock import MockFixture
+
+from src.services import ChannelEvent, VoiceEventQueue
+from src.utils import SlowStages
+
+
+@pytest.fixture
+def server(mocker: MockFixture):
+    server = mocker.Mock()
+    server.update_settings = mocker.AsyncMock()
+    server.create_channel = mocker.AsyncMock(return_value=None)
+    server.del_channel = mocker.AsyncMock()
+    return server
+
+
+@pytest.fixture
+async def events(mocker: MockFixture, server):
+    bot = mocker.Mock()
+    bot.server = mocker.AsyncMock(return_value=server)
+    bot.stages = SlowStages()
+
+    queue = VoiceEventQueue(bot, flush_window=0.05)
+    yield queue
+    queue.close()
+
+
+def temp_voice(mocker: MockFixture, members):
+    temp_voice = mocker.Mock(channel=mocker.Mock(members=members))
+    temp_voice.adv.update = mocker.AsyncMock()
+    return temp_voice
+
+
+@pytest.mark.asyncio
+async def test_refresh_burst_folded(mocker: MockFixture, events, server):
+    channel = temp_voice(mocker, [mocker.Mock()])
+    server.channel.return_value = channel
+
+    queue = events.guild(1)
+    for _ in range(10):
+        queue.refresh(11, ChannelEvent.JOIN)
+        queue.refresh(11, ChannelEvent.LEAVE)
+    assert events.depth() == 1
+
+    await asyncio.sleep(0.1)
+
+    server.update_settings.assert_awaited_once()
+    channel.updated.assert_called_once()
+    channel.adv.update.assert_awaited_once()
+    server.del_channel.assert_not_awaited()
+    assert events.depth() == 0
+    assert events.stats()[1]["flushes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_refresh_empty_channel_deleted(
+    mocker: MockFixture, events, server
+):
+    server.channel.return_value = temp_voice(mocker, [])
+
+    events.guild(1).refresh(11, ChannelEvent.LEAVE)
+    await asyncio.sleep(0.1)
+
+    server.del_channel.assert_awaited_once_with(11)
+
+
+@pytest.mark.asyncio
+async def test_update_without_adv_not_rendered(
+    mocker: MockFixture, events, server
+):
+    channel = temp_voice(mocker, [])
+    channel.adv.__bool__ = mocker.Mock(return_value=False)
+    server.channel.return_value = channel
+
+    events.guild(1).refresh(11, ChannelEvent.UPDATE)
+    await asyncio.sleep(0.1)
+
+    channel.updated.assert_called_once()
+    channel.adv.update.assert_not_awaited()
+    server.del_channel.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_create_not_delayed(mocker: MockFixture, events, server):
+    events.flush_window = 10.0
+    member = mocker.Mock()
+
+    events.guild(1).create(member, 5)
+    await asyncio.sleep(0.01)
+
+    server.create_channel.assert_awaited_once_with(member, 5)
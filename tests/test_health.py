@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+import aiohttp
+import pytest
+
+from src.utils import (
+    HealthChecks,
+    LoopLagSampler,
+    MetricsRegistry,
+    MetricsServer,
+)
+
+
+@pytest.mark.asyncio
+async def test_blocked_loop_lag():
+    sampler = LoopLagSampler(interval=0.01, window=1.0, warn_after=0.05)
+    sampler.start()
+    await asyncio.sleep(0.05)
+    assert sampler.p99() < 0.05
+
+    time.sleep(0.1)  # noqa: ASYNC101 - blocks the loop
+    await asyncio.sleep(0.02)
+    sampler.stop()
+    assert sampler.p99() >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_health_endpoints():
+    restored = False
+
+    async def database() -> bool:
+        raise ConnectionError("pool closed")
+
+    server = MetricsServer(MetricsRegistry(), "127.0.0.1", 0)
+    checks = HealthChecks(server.app)
+    checks.add("gateway", lambda: True)
+    checks.add("restored", lambda: restored, ready_only=True)
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            url = f"http://127.0.0.1:{server.port}"
+            async with session.get(f"{url}/healthz") as response:
+                assert response.status == 200
+                assert await response.json() == {"gateway": True}
+            async with session.get(f"{url}/readyz") as response:
+                assert response.status == 503
+                assert await response.json() == {
+                    "gateway": True,
+                    "restored": False,
+                }
+
+            restored = True
+            checks.add("database", database)
+            async with session.get(f"{url}/readyz") as response:
+                assert response.status == 503
+                assert (await response.json())["database"] is False
+    finally:
+        await server.stop()
@@ -0,0 +1,89 @@
+import asyncio
+import gzip
+import threading
+
+import pytest
+from pytest_mock import MockFixture
+
+from src.utils import EventJournal, read_journal
+from src.utils.journal import COMPONENT, CREATOR, MODAL_SUBMIT, VOICE_STATE
+
+
+@pytest.mark.asyncio
+async def test_anonymized_round_trip(tmp_path):
+    path = str(tmp_path / "journal" / "events.jsonl.gz")
+    journal = EventJournal(path)
+    guild_id, member_id, creator_id = 10**18, 10**18 + 1, 10**18 + 2
+
+    journal.voice_state(5, guild_id, member_id, None, (creator_id, CREATOR))
+    await journal.flush()
+    journal.component(
+        3,
+        guild_id,
+        (creator_id, CREATOR),
+        member_id,
+        5,
+        "ban:select",
+        [str(member_id)],
+    )
+    journal.modal_submit(
+        4, guild_id, (creator_id, CREATOR), member_id, ["Тиммейты", "3"]
+    )
+    await journal.close()
+
+    header, events = read_journal(path)
+    assert header["version"] == 1
+    # Ordered by time, ids numbered by first appearance
+    assert events == [
+        [3, COMPONENT, 1, 3, CREATOR, 2, 5, "ban:select", [2]],
+        [4, MODAL_SUBMIT, 1, 3, CREATOR, 2, ["xxxxxxxx", "3"]],
+        [5, VOICE_STATE, 1, 2, None, None, 3, CREATOR],
+    ]
+    assert journal.events == 3
+
+
+@pytest.mark.asyncio
+async def test_crashed_bot_journal(tmp_path):
+    path = tmp_path / "events.jsonl.gz"
+    journal = EventJournal(str(path))
+    journal.channel_update(1, 10**18, 10**18 + 1, CREATOR)
+    await journal.flush()  # Synced, the gzip trailer is missing
+
+    crashed = tmp_path / "crashed.jsonl.gz"
+    crashed.write_bytes(path.read_bytes())
+    await journal.close()
+    with pytest.raises(EOFError):
+        gzip.open(crashed).read()
+
+    assert read_journal(str(crashed))[1] == [[1, "u", 1, 2, CREATOR]]
+
+
+@pytest.mark.asyncio
+async def test_close_waits_for_cancelled_flush(mocker: MockFixture, tmp_path):
+    path = str(tmp_path / "events.jsonl.gz")
+    journal = EventJournal(path)
+    started, release = threading.Event(), threading.Event()
+    write = EventJournal._write
+
+    def slow_write(self, lines):
+        started.set()
+        release.wait()
+        write(self, lines)
+
+    mocker.patch.object(EventJournal, "_write", slow_write)
+    journal.channel_update(1, 10**18, 10**18 + 1, CREATOR)
+    flush = asyncio.create_task(journal.flush())
+    await asyncio.to_thread(started.wait)
+    flush.cancel()  # As cog_unload cancels the flusher, the thread writes on
+
+    journal.channel_update(2, 10**18, 10**18 + 1, CREATOR)
+    closing = asyncio.create_task(journal.close())
+    await asyncio.sleep(0.01)
+    assert not closing.done()
+    release.set()
+    await closing
+
+    assert read_journal(path)[1] == [
+        [1, "u", 1, 2, CREATOR],
+        [2, "u", 1, 2, CREATOR],
+    ]
@@ -0,0 +1,56 @@
+import io
+import json
+import logging
+
+import pytest
+from loguru import logger
+
+from src.utils import InterceptHandler, JsonLogSink
+
+
+@pytest.fixture
+def stdlib():
+    stdlib = logging.getLogger("tests.discord")
+    stdlib.propagate = False
+    stdlib.setLevel(logging.INFO)
+    handler = InterceptHandler(logging.INFO)
+    stdlib.addHandler(handler)
+    yield stdlib
+    stdlib.removeHandler(handler)
+
+
+def test_json_lines_with_stdlib_caller(stdlib):
+    stream = io.StringIO()
+    sink = JsonLogSink(stream, flush_interval=60)
+    handler_id = logger.add(sink, level="INFO", format="{message}")
+    try:
+        stdlib.info("Shard ID %s has connected", None)
+        stdlib.debug("Dropped before a record is created")
+        logger.bind(guild=1).warning("Временный канал удален")
+    finally:
+        logger.remove(handler_id)
+        sink.close()
+
+    first, second = map(json.loads, stream.getvalue().splitlines())
+    assert first["message"] == "Shard ID None has connected"
+    assert first["logger"] == "tests.discord"
+    assert first["function"] == "test_json_lines_with_stdlib_caller"
+    assert second["message"] == "Временный канал удален"
+    assert second["level"] == "WARNING"
+    assert second["extra"] == {"guild": 1}
+    assert sink.written == 2
+
+
+def test_full_queue_drops():
+    stream = io.StringIO()
+    sink = JsonLogSink(stream, capacity=2, batch_size=10, flush_interval=60)
+    handler_id = logger.add(sink, level="INFO", format="{message}")
+    try:
+        for i in range(5):
+            logger.info(f"Record {i}")
+    finally:
+        logger.remove(handler_id)
+        sink.close()
+
+    assert sink.dropped == 3
+    assert len(stream.getvalue().splitlines()) == 2
@@ -0,0 +1,54 @@
+import aiohttp
+import pytest
+
+from src.utils import MetricsRegistry, MetricsServer
+
+
+def test_render_prometheus_text():
+    registry = MetricsRegistry()
+    registry.counter("edits_total", "Edits").inc()
+    registry.gauge(
+        "channels", "Channels", ("guild",), collect=lambda: {(1,): 3}
+    )
+    histogram = registry.histogram(
+        "request_seconds", "Requests", ("route",), buckets=(0.1, 1.0)
+    )
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(value, route='/a"b')
+
+    assert registry.render() == (
+        "# HELP edits_total Edits\n"
+        "# TYPE edits_total counter\n"
+        "edits_total 1\n"
+        "# HELP channels Channels\n"
+        "# TYPE channels gauge\n"
+        'channels{guild="1"} 3\n'
+        "# HELP request_seconds Requests\n"
+        "# TYPE request_seconds histogram\n"
+        'request_seconds_bucket{route="/a\\"b",le="0.1"} 2\n'
+        'request_seconds_bucket{route="/a\\"b",le="1.0"} 3\n'
+        'request_seconds_bucket{route="/a\\"b",le="+Inf"} 4\n'
+        'request_seconds_sum{route="/a\\"b"} 5.65\n'
+        'request_seconds_count{route="/a\\"b"} 4\n'
+    )
+    assert registry.histogram("request_seconds", "", ("route",)) is histogram
+    with pytest.raises(ValueError):
+        registry.counter("request_seconds", "")
+    with pytest.raises(ValueError):
+        histogram.observe(1.0)
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint():
+    registry = MetricsRegistry()
+    registry.counter("edits_total", "Edits").inc(2)
+    server = MetricsServer(registry, "127.0.0.1", 0)
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            url = f"http://127.0.0.1:{server.port}/metrics"
+            async with session.get(url) as response:
+                assert response.status == 200
+                assert "edits_total 2\n" in await response.text()
+    finally:
+        await server.stop()
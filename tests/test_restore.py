@@ -0,0 +1,122 @@
+from datetime import timedelta
+
+import discord
+import pytest
+from pytest_mock import MockFixture
+
+from src.models import TempChannels
+from src.services import ChannelRestorer
+from src.utils import RestDispatcher
+
+
+def adv_message(
+    mocker: MockFixture, msg_id: int, author_id: int = 1, age_days: int = 0
+):
+    button = mocker.Mock(spec=discord.Button, url="https://discord.gg/test")
+    return mocker.Mock(
+        id=msg_id,
+        author=mocker.Mock(id=author_id),
+        embeds=[mocker.Mock()],
+        components=[mocker.Mock(spec=discord.ActionRow, children=[button])],
+        created_at=discord.utils.utcnow() - timedelta(days=age_days),
+    )
+
+
+def history(messages):
+    async def _history(**_):
+        for message in messages:
+            yield message
+
+    return _history
+
+
+@pytest.fixture
+def restorer(mocker: MockFixture) -> ChannelRestorer:
+    bot = mocker.Mock()
+    bot.user.id = 1
+    bot.rest = RestDispatcher()
+    return ChannelRestorer(bot, concurrency=1)
+
+
+@pytest.fixture
+def adv_cleared(mocker: MockFixture):
+    query = mocker.Mock(update=mocker.AsyncMock())
+    mocker.patch("src.models.TempChannels.filter", return_value=query)
+    return query
+
+
+def adv_channel(mocker: MockFixture, messages):
+    adv_channel = mocker.Mock()
+    adv_channel.history = history(messages)
+    adv_channel.delete_messages = mocker.AsyncMock()
+    adv_channel.fetch_message = mocker.AsyncMock(
+        side_effect=discord.NotFound(mocker.Mock(status=404), "")
+    )
+    adv_channel.get_partial_message.return_value.delete = mocker.AsyncMock()
+    return adv_channel
+
+
+@pytest.mark.asyncio
+async def test_reconcile_adv(mocker: MockFixture, restorer, adv_cleared):
+    live, orphan, foreign, stale = (
+        adv_message(mocker, 100),
+        adv_message(mocker, 101),
+        adv_message(mocker, 102, author_id=2),
+        adv_message(mocker, 98, age_days=30),
+    )
+    server = mocker.Mock()
+    server.adv_channel = adv_channel(mocker, [live, orphan, foreign, stale])
+
+    channels = [
+        (mocker.Mock(members=[mocker.Mock()]), mocker.Mock(dis_adv_msg_id=100)),
+        (mocker.Mock(members=[mocker.Mock()]), mocker.Mock(dis_adv_msg_id=99)),
+        (
+            mocker.Mock(members=[mocker.Mock()]),
+            mocker.Mock(dis_adv_msg_id=None),
+        ),
+        # Empty channel, its ad is too old for bulk delete
+        (mocker.Mock(members=[]), mocker.Mock(dis_adv_msg_id=98)),
+    ]
+
+    found = await restorer._reconcile_adv(server, channels)
+
+    assert found == {100: live}
+    server.adv_channel.delete_messages.assert_awaited_once_with(
+        [orphan], reason="Orphaned temp voice adv."
+    )
+    server.adv_channel.get_partial_message.assert_called_once_with(98)
+    server.adv_channel.get_partial_message.return_value.delete.assert_awaited_once()
+    server.adv_channel.fetch_message.assert_not_awaited()
+    adv_cleared.update.assert_awaited_once_with(dis_adv_msg_id=None)
+    assert TempChannels.filter.call_args.kwargs == {"dis_adv_msg_id__in": {99}}
+
+
+@pytest.mark.asyncio
+async def test_reconcile_adv_past_scan_limit(
+    mocker: MockFixture, restorer, adv_cleared
+):
+    mocker.patch("src.services.restore.HISTORY_SCAN_LIMIT", 2)
+    old_live = adv_message(mocker, 50, age_days=60)
+    server = mocker.Mock()
+    server.adv_channel = adv_channel(
+        mocker, [adv_message(mocker, 200), adv_message(mocker, 150)]
+    )
+    server.adv_channel.fetch_message.side_effect = [
+        old_live,
+        discord.NotFound(mocker.Mock(status=404), ""),
+    ]
+
+    channels = [
+        (mocker.Mock(members=[mocker.Mock()]), mocker.Mock(dis_adv_msg_id=50)),
+        (mocker.Mock(members=[mocker.Mock()]), mocker.Mock(dis_adv_msg_id=60)),
+        # Within the scanned range and not there
+        (mocker.Mock(members=[mocker.Mock()]), mocker.Mock(dis_adv_msg_id=175)),
+    ]
+
+    found = await restorer._reconcile_adv(server, channels)
+
+    assert found == {50: old_live}
+    assert server.adv_channel.fetch_message.await_count == 2
+    assert TempChannels.filter.call_args.kwargs == {
+        "dis_adv_msg_id__in": {60, 175}
+    }
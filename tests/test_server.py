@@ -1,3 +1,6 @@
+import asyncio
+import os
+import signal
 from types import MappingProxyType
 
 import discord
@@ -69,10 +72,24 @@ async def test_update_settings(mocker: MockFixture, server):
     assert server._creator_channels[1].dis_id == 1
 
 
+@pytest.mark.asyncio
+async def test_update_settings_after_invalidation(mocker: MockFixture, server):
+    mock_update_settings = mocker.patch.object(
+        server, "_update_settings", new_callable=mocker.AsyncMock
+    )
+
+    await server.update_settings()
+    mock_update_settings.assert_not_awaited()
+
+    server.invalidate_settings()
+    await server.update_settings()
+    mock_update_settings.assert_awaited_once_with(server.guild.id)
+
+
 @pytest.mark.asyncio
 async def test_create_channel(mocker: MockFixture, server):
     server._creator_channels = MappingProxyType(
-        {1: mocker.Mock(dis_category_id=1)}
+        {1: mocker.Mock(dis_category_id=1, warm_pool_size=0)}
     )
     mock_get_channel = mocker.patch(
         "src.services.PartySysBot.get_channel",
@@ -114,8 +131,10 @@ async def test_get_member_tv_owner(mocker: MockFixture, server):
         guild_permissions=mocker.Mock(administrator=False),
         spec=discord.Member,
     )
-    temp_channel = mocker.AsyncMock(id=11, owner=member)
-    server._temp_channels = {11: temp_channel}
+    temp_channel = mocker.AsyncMock(
+        channel=mocker.Mock(id=11), owner=member, creator=member
+    )
+    server._add_channel(temp_channel)
 
     assert server.get_member_tv(member)
     assert server.get_member_tv(mocker.Mock(id=1)) is False
@@ -128,8 +147,10 @@ async def test_get_member_tv_admin(mocker: MockFixture, server):
         guild_permissions=mocker.Mock(administrator=True),
         spec=discord.Member,
     )
-    temp_channel = mocker.AsyncMock(id=11, owner=mocker.Mock(id=3))
-    server._temp_channels = {11: temp_channel}
+    temp_channel = mocker.AsyncMock(
+        channel=mocker.Mock(id=11), owner=mocker.Mock(id=4), creator=None
+    )
+    server._add_channel(temp_channel)
 
     assert server.get_member_tv(member, 11)
     assert server.get_member_tv(member) is False
@@ -143,15 +164,39 @@ async def test_get_member_transferred_tv(mocker: MockFixture, server):
         spec=discord.Member,
     )
     temp_channel = mocker.AsyncMock(
-        id=11,
+        channel=mocker.Mock(id=11),
+        owner=mocker.Mock(id=4),
         creator=member,
     )
-    server._temp_channels = {11: temp_channel}
+    server._add_channel(temp_channel)
 
     assert server.get_member_transferred_tv(member)
     assert server.get_member_transferred_tv(mocker.Mock(id=1)) is False
 
 
+@pytest.mark.asyncio
+async def test_owner_index_consistency(mocker: MockFixture, server):
+    creator, new_owner = mocker.Mock(id=3), mocker.Mock(id=4)
+    temp_channel = mocker.AsyncMock(
+        channel=mocker.Mock(id=11), owner=creator, creator=creator
+    )
+    server._add_channel(temp_channel)
+
+    temp_channel.owner = new_owner
+    server.update_owner_index(temp_channel, creator)
+
+    assert server.get_member_tv(new_owner) is temp_channel
+    assert server.get_member_tv(creator) is False
+    assert server.get_member_transferred_tv(creator) is temp_channel
+
+    await server.del_channel(11)
+
+    assert server.get_member_tv(new_owner) is False
+    assert server.get_member_transferred_tv(creator) is False
+    assert not server._owners
+    assert not server._creators
+
+
 @pytest.mark.asyncio
 async def test_channel(mocker: MockFixture, server):
     channel = mocker.Mock(id=1)
@@ -172,7 +217,7 @@ async def test_restore_channel_without_adv(mocker: MockFixture, server):
     mock_adv_update = mocker.patch("src.ui.adv.Adv.update")
     channel = mocker.Mock(id=1)
 
-    res = await server.restore_channel(channel, 1, 1, 0)
+    res = await server.restore_channel(channel, 1, 1, None)
 
     mock_fetch_message.assert_not_called()
     mock_adv_update.assert_not_called()
@@ -186,13 +231,52 @@ async def test_restore_channel_with_adv(mocker: MockFixture, server):
     server.guild.get_member.return_value = mocker.Mock(
         id=1, spec=discord.Member
     )
-    server.adv_channel = mocker.AsyncMock(id=11)
     mock_adv_update = mocker.patch("src.ui.adv.Adv.update")
     channel = mocker.Mock(id=1)
+    adv_msg = mocker.Mock(id=11, spec=discord.Message)
 
-    res = await server.restore_channel(channel, 1, 1, 11)
+    res = await server.restore_channel(channel, 1, 1, adv_msg)
 
-    mock_adv_update.assert_called_once_with(res)
+    mock_adv_update.assert_awaited_once()
+    assert res.adv
     assert isinstance(res, TempVoiceABC)
     assert res.channel.id == channel.id
     assert server.channel(channel.id) == res
+
+
+@pytest.mark.asyncio
+async def test_concurrent_server_load(mocker: MockFixture, bot):
+    mocker.patch.dict("config.CFG", {"squad_names": []})
+    mocker.patch.object(bot, "servers", {})
+    mocker.patch.object(bot, "get_guild", return_value=mocker.Mock(id=1))
+
+    async def _update_settings(*_):
+        await asyncio.sleep(0)  # Lets the other event start loading
+
+    mocker.patch("src.services.Server._update_settings", _update_settings)
+
+    first, second = await asyncio.gather(bot.server(1), bot.server(1))
+
+    assert first is second is bot.servers[1]
+
+
+@pytest.mark.asyncio
+async def test_close_on_sigterm(mocker: MockFixture, bot):
+    close = mocker.patch("src.utils.TempChannelsWriteBehind.close")
+    mocker.patch("src.utils.MetricAggregator.close")
+    loop = asyncio.get_running_loop()
+    bot.close_on_signals()
+
+    try:
+        os.kill(os.getpid(), signal.SIGTERM)
+        for _ in range(100):  # Until the loop runs the handler
+            await asyncio.sleep(0.01)
+            if hasattr(bot, "_closing"):
+                break
+    finally:
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.remove_signal_handler(signum)
+    await bot._closing
+
+    close.assert_awaited_once()
+    assert bot.is_closed()
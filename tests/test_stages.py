@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import pytest
+from loguru import logger
+
+from src.utils import SamplingProfiler, SlowStages
+
+
+@pytest.fixture
+def warnings():
+    messages = []
+    handler_id = logger.add(
+        messages.append, level="WARNING", format="{message}"
+    )
+    yield messages
+    logger.remove(handler_id)
+
+
+@pytest.mark.asyncio
+async def test_slow_nested_stage(warnings):
+    stages = SlowStages()
+    stages.threshold = 0.03
+
+    with stages.stage("Voice.on_voice_state_update", 1):
+        await asyncio.sleep(0.04)  # Disabled, nothing is logged
+
+    stages.enabled = True
+    with stages.stage("Voice.on_voice_state_update", 1):
+        with stages.stage("db Servers SELECT"):
+            await asyncio.sleep(0.01)
+        with stages.stage("rest PATCH /channels/{channel_id}"):
+            await asyncio.sleep(0.04)
+
+    assert stages.slow == 2
+    assert [message.split(":")[0] for message in warnings] == [
+        "Slow stage Voice.on_voice_state_update > rest PATCH "
+        "/channels/{channel_id} of guild 1",
+        "Slow stage Voice.on_voice_state_update of guild 1",
+    ]
+
+
+def busy_loop(profiler: SamplingProfiler, samples: int) -> None:
+    # Until sampled while looping, not for a fixed time, so a slow sampler
+    # thread can't make it flaky
+    samples += profiler.samples
+    until = time.perf_counter() + 10
+    while profiler.samples < samples and time.perf_counter() < until:
+        pass
+
+
+def test_sampling_profiler(tmp_path):
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    busy_loop(profiler, 3)
+    profiler.stop()
+
+    path = tmp_path / "profiles" / "profile.folded"
+    profiler.write(str(path))
+    stacks = dict(line.rsplit(" ", 1) for line in path.read_text().splitlines())
+    assert profiler.samples > 0
+    # Samples taken before the loop catch the test in start()
+    busy = (
+        f"test_sampling_profiler (test_stages.py:"
+        f"{test_sampling_profiler.__code__.co_firstlineno})"
+        f";busy_loop (test_stages.py:{busy_loop.__code__.co_firstlineno})"
+    )
+    assert any(
+        stack.endswith(busy) and int(count) > 0
+        for stack, count in stacks.items()
+    )
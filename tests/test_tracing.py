@@ -0,0 +1,130 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+import sentry_sdk
+from sentry_sdk.transport import Transport
+
+from src.utils import AdaptiveSampler, MetricsRegistry, span, tracing
+
+
+def transaction(op: str, seconds: float, status: str = "ok") -> dict:
+    started_at = datetime(2026, 1, 1)
+    finished_at = started_at + timedelta(seconds=seconds)
+    return {
+        "contexts": {"trace": {"op": op, "status": status}},
+        "start_timestamp": started_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        "timestamp": finished_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+    }
+
+
+def test_adaptive_decisions():
+    metrics = MetricsRegistry()
+    sampler = AdaptiveSampler(
+        metrics,
+        rate=0.0,
+        priority_rate=1.0,
+        slow_threshold=1.0,
+        profiles_rate=0.0,
+        budget_per_minute=3,
+        overrides={"ui.view": 1.0},
+    )
+    context = {"transaction_context": {"op": "voice.refresh"}}
+
+    assert sampler.traces_sampler(context) == 0.0
+    assert (
+        sampler.traces_sampler({"transaction_context": {"op": "ui.view"}})
+        == 1.0
+    )
+    assert sampler.before_send_transaction(transaction("voice.refresh", 2), {})
+    assert sampler.before_send_transaction(
+        transaction("voice.refresh", 0.1, "internal_error"), {}
+    )
+    assert sampler.before_send_transaction(transaction("ui.view", 0.1), {})
+
+    # Budget of the minute is spent, nothing is recorded or sent
+    assert not sampler.before_send_transaction(
+        transaction("voice.create", 5), {}
+    )
+    assert sampler.traces_sampler(context) == 0.0
+
+    decisions = metrics["sentry_transactions_total"]
+    assert {
+        decision: decisions.value(op=op, decision=decision)
+        for op, decision in (
+            ("voice.refresh", "unsampled"),
+            ("voice.refresh", "slow"),
+            ("voice.refresh", "error"),
+            ("ui.view", "routine"),
+            ("voice.create", "over_budget"),
+        )
+    } == {
+        "unsampled": 1,
+        "slow": 1,
+        "error": 1,
+        "routine": 1,
+        "over_budget": 1,
+    }
+    assert decisions.value(op="voice.refresh", decision="over_budget") == 1
+
+
+class CapturedTransport(Transport):
+    def __init__(self):
+        super().__init__()
+        self.transactions = []
+
+    def capture_envelope(self, envelope):
+        if event := envelope.get_transaction_event():
+            self.transactions.append(event)
+
+
+def test_unsampled_promoted(monkeypatch):
+    metrics = MetricsRegistry()
+    sampler = AdaptiveSampler(
+        metrics,
+        rate=0.0,
+        priority_rate=1.0,
+        slow_threshold=0.05,
+        profiles_rate=0.0,
+        budget_per_minute=10,
+        overrides={"ui.view": 1.0},
+    )
+    monkeypatch.setattr(tracing, "_sampler", sampler)
+    transport = CapturedTransport()
+    client = sentry_sdk.Client(
+        transport=transport,
+        enable_tracing=True,
+        traces_sampler=sampler.traces_sampler,
+        before_send_transaction=sampler.before_send_transaction,
+    )
+
+    with sentry_sdk.Hub(client):
+        # Spans of unsampled transactions are never created
+        with (
+            tracing.transaction("voice.refresh", "routine"),
+            span("db", "SELECT 1") as db,
+        ):
+            assert db is None
+        with tracing.transaction("voice.refresh", "slow"):
+            time.sleep(0.06)
+        with (
+            pytest.raises(ValueError),
+            tracing.transaction("voice.refresh", "error"),
+        ):
+            raise ValueError
+        with tracing.transaction("ui.view", "sampled"), span("db", "SELECT 1"):
+            pass
+
+    # Promoted ones are sent without spans
+    assert {
+        event["transaction"]: len(event["spans"])
+        for event in transport.transactions
+    } == {"slow": 0, "error": 0, "sampled": 1}
+    assert transport.transactions[1]["contexts"]["trace"]["status"] == (
+        "internal_error"
+    )
+    decisions = metrics["sentry_transactions_total"]
+    assert decisions.value(op="voice.refresh", decision="unsampled") == 3
+    assert decisions.value(op="voice.refresh", decision="slow") == 1
+    assert decisions.value(op="ui.view", decision="routine") == 1
+    assert metrics["sentry_loop_seconds_total"].value(op="ui.view") > 0
@@ -0,0 +1,52 @@
+import pytest
+from pytest_mock import MockFixture
+
+from src.utils import TempChannelsWriteBehind
+
+
+@pytest.fixture
+def mock_filter(mocker: MockFixture):
+    mock_filter = mocker.patch("src.utils.write_behind.TempChannels.filter")
+    mock_filter.return_value.update = mocker.AsyncMock()
+    mock_filter.return_value.delete = mocker.AsyncMock()
+    return mock_filter
+
+
+@pytest.mark.asyncio
+async def test_writes_merged(mock_filter):
+    writes = TempChannelsWriteBehind(flush_interval=60)
+
+    writes.update(1, dis_adv_msg_id=10)
+    writes.update(1, dis_adv_msg_id=None)
+    writes.update(1, dis_owner_id=5)
+    writes.update(2, dis_adv_msg_id=20)
+    writes.update(3, dis_adv_msg_id=30)
+    writes.delete(3)
+    writes.update(3, dis_owner_id=6)  # Row is deleted anyway
+
+    assert len(writes) == 3
+    assert writes.merged == 3
+    await writes.close()
+
+    # One DELETE and one UPDATE per changed column
+    mock_filter.assert_any_call(dis_id__in=[3])
+    mock_filter.assert_any_call(dis_id__in=[1, 2])
+    mock_filter.assert_any_call(dis_id__in=[1])
+    assert mock_filter.return_value.update.await_count == 2
+    assert len(writes) == 0
+    assert writes.flushes == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_requeued(mocker: MockFixture, mock_filter):
+    writes = TempChannelsWriteBehind(flush_interval=60)
+    mock_filter.return_value.update.side_effect = [ConnectionError, None, None]
+
+    writes.update(1, dis_owner_id=5)
+    with pytest.raises(ConnectionError):
+        await writes.flush()
+    writes.update(1, dis_adv_msg_id=10)
+
+    assert len(writes) == 1
+    assert writes._updates[1] == {"dis_owner_id": 5, "dis_adv_msg_id": 10}
+    await writes.close()